@@ -0,0 +1,73 @@
+import heapq
+from typing import Dict, List, Sequence, Tuple
+
+# Weekly study-time allocation.
+#
+# _calculate_impact is linear in hours, so total impact over the horizon is
+# maximised by scheduling every usable hour; what remains is how to split
+# them. Availability is keyed by weekday and buffer days fall on every 7th
+# day of the plan, so every 7-day window of the plan has the same shape:
+# one week is solved and reused for the whole horizon.
+
+BLOCK_EPS = 1e-9
+
+
+def apportion_blocks(n_blocks: int, weights: Dict[str, float], min_blocks: int = 1) -> Dict[str, int]:
+    # Splits n_blocks between skills in proportion to their weights. Every
+    # skill with a positive weight first gets min_blocks (while blocks last),
+    # then each remaining block goes to the skill furthest below its share.
+    skills = [s for s, w in weights.items() if w > 0] or list(weights)
+    total_weight = sum(weights[s] for s in skills)
+    if total_weight <= 0:
+        shares = {s: 1.0 / len(skills) for s in skills}
+    else:
+        shares = {s: weights[s] / total_weight for s in skills}
+
+    counts = {s: 0 for s in weights}
+    remaining = n_blocks
+    for skill in sorted(skills, key=lambda s: -shares[s]):
+        take = min(min_blocks, remaining)
+        counts[skill] += take
+        remaining -= take
+    if remaining <= 0:
+        return counts
+
+    # Largest deficit first; O(n log k) for n blocks over k skills
+    heap = [(-(shares[s] * n_blocks - counts[s]), i, s) for i, s in enumerate(skills)]
+    heapq.heapify(heap)
+    for _ in range(remaining):
+        _, i, skill = heapq.heappop(heap)
+        counts[skill] += 1
+        heapq.heappush(heap, (-(shares[skill] * n_blocks - counts[skill]), i, skill))
+    return counts
+
+
+def allocate_week(day_hours: Sequence[float], weights: Dict[str, float], skill_order: Sequence[str],
+                  min_block: float = 0.5, min_weekly_blocks: int = 1) -> List[List[Tuple[str, float]]]:
+    # day_hours: usable hours for each day of the window (0 for buffer days).
+    # Returns, per day, (skill, hours) segments in skill_order. A day is cut
+    # into min_block blocks; the part of a day shorter than a block goes to
+    # that day's last segment, so no available time is dropped. Days shorter
+    # than one block cannot hold a task and stay empty.
+    blocks_per_day = [int(h / min_block + BLOCK_EPS) if h > 0 else 0 for h in day_hours]
+    counts = apportion_blocks(sum(blocks_per_day), weights, min_weekly_blocks)
+
+    # Lay each skill's blocks out contiguously across the week so that a
+    # skill gets a few longer sessions rather than many short ones.
+    sequence = [skill for skill in skill_order for _ in range(counts.get(skill, 0))]
+    plan = []
+    position = 0
+    for hours, n_blocks in zip(day_hours, blocks_per_day):
+        segments: List[Tuple[str, float]] = []
+        for skill in sequence[position:position + n_blocks]:
+            if segments and segments[-1][0] == skill:
+                segments[-1] = (skill, segments[-1][1] + min_block)
+            else:
+                segments.append((skill, min_block))
+        position += n_blocks
+        leftover = hours - n_blocks * min_block
+        if segments and leftover > BLOCK_EPS:
+            skill, seg_hours = segments[-1]
+            segments[-1] = (skill, seg_hours + leftover)
+        plan.append(segments)
+    return plan
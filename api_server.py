@@ -0,0 +1,245 @@
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+import tornado.httpserver
+import tornado.netutil
+import tornado.process
+import tornado.web
+
+from models import DailySchedule, LearningLog, StudyTask, UserProfile
+from scheduler import IELTSScheduler
+from exports import iter_csv
+from plan_store import PlanStore
+from serialization import FORMAT_VERSION, dump_diff, dump_timetable, load_profile, load_tasks, load_timetable, profile_key
+
+# Headless JSON API around IELTSScheduler. Plan generation is CPU-bound, so it
+# runs in a process pool and the event loop only parses and writes JSON.
+#
+#   POST /generate        {"profile": {...}, "seed": 1?}   (served from the plan store when it has it)
+#   POST /recalculate     {"profile": {...}, "timetable": {...}, "from_date": "YYYY-MM-DD"?,
+#                          "completed_tasks": {...}? | "learner_id": "..."?}
+#   POST /log-completion  {"learner_id": "...", "completed": true,
+#                          "task": {"id", "skill", "duration_hours", "predicted_impact", ...}}
+#   GET  /export/csv?learner_id=...   completed tasks as CSV, streamed in chunks
+#   GET  /health
+
+
+def _seed(data: Dict) -> Optional[int]:
+    seed = data.get('seed')
+    if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool)):
+        raise ValueError("'seed' must be an integer")
+    return seed
+
+
+def _generate(profile: UserProfile, seed: Optional[int], store_dir: Optional[str] = None) -> str:
+    scheduler = IELTSScheduler(profile, seed=seed)
+
+    def build() -> bytes:
+        timetable = scheduler.generate_timetable()
+        return json.dumps({'timetable': dump_timetable(timetable)},
+                          separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    if not store_dir:
+        return build().decode('utf-8')
+    # Generation is deterministic in these inputs, so the response itself is cached
+    key = PlanStore.key(profile=profile_key(profile), seed=scheduler.seed, start=date.today().isoformat(),
+                        catalog=scheduler.catalog.fingerprint, format=FORMAT_VERSION)
+    return PlanStore(store_dir).get_or_create(key, build).decode('utf-8')
+
+
+def _recalculate(profile: UserProfile, timetable: List[DailySchedule], completed: Optional[List[StudyTask]],
+                 from_date: Optional[date], seed: Optional[int]) -> str:
+    scheduler = IELTSScheduler(profile, seed=seed)
+    timetable, diff = scheduler.regenerate_from(timetable, from_date=from_date, completed_tasks=completed)
+    return json.dumps({'timetable': dump_timetable(timetable), 'diff': dump_diff(diff)},
+                      separators=(',', ':'), ensure_ascii=False)
+
+
+class Service:
+    def __init__(self, cpu_executor: Executor, db_path: str, plan_store_dir: Optional[str] = None):
+        self.cpu_executor = cpu_executor
+        self.io_executor = ThreadPoolExecutor(max_workers=4)
+        self.db_path = db_path
+        self.plan_store_dir = plan_store_dir
+        self._logs: Dict[str, LearningLog] = {}
+
+    def learning_log(self, learner_id: str) -> LearningLog:
+        log = self._logs.get(learner_id)
+        if log is None:
+            log = self._logs[learner_id] = LearningLog(self.db_path, learner_id)
+        return log
+
+    async def run_cpu(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.cpu_executor, fn, *args)
+
+    async def run_io(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.io_executor, fn, *args)
+
+
+class JSONHandler(tornado.web.RequestHandler):
+    def initialize(self, service: Service):
+        self.service = service
+
+    def body(self) -> Dict:
+        try:
+            data = json.loads(self.request.body or b'{}')
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason="Body must be JSON")
+        if not isinstance(data, dict):
+            raise tornado.web.HTTPError(400, reason="Body must be a JSON object")
+        return data
+
+    def write_json(self, payload):
+        self.set_header('Content-Type', 'application/json; charset=utf-8')
+        self.finish(payload if isinstance(payload, str) else json.dumps(payload, separators=(',', ':')))
+
+    def write_error(self, status_code: int, **kwargs):
+        self.write_json({'error': self._reason})
+
+
+class HealthHandler(JSONHandler):
+    def get(self):
+        self.write_json({'status': 'ok', 'pid': os.getpid()})
+
+
+class GenerateHandler(JSONHandler):
+    async def post(self):
+        data = self.body()
+        if 'profile' not in data:
+            raise tornado.web.HTTPError(400, reason="Missing 'profile'")
+        # The whole body is checked here, so the worker only sees valid input
+        try:
+            profile = load_profile(data['profile'])
+            seed = _seed(data)
+        except ValueError as e:
+            raise tornado.web.HTTPError(400, reason=str(e))
+        self.write_json(await self.service.run_cpu(_generate, profile, seed, self.service.plan_store_dir))
+
+
+class RecalculateHandler(JSONHandler):
+    async def post(self):
+        data = self.body()
+        if 'profile' not in data or 'timetable' not in data:
+            raise tornado.web.HTTPError(400, reason="Missing 'profile' or 'timetable'")
+        try:
+            profile = load_profile(data['profile'])
+            timetable = load_timetable(data['timetable'])
+            completed = load_tasks(data['completed_tasks']) if 'completed_tasks' in data else None
+            from_date = data.get('from_date')
+            if from_date is not None:
+                if not isinstance(from_date, str):
+                    raise ValueError("'from_date' must be YYYY-MM-DD")
+                from_date = date.fromisoformat(from_date)
+            seed = _seed(data)
+            learner_id = data.get('learner_id')
+            if learner_id is not None and not isinstance(learner_id, str):
+                raise ValueError("'learner_id' must be a string")
+        except ValueError as e:
+            raise tornado.web.HTTPError(400, reason=str(e))
+        if completed is None and learner_id is not None:
+            completed = await self.service.run_io(lambda: self.service.learning_log(learner_id).tasks())
+        self.write_json(await self.service.run_cpu(_recalculate, profile, timetable, completed, from_date, seed))
+
+
+class LogCompletionHandler(JSONHandler):
+    async def post(self):
+        data = self.body()
+        try:
+            learner_id = data['learner_id']
+            raw = data['task']
+            if not isinstance(learner_id, str) or not isinstance(raw, dict):
+                raise ValueError("'learner_id' must be a string and 'task' an object")
+            for key in ('id', 'skill'):
+                if not isinstance(raw.get(key), str):
+                    raise ValueError(f"task '{key}' must be a string")
+            for key in ('description', 'resource_link', 'study_guide'):
+                if raw.get(key) is not None and not isinstance(raw[key], str):
+                    raise ValueError(f"task '{key}' must be a string")
+            task = StudyTask(
+                id=raw['id'],
+                skill=raw['skill'],
+                description=raw.get('description', ''),
+                duration_hours=float(raw['duration_hours']),
+                is_completed=True,
+                completed_at=datetime.fromisoformat(raw['completed_at']) if raw.get('completed_at') else None,
+                predicted_impact=float(raw.get('predicted_impact', 0.0)),
+                resource_link=raw.get('resource_link'),
+                study_guide=raw.get('study_guide')
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            raise tornado.web.HTTPError(400, reason=f"Invalid completion: {e}")
+
+        def apply():
+            log = self.service.learning_log(learner_id)
+            if data.get('completed', True):
+                log.add_task(task)
+            else:
+                log.remove_task(task.id)
+            return {'learner_id': learner_id, 'completed_tasks': len(log), 'version': log.version}
+
+        self.write_json(await self.service.run_io(apply))
+
+
+class ExportCSVHandler(JSONHandler):
+    async def get(self):
+        learner_id = self.get_query_argument('learner_id', None)
+        if not learner_id:
+            raise tornado.web.HTTPError(400, reason="Missing 'learner_id'")
+        tasks = await self.service.run_io(lambda: self.service.learning_log(learner_id).tasks())
+        self.set_header('Content-Type', 'text/csv; charset=utf-8')
+        self.set_header('Content-Disposition', f'attachment; filename="ielts_log_{learner_id}.csv"')
+        for chunk in iter_csv(tasks):
+            self.write(chunk)
+            await self.flush()
+        self.finish()
+
+
+def make_app(service: Service) -> tornado.web.Application:
+    args = {'service': service}
+    return tornado.web.Application([
+        (r'/health', HealthHandler, args),
+        (r'/generate', GenerateHandler, args),
+        (r'/recalculate', RecalculateHandler, args),
+        (r'/log-completion', LogCompletionHandler, args),
+        (r'/export/csv', ExportCSVHandler, args),
+    ])
+
+
+async def _serve(sockets, workers: int, db_path: str, plan_store_dir: Optional[str]):
+    # One CPU worker per server process by default; inline threads for tests
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else ThreadPoolExecutor(max_workers=1)
+    server = tornado.httpserver.HTTPServer(make_app(Service(executor, db_path, plan_store_dir)))
+    server.add_sockets(sockets)
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless IELTS iLMS timetable API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--processes", type=int, default=1,
+                        help="server processes sharing the port (0 = one per CPU)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="scheduler worker processes per server process (0 = run in a thread)")
+    parser.add_argument("--db", default=os.environ.get('ILMS_DB_PATH', 'ilms_learning_log.sqlite3'))
+    parser.add_argument("--plan-store", default=os.environ.get('ILMS_PLAN_STORE', 'ilms_plans'),
+                        help="directory of cached generated plans, shared by all processes ('' = off)")
+    parser.add_argument("--plan-store-max-age", type=float, default=7,
+                        help="days after which cached plans are removed at startup")
+    args = parser.parse_args()
+
+    if args.plan_store:
+        PlanStore(args.plan_store).prune(args.plan_store_max_age)
+    sockets = tornado.netutil.bind_sockets(args.port, args.host)
+    if args.processes != 1:
+        tornado.process.fork_processes(args.processes)
+    asyncio.run(_serve(sockets, args.workers, args.db, args.plan_store or None))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from models import UserProfile, DailySchedule
+from scheduler import IELTSScheduler
+from catalog import default_catalog
+from serialization import dump_timetables, load_timetables
+
+
+@dataclass
+class BatchStats:
+    profiles: int = 0
+    elapsed_seconds: float = 0.0
+    workers: int = 0
+
+    @property
+    def profiles_per_second(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.profiles / self.elapsed_seconds
+
+
+# A worker pays for process start-up and for shipping its plans back to the
+# parent, so the pool only beats the serial loop once every worker has this
+# many profiles to generate and there is a CPU for each of them. Below that,
+# or on a single CPU, generation runs serially.
+MIN_PROFILES_PER_WORKER = 64
+MAX_CHUNKSIZE = 256
+
+
+def _available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _init_worker():
+    # Forked workers inherit the parent's catalog; spawned ones build it once
+    # here instead of on their first chunk.
+    default_catalog()
+
+
+def _generate_chunk(chunk: List[Tuple[int, UserProfile]]) -> Tuple[List[int], Dict]:
+    # Plans go back in the compact form with one string table for the whole
+    # chunk: pickling DailySchedule objects costs more than generating them.
+    indices = [idx for idx, _ in chunk]
+    timetables = [IELTSScheduler(profile).generate_timetable() for _, profile in chunk]
+    return indices, dump_timetables(timetables)
+
+
+def _pool_size(n: int, max_workers: Optional[int]) -> int:
+    workers = min(max_workers or _available_cpus(), _available_cpus(), n // MIN_PROFILES_PER_WORKER)
+    return max(1, workers)
+
+
+def generate_timetables(profiles: Iterable[UserProfile], max_workers: Optional[int] = None,
+                        chunksize: Optional[int] = None, stats: Optional[BatchStats] = None
+                        ) -> Iterator[Tuple[int, List[DailySchedule]]]:
+    # Yields (input index, timetable) pairs in completion order, not input order.
+    indexed = list(enumerate(profiles))
+    stats = stats if stats is not None else BatchStats()
+    stats.profiles = 0
+    stats.workers = _pool_size(len(indexed), max_workers)
+    if chunksize is None:
+        # A few chunks per worker keeps them busy while amortising the IPC
+        chunksize = min(MAX_CHUNKSIZE, -(-len(indexed) // (stats.workers * 4)))
+    chunksize = max(1, chunksize)
+
+    default_catalog()
+    started = time.perf_counter()
+    if stats.workers == 1:
+        for idx, profile in indexed:
+            timetable = IELTSScheduler(profile).generate_timetable()
+            stats.profiles += 1
+            stats.elapsed_seconds = time.perf_counter() - started
+            yield idx, timetable
+        return
+
+    chunks = [indexed[i:i + chunksize] for i in range(0, len(indexed), chunksize)]
+    with ProcessPoolExecutor(max_workers=stats.workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(_generate_chunk, chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            indices, data = future.result()
+            for idx, timetable in zip(indices, load_timetables(data)):
+                stats.profiles += 1
+                stats.elapsed_seconds = time.perf_counter() - started
+                yield idx, timetable
+
+
+def generate_timetables_list(profiles: Iterable[UserProfile], max_workers: Optional[int] = None,
+                             chunksize: Optional[int] = None) -> Tuple[List[List[DailySchedule]], BatchStats]:
+    profiles = list(profiles)
+    stats = BatchStats()
+    timetables: List[Optional[List[DailySchedule]]] = [None] * len(profiles)
+    for idx, timetable in generate_timetables(profiles, max_workers, chunksize, stats):
+        timetables[idx] = timetable
+    return timetables, stats
+
+
+if __name__ == "__main__":
+    import argparse
+    import datetime
+
+    parser = argparse.ArgumentParser(description="Generate timetables for a synthetic cohort")
+    parser.add_argument("--profiles", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=None)
+    args = parser.parse_args()
+
+    skills = ['Listening', 'Reading', 'Writing', 'Speaking']
+    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    cohort = [
+        UserProfile(
+            current_scores={s: 5.0 + (i + j) % 4 * 0.5 for j, s in enumerate(skills)},
+            target_scores={s: 7.0 for s in skills},
+            exam_date=datetime.date.today() + datetime.timedelta(days=90),
+            availability={d: [18, 20] for d in days},
+            focus_level=1 + i % 5,
+            learning_style='Visual'
+        )
+        for i in range(args.profiles)
+    ]
+    stats = BatchStats()
+    for _ in generate_timetables(cohort, args.workers, args.chunksize, stats):
+        pass
+    print(f"{stats.profiles} profiles in {stats.elapsed_seconds:.2f}s "
+          f"({stats.profiles_per_second:.0f} profiles/s, {stats.workers} workers)")
@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError
+
+# synthetic puts the repository root on sys.path
+from synthetic import make_profile
+from serialization import dump_profile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+async def _wait_ready(client: AsyncHTTPClient, url: str, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await client.fetch(url + '/health')
+            return
+        except (ConnectionError, HTTPClientError, OSError):
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def _load(url: str, body: bytes, requests: int, concurrency: int) -> dict:
+    client = AsyncHTTPClient(max_clients=concurrency)
+    await _wait_ready(client, url)
+    remaining = requests
+    latencies = []
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            await client.fetch(url + '/generate', method='POST', body=body,
+                               headers={'Content-Type': 'application/json'}, request_timeout=120)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'seconds': elapsed,
+        'requests_per_second': len(latencies) / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000,
+    }
+
+
+def run(processes: int, requests: int, concurrency: int, horizon: int) -> dict:
+    # Scheduling runs in a thread of each server process (--workers 0), so
+    # N server processes use N cores. The plan store is off, or every request
+    # after the first would be a cache read rather than a generation. The
+    # server gets its own process group so its forked children go with it.
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'api_server.py'), '--port', str(port),
+         '--processes', str(processes), '--workers', '0', '--db', ':memory:', '--plan-store', ''],
+        cwd=ROOT, start_new_session=True
+    )
+    try:
+        body = json.dumps({'profile': dump_profile(make_profile(horizon)), 'seed': 1}).encode('utf-8')
+        result = asyncio.run(_load(f'http://127.0.0.1:{port}', body, requests, concurrency))
+    finally:
+        try:
+            os.killpg(server.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        server.wait()
+    result.update({'processes': processes, 'concurrency': concurrency, 'horizon_days': horizon})
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test for api_server.py /generate")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--horizon", type=int, default=90)
+    parser.add_argument("--processes", type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    results = [run(p, args.requests, args.concurrency, args.horizon) for p in args.processes]
+    print(json.dumps({'results': results}, indent=2))
@@ -0,0 +1,102 @@
+import argparse
+import dataclasses
+import gc
+import json
+import tracemalloc
+
+# synthetic puts the repository root on sys.path
+from synthetic import make_profile
+from columnar import ColumnarTimetable
+from models import StudyTask, DailySchedule
+from scheduler import IELTSScheduler
+
+
+def _legacy(cls):
+    # The same fields as a plain (dict-backed) dataclass, i.e. the model
+    # classes as they were before they were slotted.
+    fields = [(f.name, f.type, f) for f in dataclasses.fields(cls)]
+    fields = [(name, tp, dataclasses.field(default=f.default, default_factory=f.default_factory))
+              for name, tp, f in fields]
+    return dataclasses.make_dataclass(f"Legacy{cls.__name__}", fields)
+
+
+LegacyStudyTask = _legacy(StudyTask)
+LegacyDailySchedule = _legacy(DailySchedule)
+
+
+def _to_legacy(timetable):
+    return [
+        LegacyDailySchedule(
+            date=day.date,
+            tasks=[LegacyStudyTask(**{f.name: getattr(t, f.name) for f in dataclasses.fields(StudyTask)})
+                   for t in day.tasks],
+            is_buffer_day=day.is_buffer_day
+        )
+        for day in timetable
+    ]
+
+
+def _copy(timetable):
+    return [
+        DailySchedule(date=day.date, tasks=[dataclasses.replace(t) for t in day.tasks],
+                      is_buffer_day=day.is_buffer_day)
+        for day in timetable
+    ]
+
+
+def _measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak
+
+
+def run(days: int) -> dict:
+    base = IELTSScheduler(make_profile(days, availability='multi_pairs')).generate_timetable()
+    n_tasks = sum(len(day.tasks) for day in base)
+
+    # Both copies reference the same strings, so the difference is the
+    # per-object overhead of the classes alone.
+    _, before, _ = _measure(lambda: _to_legacy(base))
+    _, after, _ = _measure(lambda: _copy(base))
+    # Struct-of-arrays form; its pool only references the same strings
+    columnar, columnar_bytes, _ = _measure(lambda: ColumnarTimetable.from_timetable(base))
+    # End-to-end generation, strings included
+    _, generated, generated_peak = _measure(lambda: IELTSScheduler(make_profile(days, availability='multi_pairs')).generate_timetable())
+
+    return {
+        'days': len(base),
+        'tasks': n_tasks,
+        'before_bytes': before,
+        'after_bytes': after,
+        'before_bytes_per_task': before / n_tasks,
+        'after_bytes_per_task': after / n_tasks,
+        'columnar_bytes': columnar_bytes,
+        'columnar_bytes_per_task': columnar_bytes / n_tasks,
+        'columnar_id_overrides': len(columnar.id_overrides),
+        'generate_bytes': generated,
+        'generate_peak_bytes': generated_peak,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory used by timetable model objects")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--json", action="store_true", help="print a JSON object instead of a table")
+    args = parser.parse_args()
+
+    result = run(args.days)
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(f"{result['days']}-day plan, {result['tasks']} tasks")
+        print(f"  dict-backed dataclasses: {result['before_bytes']:>9} B  "
+              f"({result['before_bytes_per_task']:.0f} B/task)")
+        print(f"  slotted dataclasses:     {result['after_bytes']:>9} B  "
+              f"({result['after_bytes_per_task']:.0f} B/task)")
+        print(f"  columnar:                {result['columnar_bytes']:>9} B  "
+              f"({result['columnar_bytes_per_task']:.0f} B/task, {result['columnar_id_overrides']} stored ids)")
+        print(f"  generate_timetable():    {result['generate_bytes']:>9} B  "
+              f"(peak {result['generate_peak_bytes']} B)")
@@ -0,0 +1,133 @@
+import argparse
+import datetime
+import gc
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+# synthetic puts the repository root on sys.path
+from synthetic import AVAILABILITY, HORIZONS, SCORES, make_completed_tasks, make_profile
+from scheduler import IELTSScheduler
+
+
+def _time(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _memory(fn) -> dict:
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    result = fn()
+    retained, peak = tracemalloc.get_traced_memory()
+    # Before stop(), which frees tracemalloc's own bookkeeping
+    blocks = sys.getallocatedblocks() - blocks_before
+    tracemalloc.stop()
+    del result
+    return {'retained_bytes': retained, 'peak_bytes': peak, 'allocated_blocks': blocks}
+
+
+def cases(horizons, availabilities, scores, feedback):
+    for horizon, availability, score, with_feedback in itertools.product(horizons, availabilities, scores, feedback):
+        yield {'horizon_days': horizon, 'availability': availability, 'scores': score, 'feedback': with_feedback}
+
+
+def run_case(case: dict, repeat: int) -> dict:
+    completed = make_completed_tasks() if case['feedback'] else None
+
+    def eager():
+        return IELTSScheduler(make_profile(case['horizon_days'], case['availability'], case['scores']),
+                              seed=0).generate_timetable(completed)
+
+    def lazy_first_week():
+        timetable = IELTSScheduler(make_profile(case['horizon_days'], case['availability'], case['scores']),
+                                   seed=0).generate_lazy_timetable(completed)
+        timetable.week(0)
+        return timetable
+
+    def compressed_first_week():
+        timetable = IELTSScheduler(make_profile(case['horizon_days'], case['availability'], case['scores']),
+                                   seed=0).generate_compressed_timetable(completed)
+        timetable.week(0)
+        return timetable
+
+    timetable = eager()
+    result = dict(case)
+    result['days'] = len(timetable)
+    result['tasks'] = sum(len(day.tasks) for day in timetable)
+    result['eager_seconds'] = _time(eager, repeat)
+    result['lazy_first_week_seconds'] = _time(lazy_first_week, repeat)
+    result['compressed_first_week_seconds'] = _time(compressed_first_week, repeat)
+    result.update(_memory(eager))
+    result['compressed_retained_bytes'] = _memory(compressed_first_week)['retained_bytes']
+    return result
+
+
+# Timings and memory figures checked against the baseline
+COMPARED = ('eager_seconds', 'lazy_first_week_seconds', 'compressed_first_week_seconds',
+            'retained_bytes', 'peak_bytes', 'allocated_blocks', 'compressed_retained_bytes')
+
+
+def compare(results: list, baseline_path: str, threshold: float) -> list:
+    # Cases where any COMPARED figure grew by more than `threshold` (0.2 = 20%)
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    def key(r):
+        return r['horizon_days'], r['availability'], r['scores'], r['feedback']
+
+    before = {key(r): r for r in baseline['results']}
+    regressions = []
+    for r in results:
+        old = before.get(key(r))
+        if not old:
+            continue
+        for metric in COMPARED:
+            # Baselines from before a figure was recorded skip it
+            if metric in old and r[metric] > old[metric] * (1 + threshold):
+                regressions.append({'case': key(r), 'metric': metric, 'before': old[metric], 'after': r[metric]})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="IELTSScheduler timing and memory benchmarks (JSON output)")
+    parser.add_argument("--horizons", type=int, nargs='+', default=HORIZONS)
+    parser.add_argument("--availability", nargs='+', choices=sorted(AVAILABILITY), default=sorted(AVAILABILITY))
+    parser.add_argument("--scores", nargs='+', choices=sorted(SCORES), default=sorted(SCORES))
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs per case, best one is kept")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="baseline JSON report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = [run_case(case, args.repeat)
+               for case in cases(args.horizons, args.availability, args.scores, [False, True])]
+    report = {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.compare:
+        report['regressions'] = compare(results, args.compare, args.threshold)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    if report.get('regressions'):
+        sys.exit(1)
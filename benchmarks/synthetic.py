@@ -0,0 +1,67 @@
+import datetime
+import os
+import random
+import sys
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import UserProfile, StudyTask  # noqa: E402
+
+SKILLS = ['Listening', 'Reading', 'Writing', 'Speaking']
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+HORIZONS = [56, 90, 180, 365, 730, 1095]
+
+# Every format _get_available_hours accepts: start/end pairs (one or several
+# windows a day), a plain float as stored by the sidebar, and missing days.
+AVAILABILITY = {
+    'pairs': {d: [18, 20] for d in DAYS},
+    'multi_pairs': {d: [6, 7, 12, 13, 19, 22] for d in DAYS},
+    'float': {d: 2.5 for d in DAYS},
+    'weekends': {'Saturday': [8, 12, 14, 18], 'Sunday': [8, 12]},
+}
+
+SCORES = {
+    'typical': ({'Listening': 6.0, 'Reading': 6.5, 'Writing': 5.5, 'Speaking': 6.0},
+                {'Listening': 7.5, 'Reading': 7.5, 'Writing': 7.0, 'Speaking': 7.0}),
+    'zero_gap': ({s: 7.0 for s in SKILLS}, {s: 7.0 for s in SKILLS}),
+    'skewed': ({'Listening': 7.5, 'Reading': 7.5, 'Writing': 4.5, 'Speaking': 7.0},
+               {'Listening': 7.5, 'Reading': 7.5, 'Writing': 7.0, 'Speaking': 7.0}),
+}
+
+
+def make_profile(horizon_days: int = 90, availability: str = 'pairs', scores: str = 'typical',
+                 focus_level: int = 3, learning_style: str = 'Visual') -> UserProfile:
+    current, target = SCORES[scores]
+    return UserProfile(
+        current_scores=dict(current),
+        target_scores=dict(target),
+        exam_date=datetime.date.today() + datetime.timedelta(days=horizon_days),
+        availability={day: (list(v) if isinstance(v, list) else v) for day, v in AVAILABILITY[availability].items()},
+        focus_level=focus_level,
+        learning_style=learning_style
+    )
+
+
+def make_completed_tasks(days: int = 28, completion_rates: Dict[str, float] = None,
+                         seed: int = 0) -> List[StudyTask]:
+    # Past tasks as the feedback loop sees them: some completed, some not
+    rng = random.Random(seed)
+    rates = completion_rates or {'Listening': 0.9, 'Reading': 0.8, 'Writing': 0.4, 'Speaking': 0.6}
+    start = datetime.date.today() - datetime.timedelta(days=days)
+    tasks = []
+    for offset in range(days):
+        day = start + datetime.timedelta(days=offset)
+        for skill in SKILLS:
+            done = rng.random() < rates[skill]
+            tasks.append(StudyTask(
+                id=f"{skill}-{day.isoformat()}",
+                skill=skill,
+                description="",
+                duration_hours=1.0,
+                is_completed=done,
+                completed_at=datetime.datetime.combine(day, datetime.time(20)) if done else None,
+                predicted_impact=0.011
+            ))
+    return tasks
@@ -0,0 +1,119 @@
+import copy
+import datetime
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from models import UserProfile
+from scheduler import IELTSScheduler
+from serialization import profile_key  # re-exported for the app
+from timetable import CompressedTimetable
+
+
+class LRUCache:
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: 'OrderedDict[Hashable, Any]' = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def invalidate(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        total = self.hits + self.misses
+        return self.hits / total if total else None
+
+
+class SharedPlanCache:
+    # Generated plans shared by every session in the process. Learners with
+    # the same profile on the same day get the same plan, so it is built
+    # once; each session receives a fork() and its toggles stay its own.
+    # A compressed plan retains ~20 KB, so `maxsize` bounds memory.
+    def __init__(self, maxsize: int = 256):
+        self._plans = LRUCache(maxsize)
+        self._lock = threading.Lock()
+        # Plans being generated, by key
+        self._building: Dict[tuple, 'Future[CompressedTimetable]'] = {}
+
+    @staticmethod
+    def key(profile: UserProfile, today: Optional[datetime.date] = None) -> tuple:
+        return (profile_key(profile), profile.exam_date.isoformat(), (today or datetime.date.today()).isoformat())
+
+    def timetable(self, profile: UserProfile,
+                  completed_at: Optional[Dict[str, datetime.datetime]] = None) -> CompressedTimetable:
+        key = self.key(profile)
+        missing = object()
+        with self._lock:
+            base = self._plans.get(key, missing)
+            building = owner = None
+            if base is missing:
+                # A class submitting the same profile at once generates it a
+                # single time: later callers wait on the first one's build,
+                # callers with other profiles do not wait at all
+                building = self._building.get(key)
+                if building is None:
+                    building = owner = self._building[key] = Future()
+        if owner is not None:
+            try:
+                # The scheduler keeps its own copy: sessions edit their profile in place
+                base = IELTSScheduler(copy.deepcopy(profile)).generate_compressed_timetable()
+            except BaseException as e:
+                owner.set_exception(e)
+                raise
+            finally:
+                with self._lock:
+                    if base is not missing:
+                        self._plans.put(key, base)
+                    del self._building[key]
+            owner.set_result(base)
+        elif building is not None:
+            base = building.result()
+        return base.fork(completed_at)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'size': len(self._plans), 'maxsize': self._plans.maxsize, 'hits': self._plans.hits,
+                'misses': self._plans.misses, 'hit_rate': self._plans.hit_rate}
+
+    def clear(self):
+        with self._lock:
+            self._plans.clear()
+
+
+shared_plans = SharedPlanCache(int(os.environ.get('ILMS_PLAN_CACHE_SIZE', 256)))
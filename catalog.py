@@ -0,0 +1,271 @@
+import hashlib
+import json
+import os
+import random
+from typing import Dict, Iterable, List, Optional, Tuple
+
+LEVELS = ('Beginner', 'Intermediate', 'Advanced')
+LEARNING_STYLES = ('Visual', 'Auditory', 'Kinesthetic', 'Read/Write')
+
+DEFAULT_GUIDE = "Hãy tập trung học tập thật tốt!"
+DEFAULT_RESOURCE = ("Luyện tập tổng hợp", "https://www.ielts.org/")
+
+# Built-in catalog. Guides are keyed by level, then skill; Review/Mock Test
+# guides and all resources apply to every level and learning style.
+_LEVEL_GUIDES = {
+    'Beginner': {
+        'Listening': [
+            "Tập trung nghe các đoạn hội thoại ngắn và chép lại những từ khóa chính (danh từ, con số).",
+            "Hãy làm quen với các âm cơ bản và bảng chữ cái tiếng Anh để tránh sai sót ở Section 1.",
+            "Đừng quá lo lắng nếu không hiểu hết, hãy cố gắng nắm bắt ý chính của cuộc hội thoại.",
+        ],
+        'Reading': [
+            "Tập trung vào việc xây dựng vốn từ vựng cơ bản. Đọc các đoạn văn ngắn và gạch chân từ mới.",
+            "Học cách tìm các thông tin rõ ràng như tên riêng, ngày tháng trong bài đọc.",
+            "Hãy đọc kỹ câu hỏi trước khi tìm câu trả lời trong bài để tiết kiệm thời gian.",
+        ],
+        'Writing': [
+            "Tập viết các câu đơn đúng ngữ pháp trước khi học các cấu trúc phức tạp.",
+            "Học cách sử dụng các từ nối cơ bản như: and, but, because, so.",
+            "Hãy đảm bảo bạn hiểu rõ yêu cầu của đề bài và trả lời đúng trọng tâm.",
+        ],
+        'Speaking': [
+            "Hãy tự tin nói ra những gì bạn nghĩ, đừng quá chú trọng vào ngữ pháp ở giai đoạn này.",
+            "Luyện tập giới thiệu bản thân và các chủ đề quen thuộc như gia đình, sở thích.",
+            "Hãy cố gắng nói to, rõ ràng để cải thiện sự tự tin khi giao tiếp.",
+        ],
+    },
+    'Intermediate': {
+        'Listening': [
+            "Luyện tập nghe và nhận diện các từ đồng nghĩa (Synonyms) trong câu hỏi.",
+            "Tập trung vào Section 3 với các cuộc thảo luận học thuật có nhiều ý kiến trái chiều.",
+            "Hãy chú ý đến các 'bẫy' (Distractors) mà người nói thường dùng để làm nhiễu thông tin.",
+        ],
+        'Reading': [
+            "Rèn luyện kỹ thuật Skimming và Scanning để xử lý bài đọc dài trong thời gian ngắn.",
+            "Tập trung vào dạng bài Matching Headings và True/False/Not Given.",
+            "Học cách suy luận nghĩa của từ mới dựa vào ngữ cảnh xung quanh đoạn văn.",
+        ],
+        'Writing': [
+            "Sử dụng đa dạng các cấu trúc câu phức và câu ghép để nâng điểm ngữ pháp.",
+            "Tập trung vào tính mạch lạc (Coherence) bằng cách sử dụng các từ nối nâng cao.",
+            "Hãy dành ít nhất 5 phút để lập dàn ý chi tiết trước khi bắt đầu viết bài.",
+        ],
+        'Speaking': [
+            "Mở rộng câu trả lời bằng cách đưa ra lý do và ví dụ cụ thể cho mỗi ý điểm.",
+            "Luyện tập sử dụng các cụm từ (Collocations) để cách nói tự nhiên hơn.",
+            "Hãy chú ý đến ngữ điệu và trọng âm để bài nói có sức thuyết phục hơn.",
+        ],
+    },
+    'Advanced': {
+        'Listening': [
+            "Thử thách bản thân với Section 4 - bài giảng học thuật không có thời gian nghỉ.",
+            "Luyện nghe các accent khó (Anh-Úc, Ấn Độ) để tăng khả năng thích nghi.",
+            "Tập trung vào việc ghi chú (Note-taking) nhanh và chính xác các ý chính.",
+        ],
+        'Reading': [
+            "Đọc các bài báo khoa học hoặc kinh tế khó để tăng tốc độ xử lý thông tin phức tạp.",
+            "Tập trung vào việc hiểu thái độ và mục đích của tác giả trong các bài đọc khó.",
+            "Hãy rèn luyện khả năng quản lý thời gian cực tốt để hoàn thành bài trước 5-10 phút.",
+        ],
+        'Writing': [
+            "Sử dụng từ vựng chuyên sâu (Less common vocabulary) một cách chính xác và tự nhiên.",
+            "Phân tích kỹ các đề bài khó và đưa ra lập luận đa chiều, sắc bén.",
+            "Kiểm soát chặt chẽ các lỗi nhỏ về dấu câu và mạo từ để đạt điểm tuyệt đối.",
+        ],
+        'Speaking': [
+            "Sử dụng các cấu trúc ngữ pháp bậc cao (Câu điều kiện loại 3, đảo ngữ) một cách nhuần nhuyễn.",
+            "Luyện tập thảo luận các vấn đề trừu tượng ở Part 3 với tư duy phản biện.",
+            "Hãy tập trung vào sự trôi chảy và mạch lạc tuyệt đối trong suốt buổi thi.",
+        ],
+    },
+}
+
+_COMMON_GUIDES = {
+    'Review': [
+        "Ôn tập lại các lỗi sai phổ biến bạn đã mắc phải trong tuần qua.",
+        "Sử dụng Flashcards để củng cố các từ vựng mới học được.",
+        "Hãy tự kiểm tra lại các cấu trúc ngữ pháp mà bạn cảm thấy chưa tự tin.",
+    ],
+    'Mock Test': [
+        "Làm bài trong không gian yên tĩnh và tuân thủ nghiêm ngặt thời gian thi thật.",
+        "Đừng bỏ trống bất kỳ câu hỏi nào, hãy dự đoán nếu bạn không chắc chắn.",
+        "Sau khi thi xong, hãy dành thời gian phân tích kỹ lý do tại sao bạn làm sai.",
+    ],
+}
+
+_RESOURCES = {
+    'Listening': [
+        ("Luyện Listening Section 1 & 2 (Cambridge 18)", "https://ieltsonlinetests.com/ielts-exam-library"),
+        ("Nghe chép chính tả (Dictation) bài nói TED-Ed", "https://www.ted.com/watch/ted-ed"),
+        ("Luyện kỹ năng Note-taking cho Section 3", "https://www.ieltsbuddy.com/ielts-listening-test.html"),
+        ("Làm Full Test Listening & phân tích lỗi sai", "https://mini-ielts.com/listening"),
+    ],
+    'Reading': [
+        ("Đọc Academic Passage 1 & Skimming kỹ thuật", "https://www.ielts-exam.net/ielts_reading/"),
+        ("Luyện dạng bài Matching Headings (Cambridge 17)", "https://ieltsmaterial.com/reading/"),
+        ("Học từ vựng theo chủ đề Education/Environment", "https://www.vocabulary.com/lists/ielts"),
+        ("Làm Full Test Reading trong 60 phút", "https://mini-ielts.com/reading"),
+    ],
+    'Writing': [
+        ("Phân tích biểu đồ Task 1 (Line Graph/Bar Chart)", "https://ielts-simon.com/ielts-help-term-course/ielts-writing-task-1/"),
+        ("Viết Body Paragraph cho Task 2 chủ đề Technology", "https://ieltsadvantage.com/writing-task-2/"),
+        ("Học cấu trúc câu phức & từ nối (Cohesion)", "https://www.ieltsbuddy.com/ielts-writing-connectors.html"),
+        ("Luyện viết Full Task 2 & tự chấm theo tiêu chí", "https://writeandimprove.com/"),
+    ],
+    'Speaking': [
+        ("Luyện Part 1 các chủ đề quen thuộc (Work/Study)", "https://ieltsliz.com/ielts-speaking-part-1-topics-questions/"),
+        ("Nói Part 2 sử dụng kỹ thuật Mind-map", "https://www.ieltsbuddy.com/ielts-speaking-part-2.html"),
+        ("Luyện Part 3: Giải thích & đưa ra ví dụ", "https://ieltsadvantage.com/ielts-speaking-part-3-guide/"),
+        ("Record & nghe lại để sửa phát âm/ngữ điệu", "https://otter.ai/"),
+    ],
+    'Spaced Repetition': [
+        ("Ôn tập lại kiến thức đã học trong tuần qua", "https://ankiweb.net/about"),
+    ],
+    'Mock Test': [
+        ("Làm bài Full Mock Test để đánh giá lại năng lực", "https://ielts.idp.com/vietnam/prepare/free-practice-tests"),
+    ],
+}
+
+
+def level_for_score(score: float) -> str:
+    if score < 5.5:
+        return "Beginner"
+    elif score < 7.0:
+        return "Intermediate"
+    return "Advanced"
+
+
+def normalize_style(style: Optional[str]) -> Optional[str]:
+    # The sidebar stores labels like "Visual (Hình ảnh)"
+    if not style:
+        return None
+    style = style.split(' (')[0].strip()
+    return style if style in LEARNING_STYLES else None
+
+
+class Catalog:
+    def __init__(self, guides: Iterable[Dict], resources: Iterable[Dict]):
+        # Every string is stored once; the indexes map a lookup key to a
+        # tuple of positions in these tables.
+        self.guides: List[str] = []
+        self.resources: List[Tuple[str, str]] = []
+        self._guide_index: Dict[Tuple[str, str, Optional[str]], Tuple[int, ...]] = {}
+        self._resource_index: Dict[Tuple[str, str, Optional[str]], Tuple[int, ...]] = {}
+        # "[Level] guide" strings, built once so every task shares the same object
+        self._labelled_guides: Dict[Tuple[str, int], str] = {}
+
+        # Content hash of the entries; plans cached on disk depend on it
+        digest = hashlib.sha1()
+
+        raw_guides: Dict[Tuple[str, Optional[str], Optional[str]], List[int]] = {}
+        for entry in guides:
+            digest.update(json.dumps(entry, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+            self.guides.append(entry['text'])
+            key = (entry['skill'], entry.get('level'), normalize_style(entry.get('style')))
+            raw_guides.setdefault(key, []).append(len(self.guides) - 1)
+
+        raw_resources: Dict[Tuple[str, Optional[str], Optional[str]], List[int]] = {}
+        digest.update(b'\0')
+        for entry in resources:
+            digest.update(json.dumps(entry, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+            self.resources.append((entry['description'], entry['link']))
+            key = (entry['skill'], entry.get('level'), normalize_style(entry.get('style')))
+            raw_resources.setdefault(key, []).append(len(self.resources) - 1)
+
+        self._guide_index = self._expand(raw_guides)
+        self._resource_index = self._expand(raw_resources)
+        self.fingerprint = digest.hexdigest()
+
+    @staticmethod
+    def _expand(raw: Dict[Tuple[str, Optional[str], Optional[str]], List[int]]
+                ) -> Dict[Tuple[str, str, Optional[str]], Tuple[int, ...]]:
+        # Resolve wildcards (level/style of None) up front so a lookup is a
+        # single dict access. Style-specific entries are added to the generic
+        # pool for that skill and level rather than replacing it.
+        skills = {skill for skill, _, _ in raw}
+        index = {}
+        for skill in skills:
+            for level in LEVELS:
+                generic = raw.get((skill, level, None), []) + raw.get((skill, None, None), [])
+                if generic:
+                    index[(skill, level, None)] = tuple(generic)
+                for style in LEARNING_STYLES:
+                    specific = raw.get((skill, level, style), []) + raw.get((skill, None, style), [])
+                    if specific or generic:
+                        index[(skill, level, style)] = tuple(generic + specific)
+        return index
+
+    def guide_ids(self, skill: str, level: str, style: Optional[str] = None) -> Tuple[int, ...]:
+        return self._guide_index.get((skill, level, style)) or self._guide_index.get((skill, level, None), ())
+
+    def resource_ids(self, skill: str, level: str, style: Optional[str] = None) -> Tuple[int, ...]:
+        return self._resource_index.get((skill, level, style)) or self._resource_index.get((skill, level, None), ())
+
+    def pick_guide(self, skill: str, current_score: float, style: Optional[str] = None,
+                   rng: Optional[random.Random] = None) -> str:
+        level = level_for_score(current_score)
+        options = self.guide_ids(skill, level, style)
+        idx = (rng or random).choice(options) if options else -1
+        labelled = self._labelled_guides.get((level, idx))
+        if labelled is None:
+            text = self.guides[idx] if idx >= 0 else DEFAULT_GUIDE
+            labelled = self._labelled_guides[(level, idx)] = f"[{level}] {text}"
+        return labelled
+
+    def pick_resource(self, skill: str, current_score: float, style: Optional[str] = None,
+                      rng: Optional[random.Random] = None) -> Tuple[str, str]:
+        options = self.resource_ids(skill, level_for_score(current_score), style)
+        if not options:
+            return DEFAULT_RESOURCE
+        return self.resources[(rng or random).choice(options)]
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Catalog':
+        return cls(data.get('guides', []), data.get('resources', []))
+
+    @classmethod
+    def from_file(cls, path: str) -> 'Catalog':
+        # Format: {"guides": [{"skill", "level"?, "style"?, "text"}],
+        #          "resources": [{"skill", "level"?, "style"?, "description", "link"}]}
+        with open(path, encoding='utf-8') as f:
+            if path.endswith(('.yaml', '.yml')):
+                try:
+                    import yaml
+                except ImportError:
+                    raise ImportError("PyYAML is required to load YAML catalogs")
+                data = yaml.safe_load(f)
+            else:
+                data = json.load(f)
+        return cls.from_dict(data or {})
+
+
+def _builtin_entries() -> Tuple[List[Dict], List[Dict]]:
+    guides = []
+    for level, by_skill in _LEVEL_GUIDES.items():
+        for skill, texts in by_skill.items():
+            guides.extend({'skill': skill, 'level': level, 'text': text} for text in texts)
+    for skill, texts in _COMMON_GUIDES.items():
+        guides.extend({'skill': skill, 'text': text} for text in texts)
+    resources = [
+        {'skill': skill, 'description': desc, 'link': link}
+        for skill, items in _RESOURCES.items()
+        for desc, link in items
+    ]
+    return guides, resources
+
+
+_default_catalog: Optional[Catalog] = None
+
+
+def default_catalog() -> Catalog:
+    # Loaded once per process. ILMS_CATALOG_PATH points at an external
+    # JSON/YAML catalog that replaces the built-in one.
+    global _default_catalog
+    if _default_catalog is None:
+        path = os.environ.get('ILMS_CATALOG_PATH')
+        if path:
+            _default_catalog = Catalog.from_file(path)
+        else:
+            _default_catalog = Catalog(*_builtin_entries())
+    return _default_catalog
@@ -0,0 +1,312 @@
+import datetime
+import json
+import os
+import sqlite3
+import uuid
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from events import COMPLETED, CompletionEvent
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, only needed for cohort analytics
+    pa = None
+
+# Class-level analytics for instructors. Completion events of many learners,
+# and the tasks their plans had due, are appended to two Parquet datasets
+# partitioned by day:
+#
+#   <root>/events/day=YYYY-MM-DD/part-*.parquet    one row per completion event
+#   <root>/planned/day=YYYY-MM-DD/part-*.parquet   one row per task that was due
+#
+# Events carry a sign (+1 completed, -1 un-completed), so the store stays
+# append-only and sums of sign * value give the current totals. A planned day
+# is only written once it is in the past, when rebases can no longer change
+# it. Queries filter on day (partition pruning) and learner/skill (row-group
+# statistics) before anything is read, then group in Arrow.
+
+EVENT_SCHEMA = None if pa is None else pa.schema([
+    ('learner_id', pa.string()),
+    ('seq', pa.int64()),
+    ('task_id', pa.string()),
+    ('skill', pa.string()),
+    ('sign', pa.int8()),
+    ('duration_hours', pa.float64()),
+    ('predicted_impact', pa.float64()),
+])
+PLANNED_SCHEMA = None if pa is None else pa.schema([
+    ('learner_id', pa.string()),
+    ('task_id', pa.string()),
+    ('skill', pa.string()),
+    ('duration_hours', pa.float64()),
+])
+_PARTITIONING = None if pa is None else ds.partitioning(pa.schema([('day', pa.date32())]), flavor='hive')
+# Partitions with more files than this are merged by compact()
+COMPACT_FILES = 8
+# Buffered rows are written out once there are this many
+FLUSH_ROWS = 1_000_000
+
+
+class CohortStore:
+    def __init__(self, root: str):
+        if pa is None:
+            raise ImportError("pyarrow is required for the cohort store")
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        # Last event seq and last planned day ingested per learner
+        self._marks_path = os.path.join(root, 'watermarks.json')
+        self._marks: Dict[str, Dict] = {}
+        if os.path.exists(self._marks_path):
+            with open(self._marks_path, encoding='utf-8') as f:
+                self._marks = json.load(f)
+        # Rows waiting for flush(), per dataset and day, from any number of learners
+        self._pending: Dict[str, Dict[datetime.date, List[tuple]]] = {'events': {}, 'planned': {}}
+        self._pending_rows = 0
+
+    # Writing
+
+    def last_seq(self, learner_id: str) -> int:
+        return self._marks.get(learner_id, {}).get('seq', 0)
+
+    def _save_marks(self):
+        tmp = self._marks_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._marks, f)
+        os.replace(tmp, self._marks_path)
+
+    def flush(self):
+        # Writes one new file per day touched, whatever the number of
+        # learners, then the watermarks. Rows are sorted by learner so
+        # row-group statistics can skip other learners.
+        for name, schema in (('events', EVENT_SCHEMA), ('planned', PLANNED_SCHEMA)):
+            for day, rows in self._pending[name].items():
+                rows.sort(key=lambda row: row[0])
+                table = pa.Table.from_arrays([pa.array(column, type=field.type)
+                                              for column, field in zip(zip(*rows), schema)], schema=schema)
+                directory = os.path.join(self.root, name, f'day={day.isoformat()}')
+                os.makedirs(directory, exist_ok=True)
+                pq.write_table(table, os.path.join(directory, f'part-{uuid.uuid4().hex}.parquet'),
+                               compression='zstd', use_dictionary=['learner_id', 'skill'])
+            self._pending[name] = {}
+        self._pending_rows = 0
+        self._save_marks()
+
+    def _add(self, name: str, day: datetime.date, rows: List[tuple]):
+        if not rows:
+            return  # a rest day: no file to write
+        self._pending[name].setdefault(day, []).extend(rows)
+        self._pending_rows += len(rows)
+
+    def _added(self):
+        if self._pending_rows >= FLUSH_ROWS:
+            self.flush()
+
+    def add_events(self, learner_id: str, events: Iterable[CompletionEvent]) -> int:
+        # Buffers events newer than the learner's watermark; returns how many
+        mark = self._marks.setdefault(learner_id, {})
+        last = mark.get('seq', 0)
+        added = 0
+        for event in events:
+            if event.seq <= last:
+                continue
+            self._add('events', event.day, [(
+                learner_id, event.seq, event.task_id, event.skill, 1 if event.kind == COMPLETED else -1,
+                event.hours, event.impact)])
+            mark['seq'] = max(mark.get('seq', 0), event.seq)
+            added += 1
+        self._added()
+        return added
+
+    def add_plan(self, learner_id: str, timetable, until: Optional[datetime.date] = None) -> int:
+        # Buffers the tasks of plan days before `until` (default today) that
+        # were not ingested yet; returns how many
+        until = until or datetime.date.today()
+        mark = self._marks.setdefault(learner_id, {})
+        start = timetable.start if hasattr(timetable, 'start') else timetable[0].date
+        first = max(start, datetime.date.fromisoformat(mark['planned_until'])) if 'planned_until' in mark else start
+        added = 0
+        for day_idx in range((first - start).days, min((until - start).days, len(timetable))):
+            day = timetable[day_idx]
+            self._add('planned', day.date, [(learner_id, t.id, t.skill, t.duration_hours) for t in day.tasks])
+            added += len(day.tasks)
+        if until > first:
+            mark['planned_until'] = until.isoformat()
+        self._added()
+        return added
+
+    def compact(self) -> int:
+        # Merges partitions that have collected many small files; returns the
+        # number of partitions rewritten
+        rewritten = 0
+        for name in ('events', 'planned'):
+            base = os.path.join(self.root, name)
+            if not os.path.isdir(base):
+                continue
+            for part in sorted(os.listdir(base)):
+                directory = os.path.join(base, part)
+                files = [f for f in os.listdir(directory) if f.endswith('.parquet')]
+                if len(files) <= COMPACT_FILES:
+                    continue
+                table = pq.read_table([os.path.join(directory, f) for f in files])
+                table = table.sort_by('learner_id')
+                # Written under a dot name, which dataset discovery skips, then renamed
+                part_name = f'part-{uuid.uuid4().hex}.parquet'
+                pq.write_table(table, os.path.join(directory, '.' + part_name), compression='zstd',
+                               use_dictionary=['learner_id', 'skill'])
+                os.replace(os.path.join(directory, '.' + part_name), os.path.join(directory, part_name))
+                for f in files:
+                    os.unlink(os.path.join(directory, f))
+                rewritten += 1
+        return rewritten
+
+    # Queries
+
+    def _dataset(self, name: str) -> Optional['ds.Dataset']:
+        path = os.path.join(self.root, name)
+        if not os.path.isdir(path):
+            return None
+        schema = EVENT_SCHEMA if name == 'events' else PLANNED_SCHEMA
+        return ds.dataset(path, format='parquet', partitioning=_PARTITIONING,
+                          schema=schema.append(pa.field('day', pa.date32())))
+
+    @staticmethod
+    def _filter(since: Optional[datetime.date], until: Optional[datetime.date],
+                learners: Optional[Sequence[str]], skills: Optional[Sequence[str]]):
+        # since/until are inclusive days
+        expr = None
+        for part in (
+            ds.field('day') >= since if since else None,
+            ds.field('day') <= until if until else None,
+            ds.field('learner_id').isin(list(learners)) if learners is not None else None,
+            ds.field('skill').isin(list(skills)) if skills is not None else None,
+        ):
+            if part is not None:
+                expr = part if expr is None else expr & part
+        return expr
+
+    def _read(self, name: str, columns: List[str], since, until, learners, skills) -> 'pa.Table':
+        dataset = self._dataset(name)
+        schema = EVENT_SCHEMA if name == 'events' else PLANNED_SCHEMA
+        if dataset is None:
+            return schema.append(pa.field('day', pa.date32())).empty_table().select(columns)
+        return dataset.to_table(columns=columns, filter=self._filter(since, until, learners, skills))
+
+    def _completed(self, by: Sequence[str], since, until, learners, skills) -> 'pa.Table':
+        # Current totals per group: signed task count, hours and impact
+        table = self._read('events', list({*by, 'sign', 'duration_hours', 'predicted_impact'}),
+                           since, until, learners, skills)
+        sign = pc.cast(table['sign'], pa.float64())
+        table = pa.table({
+            **{col: table[col] for col in by},
+            'tasks': pc.cast(table['sign'], pa.int64()),
+            'hours': pc.multiply(sign, table['duration_hours']),
+            'impact': pc.multiply(sign, table['predicted_impact']),
+        })
+        return _strip_sum(table.group_by(list(by)).aggregate([('tasks', 'sum'), ('hours', 'sum'), ('impact', 'sum')]))
+
+    def hours_per_skill(self, since: Optional[datetime.date] = None, until: Optional[datetime.date] = None,
+                        learners: Optional[Sequence[str]] = None) -> 'pa.Table':
+        # skill, tasks, hours
+        table = self._completed(['skill'], since, until, learners, None)
+        return table.select(['skill', 'tasks', 'hours']).sort_by('skill')
+
+    def efficiency(self, by: Sequence[str] = ('skill',), since: Optional[datetime.date] = None,
+                   until: Optional[datetime.date] = None, learners: Optional[Sequence[str]] = None,
+                   skills: Optional[Sequence[str]] = None) -> 'pa.Table':
+        # by..., hours, impact, band_per_hour (predicted band gain per hour studied)
+        table = self._completed(list(by), since, until, learners, skills)
+        hours = table['hours']
+        per_hour = pc.if_else(pc.greater(hours, 0), pc.divide(table['impact'], hours), 0.0)
+        return table.select([*by, 'hours', 'impact']).append_column('band_per_hour', per_hour).sort_by(
+            [(col, 'ascending') for col in by])
+
+    def adherence(self, by: Sequence[str] = ('learner_id',), since: Optional[datetime.date] = None,
+                  until: Optional[datetime.date] = None, learners: Optional[Sequence[str]] = None,
+                  skills: Optional[Sequence[str]] = None) -> 'pa.Table':
+        # by..., planned, completed, adherence: tasks completed over tasks
+        # that were due, per group. Completions are counted by the day they
+        # were done, so a window can exceed 100% when work is caught up.
+        planned = self._read('planned', list({*by, 'task_id'}), since, until, learners, skills)
+        planned = _strip_sum(planned.group_by(list(by)).aggregate([('task_id', 'count')])) \
+            .rename_columns([*by, 'planned'])
+        completed = self._completed(list(by), since, until, learners, skills).select([*by, 'tasks']) \
+            .rename_columns([*by, 'completed'])
+        table = planned.join(completed, list(by), join_type='full outer')
+        planned_col = pc.fill_null(table['planned'], 0)
+        completed_col = pc.fill_null(table['completed'], 0)
+        ratio = pc.if_else(pc.greater(planned_col, 0),
+                           pc.divide(pc.cast(completed_col, pa.float64()), pc.cast(planned_col, pa.float64())),
+                           None)
+        return pa.table({**{col: table[col] for col in by}, 'planned': planned_col, 'completed': completed_col,
+                         'adherence': ratio}).sort_by([(col, 'ascending') for col in by])
+
+
+def _strip_sum(table: 'pa.Table') -> 'pa.Table':
+    # group_by().aggregate() names columns "<col>_<agg>"
+    return table.rename_columns([name.rsplit('_', 1)[0] if name.endswith(('_sum', '_count')) else name
+                                 for name in table.column_names])
+
+
+def ingest(store: CohortStore, db_path: str, journal_dir: Optional[str] = None,
+           until: Optional[datetime.date] = None) -> Tuple[int, int, int]:
+    # Pulls every learner in a learning-log database into the store, with
+    # their plans when a journal directory is given; returns
+    # (learners, events, planned tasks) appended
+    from journal import Journal, journal_exists, journal_learners  # the journal pulls in the scheduler
+
+    conn = sqlite3.connect(db_path)
+    try:
+        learners = [row[0] for row in conn.execute("SELECT DISTINCT learner_id FROM completion_events")]
+        if journal_dir:
+            # Learners with a plan but nothing completed yet still count
+            # towards adherence
+            logged = set(learners)
+            learners += [learner_id for learner_id in journal_learners(journal_dir, learners)
+                         if learner_id not in logged]
+        n_events = n_planned = 0
+        for learner_id in learners:
+            after = store.last_seq(learner_id)
+            rows = conn.execute(
+                "SELECT seq, kind, task_id, skill, duration_hours, predicted_impact, recorded_at, completed_day "
+                "FROM completion_events WHERE learner_id = ? AND seq > ? ORDER BY seq", (learner_id, after))
+            n_events += store.add_events(learner_id, (
+                CompletionEvent(seq, kind, task_id, skill, hours, impact, datetime.datetime.fromisoformat(at),
+                                datetime.date.fromisoformat(day))
+                for seq, kind, task_id, skill, hours, impact, at, day in rows))
+            if journal_dir and journal_exists(journal_dir, learner_id):
+                _, timetable = Journal.read(journal_dir, learner_id)
+                if timetable is not None:
+                    n_planned += store.add_plan(learner_id, timetable, until)
+        store.flush()
+    finally:
+        conn.close()
+    return len(learners), n_events, n_planned
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cohort analytics store for instructors")
+    parser.add_argument("command", choices=["ingest", "compact", "report"])
+    parser.add_argument("--store", default=os.environ.get('ILMS_COHORT_STORE', 'ilms_cohort'))
+    parser.add_argument("--db", default=os.environ.get('ILMS_DB_PATH', 'ilms_learning_log.sqlite3'))
+    parser.add_argument("--journal", default=os.environ.get('ILMS_JOURNAL_DIR', 'ilms_journal'))
+    parser.add_argument("--since", type=datetime.date.fromisoformat)
+    parser.add_argument("--until", type=datetime.date.fromisoformat)
+    args = parser.parse_args()
+
+    cohort = CohortStore(args.store)
+    if args.command == "ingest":
+        n_learners, n_events, n_planned = ingest(cohort, args.db, args.journal)
+        print(f"{n_learners} learners: +{n_events} events, +{n_planned} planned tasks")
+    elif args.command == "compact":
+        print(f"{cohort.compact()} partitions compacted")
+    else:
+        print(cohort.hours_per_skill(args.since, args.until).to_pandas().to_string(index=False))
+        print()
+        print(cohort.efficiency(since=args.since, until=args.until).to_pandas().to_string(index=False))
+        print()
+        print(cohort.adherence(since=args.since, until=args.until).to_pandas().to_string(index=False))
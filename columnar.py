@@ -0,0 +1,217 @@
+import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from models import DailySchedule, StudyTask
+from timetable import task_id
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow is optional, only needed for to_arrow()
+    pa = None
+
+SKILLS = ('Listening', 'Reading', 'Writing', 'Speaking', 'Review', 'Mock Test')
+
+
+class StringPool:
+    # Interns descriptions, links and guides so each distinct string is kept
+    # once no matter how many tasks or plans refer to it. -1 stands for None.
+    def __init__(self):
+        self.strings: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def intern(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        idx = self._index.get(value)
+        if idx is None:
+            idx = len(self.strings)
+            self.strings.append(value)
+            self._index[value] = idx
+        return idx
+
+    def get(self, idx: int) -> Optional[str]:
+        return None if idx < 0 else self.strings[idx]
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+
+class ColumnarTimetable:
+    def __init__(self, day_dates: np.ndarray, day_buffer: np.ndarray, day_offsets: np.ndarray,
+                 date: np.ndarray, skill: np.ndarray, hours: np.ndarray, impact: np.ndarray,
+                 completed: np.ndarray, completed_at: np.ndarray, description: np.ndarray,
+                 resource: np.ndarray, guide: np.ndarray, skills: List[str],
+                 pool: StringPool, id_overrides: Optional[Dict[int, str]] = None,
+                 slot: Optional[np.ndarray] = None, part: Optional[np.ndarray] = None):
+        # Day table: one row per day, tasks of day i are rows
+        # day_offsets[i]:day_offsets[i + 1] of the task table.
+        self.day_dates = day_dates
+        self.day_buffer = day_buffer
+        self.day_offsets = day_offsets
+        # Task table
+        self.date = date
+        self.skill = skill
+        self.hours = hours
+        self.impact = impact
+        self.completed = completed
+        self.completed_at = completed_at
+        self.description = description
+        self.resource = resource
+        self.guide = guide
+        # (start, end) clock hours per task, NaN when the task has none
+        self.slot = slot if slot is not None else np.full((len(skill), 2), np.nan, dtype=np.float32)
+        # Which part of its skill's time on that day a task is (0 = first),
+        # as in the "-2", "-3" id suffixes
+        self.part = part if part is not None else np.zeros(len(skill), dtype=np.int8)
+        self.skills = skills
+        self.pool = pool
+        # Only ids that do not follow the scheduler's naming scheme are stored
+        self.id_overrides = id_overrides or {}
+
+    @classmethod
+    def from_timetable(cls, timetable: Iterable[DailySchedule],
+                       pool: Optional[StringPool] = None) -> 'ColumnarTimetable':
+        pool = pool if pool is not None else StringPool()
+        timetable = list(timetable)
+        skills = list(SKILLS)
+        skill_codes = {s: i for i, s in enumerate(skills)}
+        n_tasks = sum(len(day.tasks) for day in timetable)
+        anchor = timetable[0].date if timetable else None
+
+        day_dates = np.empty(len(timetable), dtype='datetime64[D]')
+        day_buffer = np.zeros(len(timetable), dtype=bool)
+        day_offsets = np.zeros(len(timetable) + 1, dtype=np.int32)
+        date = np.empty(n_tasks, dtype='datetime64[D]')
+        skill = np.empty(n_tasks, dtype=np.int8)
+        hours = np.empty(n_tasks, dtype=np.float64)
+        impact = np.empty(n_tasks, dtype=np.float64)
+        completed = np.zeros(n_tasks, dtype=bool)
+        completed_at = np.full(n_tasks, np.datetime64('NaT'), dtype='datetime64[us]')
+        description = np.empty(n_tasks, dtype=np.int32)
+        resource = np.empty(n_tasks, dtype=np.int32)
+        guide = np.empty(n_tasks, dtype=np.int32)
+        slot = np.full((n_tasks, 2), np.nan, dtype=np.float32)
+        part = np.zeros(n_tasks, dtype=np.int8)
+        id_overrides = {}
+
+        row = 0
+        for i, day in enumerate(timetable):
+            day_dates[i] = day.date
+            day_buffer[i] = day.is_buffer_day
+            day_idx = (day.date - anchor).days
+            seen: Dict[str, int] = {}
+            for task in day.tasks:
+                code = skill_codes.get(task.skill)
+                if code is None:
+                    code = skill_codes[task.skill] = len(skills)
+                    skills.append(task.skill)
+                date[row] = day.date
+                skill[row] = code
+                hours[row] = task.duration_hours
+                impact[row] = task.predicted_impact
+                completed[row] = task.is_completed
+                if task.completed_at is not None:
+                    completed_at[row] = np.datetime64(task.completed_at, 'us')
+                description[row] = pool.intern(task.description)
+                resource[row] = pool.intern(task.resource_link)
+                guide[row] = pool.intern(task.study_guide)
+                if task.start_hour is not None:
+                    slot[row] = (task.start_hour, task.end_hour)
+                part[row] = seen.get(task.skill, 0)
+                seen[task.skill] = int(part[row]) + 1
+                if task.id != task_id(task.skill, day.date, day_idx, int(part[row])):
+                    id_overrides[row] = task.id
+                row += 1
+            day_offsets[i + 1] = row
+
+        return cls(day_dates, day_buffer, day_offsets, date, skill, hours, impact, completed,
+                   completed_at, description, resource, guide, skills, pool, id_overrides, slot, part)
+
+    def __len__(self) -> int:
+        return len(self.day_dates)
+
+    @property
+    def n_tasks(self) -> int:
+        return len(self.skill)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.day_dates, self.day_buffer, self.day_offsets, self.date, self.skill,
+                  self.hours, self.impact, self.completed, self.completed_at,
+                  self.description, self.resource, self.guide, self.slot, self.part)
+        return sum(a.nbytes for a in arrays)
+
+    def task(self, row: int) -> StudyTask:
+        day = self.date[row].astype(datetime.date)
+        skill = self.skills[self.skill[row]]
+        row_id = self.id_overrides.get(row)
+        if row_id is None:
+            row_id = task_id(skill, day, int((self.date[row] - self.day_dates[0]).astype(int)), int(self.part[row]))
+        completed_at = self.completed_at[row]
+        start, end = self.slot[row]
+        return StudyTask(
+            id=row_id,
+            skill=skill,
+            description=self.pool.get(self.description[row]),
+            duration_hours=float(self.hours[row]),
+            is_completed=bool(self.completed[row]),
+            completed_at=None if np.isnat(completed_at) else completed_at.astype(datetime.datetime),
+            predicted_impact=float(self.impact[row]),
+            resource_link=self.pool.get(self.resource[row]),
+            study_guide=self.pool.get(self.guide[row]),
+            start_hour=None if np.isnan(start) else float(start),
+            end_hour=None if np.isnan(end) else float(end)
+        )
+
+    def day(self, i: int) -> DailySchedule:
+        start, end = self.day_offsets[i], self.day_offsets[i + 1]
+        return DailySchedule(
+            date=self.day_dates[i].astype(datetime.date),
+            tasks=[self.task(row) for row in range(start, end)],
+            is_buffer_day=bool(self.day_buffer[i])
+        )
+
+    def to_timetable(self) -> List[DailySchedule]:
+        return [self.day(i) for i in range(len(self))]
+
+    def set_completed(self, row: int, completed_at: Optional[datetime.datetime] = None):
+        self.completed[row] = completed_at is not None
+        self.completed_at[row] = np.datetime64('NaT') if completed_at is None else np.datetime64(completed_at, 'us')
+
+    # Analytics straight on the columns
+
+    def hours_by_skill(self, completed_only: bool = False) -> Dict[str, float]:
+        mask = self.completed if completed_only else slice(None)
+        totals = np.bincount(self.skill[mask], weights=self.hours[mask], minlength=len(self.skills))
+        return {s: float(totals[i]) for i, s in enumerate(self.skills) if totals[i]}
+
+    def impact_by_day(self, completed_only: bool = False) -> np.ndarray:
+        # One entry per day of the plan
+        day_of_task = np.repeat(np.arange(len(self)), np.diff(self.day_offsets))
+        weights = self.impact * self.completed if completed_only else self.impact
+        return np.bincount(day_of_task, weights=weights, minlength=len(self))
+
+    def to_arrow(self):
+        if pa is None:
+            raise ImportError("pyarrow is required for ColumnarTimetable.to_arrow()")
+        # Strings are dictionary-encoded against the shared pool
+        strings = pa.array(self.pool.strings, type=pa.string())
+
+        def encoded(idx: np.ndarray):
+            return pa.DictionaryArray.from_arrays(pa.array(idx, mask=idx < 0), strings)
+
+        return pa.table({
+            'date': pa.array(self.date),
+            'skill': pa.DictionaryArray.from_arrays(pa.array(self.skill), pa.array(self.skills)),
+            'hours': pa.array(self.hours),
+            'impact': pa.array(self.impact),
+            'completed': pa.array(self.completed),
+            'completed_at': pa.array(self.completed_at),
+            'description': encoded(self.description),
+            'resource': encoded(self.resource),
+            'guide': encoded(self.guide),
+            'start_hour': pa.array(self.slot[:, 0], from_pandas=True),
+            'end_hour': pa.array(self.slot[:, 1], from_pandas=True),
+        })
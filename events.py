@@ -0,0 +1,206 @@
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+# Completion history as an append-only stream of events. CompletionStats is
+# the materialised view the app reads; every event updates it in O(1).
+
+COMPLETED = 1
+UNCOMPLETED = 0
+ONE_DAY = timedelta(days=1)
+# Recent-performance feedback: a completion counts half as much every
+# HALF_LIFE_DAYS, and not at all after WINDOW_DAYS
+HALF_LIFE_DAYS = 7.0
+WINDOW_DAYS = 28
+
+
+@dataclass(slots=True, frozen=True)
+class CompletionEvent:
+    seq: int
+    kind: int  # COMPLETED or UNCOMPLETED
+    task_id: str
+    skill: str
+    hours: float
+    impact: float
+    at: datetime  # When the event was recorded
+    day: date  # Day the completion counts for
+
+
+def decay_weight(day: date, today: date, half_life_days: float = HALF_LIFE_DAYS) -> float:
+    # Weight of something that happened on `day`, seen from `today`
+    return 2.0 ** ((day - today).days / half_life_days)
+
+
+class DecayedCounts:
+    # Completions and hours per skill over the `window_days` days before
+    # today, each day weighted by decay_weight(). Sums are kept scaled to a
+    # reference day, so time passing changes nothing stored; a day leaving
+    # the window is subtracted once. Updates are O(1) and queries O(window),
+    # however long the history.
+    def __init__(self, half_life_days: float = HALF_LIFE_DAYS, window_days: int = WINDOW_DAYS):
+        self.half_life_days = half_life_days
+        self.window_days = window_days
+        self._ref: Optional[int] = None  # reference day ordinal
+        self._start: Optional[int] = None  # first day in the sums (None: all)
+        self._counts: Dict[str, float] = {}
+        self._hours: Dict[str, float] = {}
+        # Raw (count, hours) per day and skill for days still in the sums
+        self._days: Dict[int, Dict[str, List[float]]] = {}
+
+    def _scale(self, day: int) -> float:
+        return 2.0 ** ((day - self._ref) / self.half_life_days)
+
+    def _rebase(self, ref: int):
+        # Keeps the scale factors near 1
+        factor = 2.0 ** ((self._ref - ref) / self.half_life_days)
+        self._counts = {s: v * factor for s, v in self._counts.items()}
+        self._hours = {s: v * factor for s, v in self._hours.items()}
+        self._ref = ref
+
+    def apply(self, skill: str, day: date, sign: int, hours: float):
+        d = day.toordinal()
+        if self._start is not None and d < self._start:
+            return  # already outside the window
+        if self._ref is None:
+            self._ref = d
+        elif abs(d - self._ref) > 64 * self.half_life_days:
+            self._rebase(d)
+        raw = self._days.setdefault(d, {}).setdefault(skill, [0.0, 0.0])
+        raw[0] += sign
+        raw[1] += sign * hours
+        scale = self._scale(d)
+        self._counts[skill] = self._counts.get(skill, 0.0) + sign * scale
+        self._hours[skill] = self._hours.get(skill, 0.0) + sign * hours * scale
+
+    def _expire(self, today: int):
+        # `today` only moves forward; days before the window leave for good
+        start = today - self.window_days
+        if self._start is not None and start <= self._start:
+            return
+        self._start = start
+        for d in [d for d in self._days if d < start]:
+            scale = self._scale(d)
+            for skill, (count, hours) in self._days.pop(d).items():
+                self._counts[skill] -= count * scale
+                self._hours[skill] -= hours * scale
+
+    def _query(self, totals: Dict[str, float], index: int, today: Optional[date]) -> Dict[str, float]:
+        today = (today or date.today()).toordinal()
+        self._expire(today)
+        if self._ref is None:
+            return {}
+        values = dict(totals)
+        # Today (and anything dated later) is not over yet
+        for d, skills in self._days.items():
+            if d >= today:
+                for skill, raw in skills.items():
+                    values[skill] -= raw[index] * self._scale(d)
+        factor = 2.0 ** ((self._ref - today) / self.half_life_days)
+        return {skill: max(0.0, v * factor) for skill, v in values.items()}
+
+    def counts(self, today: Optional[date] = None) -> Dict[str, float]:
+        return self._query(self._counts, 0, today)
+
+    def hours(self, today: Optional[date] = None) -> Dict[str, float]:
+        return self._query(self._hours, 1, today)
+
+
+class CompletionStats:
+    def __init__(self, half_life_days: float = HALF_LIFE_DAYS, window_days: int = WINDOW_DAYS):
+        self.last_seq = 0
+        self.total_count = 0
+        self.total_hours = 0.0
+        self.total_impact = 0.0
+        self.counts: Dict[str, int] = {}
+        self.hours: Dict[str, float] = {}
+        self.impact: Dict[str, float] = {}
+        self.per_day: Dict[date, int] = {}
+        # Streaks: runs of consecutive study days, indexed from both ends
+        self._run_end: Dict[date, date] = {}  # start -> end
+        self._run_start: Dict[date, date] = {}  # end -> start
+        self._starts: List[date] = []  # sorted, to find the run holding a day
+        self._longest: Optional[int] = 0
+        # Recent completions for reweighting, decayed by age
+        self.recent = DecayedCounts(half_life_days, window_days)
+
+    def apply(self, event: CompletionEvent):
+        sign = 1 if event.kind == COMPLETED else -1
+        self.last_seq = event.seq
+        self.total_count += sign
+        self.total_hours += sign * event.hours
+        self.total_impact += sign * event.impact
+        self.counts[event.skill] = self.counts.get(event.skill, 0) + sign
+        self.hours[event.skill] = self.hours.get(event.skill, 0.0) + sign * event.hours
+        self.impact[event.skill] = self.impact.get(event.skill, 0.0) + sign * event.impact
+        if self.counts[event.skill] == 0:
+            # Keep float sums from drifting away from zero
+            del self.counts[event.skill], self.hours[event.skill], self.impact[event.skill]
+        self.recent.apply(event.skill, event.day, sign, event.hours)
+
+        count = self.per_day.get(event.day, 0) + sign
+        if count > 0:
+            self.per_day[event.day] = count
+            if count == 1 and sign > 0:
+                self._add_day(event.day)
+        else:
+            self.per_day.pop(event.day, None)
+            self._remove_day(event.day)
+
+    def _add_day(self, day: date):
+        start = self._run_start.pop(day - ONE_DAY, day)
+        end = self._run_end.pop(day + ONE_DAY, day)
+        if start == day:
+            insort(self._starts, day)
+        if end > day:
+            del self._starts[bisect_left(self._starts, day + ONE_DAY)]
+        self._run_end[start] = end
+        self._run_start[end] = start
+        if self._longest is not None:
+            self._longest = max(self._longest, (end - start).days + 1)
+
+    def _remove_day(self, day: date):
+        i = bisect_right(self._starts, day) - 1
+        if i < 0 or self._run_end[self._starts[i]] < day:
+            return  # not a study day
+        start = self._starts[i]
+        end = self._run_end.pop(start)
+        del self._run_start[end]
+        if self._longest == (end - start).days + 1:
+            self._longest = None  # recomputed on demand
+        if start < day:
+            self._run_end[start] = day - ONE_DAY
+            self._run_start[day - ONE_DAY] = start
+        else:
+            del self._starts[i]
+        if day < end:
+            self._run_end[day + ONE_DAY] = end
+            self._run_start[end] = day + ONE_DAY
+            insort(self._starts, day + ONE_DAY)
+
+    def efficiency(self, skill: str) -> float:
+        # Predicted band gain per hour studied
+        hours = self.hours.get(skill, 0.0)
+        return self.impact.get(skill, 0.0) / hours if hours > 0 else 0.0
+
+    def skill_rows(self) -> List[Tuple[str, float, float, float]]:
+        # (skill, hours, impact, band per hour), by skill name
+        return [(s, self.hours[s], self.impact[s], self.efficiency(s)) for s in sorted(self.counts)]
+
+    def daily_counts(self) -> List[Tuple[date, int]]:
+        return sorted(self.per_day.items())
+
+    def current_streak(self, today: Optional[date] = None) -> int:
+        # Days in a row up to today; a streak is still alive until today ends
+        today = today or date.today()
+        for end in (today, today - ONE_DAY):
+            start = self._run_start.get(end)
+            if start is not None:
+                return (end - start).days + 1
+        return 0
+
+    @property
+    def longest_streak(self) -> int:
+        if self._longest is None:
+            self._longest = max(((e - s).days + 1 for s, e in self._run_end.items()), default=0)
+        return self._longest
@@ -0,0 +1,145 @@
+import csv
+import datetime
+import io
+from typing import Iterable, Iterator, List, Optional
+
+from models import DailySchedule, StudyTask
+from slots import format_clock
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional, only needed for Parquet exports
+    pa = None
+    pq = None
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # openpyxl is optional, only needed for Excel exports
+    Workbook = None
+
+# Export builders. Each one walks its input once; nothing here runs until a
+# download is requested, and callers cache the result by learning-log version.
+
+LOG_COLUMNS = ['Task_ID', 'Skill', 'Duration', 'Predicted_Impact', 'Completion_Time']
+CSV_CHUNK_ROWS = 1000
+
+
+def _log_row(task: StudyTask) -> list:
+    return [task.id, task.skill, task.duration_hours, task.predicted_impact, task.completed_at]
+
+
+def iter_csv(tasks: Iterable[StudyTask], chunk_rows: int = CSV_CHUNK_ROWS) -> Iterator[bytes]:
+    # UTF-8 CSV in chunks of `chunk_rows` rows, header first
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(LOG_COLUMNS)
+    rows = 0
+    for task in tasks:
+        writer.writerow(_log_row(task))
+        rows += 1
+        if rows % chunk_rows == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def csv_bytes(tasks: Iterable[StudyTask]) -> bytes:
+    return b''.join(iter_csv(tasks))
+
+
+def excel_bytes(tasks: Iterable[StudyTask]) -> bytes:
+    if Workbook is None:
+        raise ImportError("openpyxl is required for Excel exports")
+    # Write-only mode streams rows to the file instead of keeping a cell grid
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('LearningLogs')
+    sheet.append(LOG_COLUMNS)
+    for task in tasks:
+        sheet.append(_log_row(task))
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def parquet_bytes(tasks: Iterable[StudyTask]) -> bytes:
+    if pa is None:
+        raise ImportError("pyarrow is required for Parquet exports")
+    tasks = list(tasks)
+    table = pa.table({
+        'id': pa.array([t.id for t in tasks], type=pa.string()),
+        'skill': pa.array([t.skill for t in tasks], type=pa.string()).dictionary_encode(),
+        'description': pa.array([t.description for t in tasks], type=pa.string()),
+        'duration_hours': pa.array([t.duration_hours for t in tasks], type=pa.float64()),
+        'predicted_impact': pa.array([t.predicted_impact for t in tasks], type=pa.float64()),
+        'completed_at': pa.array([t.completed_at for t in tasks], type=pa.timestamp('us')),
+        'resource_link': pa.array([t.resource_link for t in tasks], type=pa.string()),
+        'study_guide': pa.array([t.study_guide for t in tasks], type=pa.string()),
+        'start_hour': pa.array([t.start_hour for t in tasks], type=pa.float32()),
+        'end_hour': pa.array([t.end_hour for t in tasks], type=pa.float32()),
+    })
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression='zstd')
+    return buffer.getvalue()
+
+
+# iCalendar (RFC 5545)
+
+def _ics_text(value: Optional[str]) -> str:
+    return (value or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _ics_fold(line: str) -> str:
+    # Content lines are limited to 75 octets; continuations start with a space
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1  # do not split a UTF-8 sequence
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+        limit = 74
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _ics_time(day: datetime.date, hour: float) -> str:
+    moment = datetime.datetime.combine(day, datetime.time()) + datetime.timedelta(hours=hour)
+    return moment.strftime('%Y%m%dT%H%M%S')
+
+
+def iter_ics(timetable: Iterable[DailySchedule], calendar_name: str = 'IELTS iLMS') -> Iterator[str]:
+    # One VEVENT per task. Tasks with clock times become timed events in
+    # floating local time; the rest are all-day events.
+    stamp = datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    yield ''.join(_ics_fold(line) for line in (
+        'BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//IELTS iLMS//Timetable//VI',
+        'CALSCALE:GREGORIAN', f'X-WR-CALNAME:{_ics_text(calendar_name)}'))
+    for day in timetable:
+        lines: List[str] = []
+        for task in day.tasks:
+            lines += ['BEGIN:VEVENT', f'UID:{task.id}@ielts-ilms', f'DTSTAMP:{stamp}']
+            if task.start_hour is not None:
+                lines += [f'DTSTART:{_ics_time(day.date, task.start_hour)}',
+                          f'DTEND:{_ics_time(day.date, task.end_hour)}']
+            else:
+                lines += [f'DTSTART;VALUE=DATE:{day.date:%Y%m%d}',
+                          f'DTEND;VALUE=DATE:{day.date + datetime.timedelta(days=1):%Y%m%d}']
+            details = [f'{task.duration_hours}h', task.study_guide or '', task.resource_link or '']
+            if task.start_hour is not None:
+                details.insert(0, f'{format_clock(task.start_hour)}–{format_clock(task.end_hour)}')
+            lines += [f'SUMMARY:{_ics_text(f"{task.skill}: {task.description}")}',
+                      f'DESCRIPTION:{_ics_text(chr(10).join(d for d in details if d))}']
+            lines.append('END:VEVENT')
+        if lines:
+            yield ''.join(_ics_fold(line) for line in lines)
+    yield _ics_fold('END:VCALENDAR')
+
+
+def ics_bytes(timetable: Iterable[DailySchedule], calendar_name: str = 'IELTS iLMS') -> bytes:
+    return ''.join(iter_ics(timetable, calendar_name)).encode('utf-8')
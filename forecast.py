@@ -0,0 +1,174 @@
+import datetime
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from events import COMPLETED, CompletionEvent
+
+# Band-score forecast. Each skill follows band = intercept + rate * hours,
+# where hours is the cumulative study time on that skill. Intercept and rate
+# are fitted by least squares to the learner's score history (self-assessment
+# and mock tests), with the scheduler's fixed rate as a prior so that one or
+# two results do not swing the forecast. The forecast for every day of the
+# plan is then a single array expression over (days, skills).
+
+SKILLS = ('Listening', 'Reading', 'Writing', 'Speaking')
+MAX_BAND = 9.0
+BASE_RATE = 0.01  # band per hour before focus, as in IELTSScheduler._calculate_impact
+# Weight of the prior on the rate, in hours^2: about as much evidence as two
+# results 120 study hours apart
+PRIOR_STRENGTH = 7200.0
+# Spread of a single result around the trend, and how many results it is worth
+PRIOR_SIGMA = 0.35
+PRIOR_DOF = 2
+Z95 = 1.96
+
+
+def prior_rate(focus_level: int) -> float:
+    return BASE_RATE * (0.5 + focus_level / 5.0)
+
+
+@dataclass(slots=True)
+class SkillFit:
+    intercept: np.ndarray  # (skills,)
+    rate: np.ndarray  # (skills,) band per hour, never negative
+    cov: np.ndarray  # (skills, 2, 2) covariance of (intercept, rate)
+    sigma: np.ndarray  # (skills,) residual spread
+    n: int  # results fitted
+
+    def rates(self, skills: Sequence[str] = SKILLS) -> Dict[str, float]:
+        return {skill: float(r) for skill, r in zip(skills, self.rate)}
+
+
+@dataclass(slots=True)
+class Forecast:
+    mean: np.ndarray  # (days, skills)
+    sd: np.ndarray  # (days, skills) standard error of the mean
+    average: np.ndarray  # (days,) overall band
+    lower: np.ndarray  # (days,) 95% band of the overall score
+    upper: np.ndarray  # (days,)
+
+
+def fit(hours: np.ndarray, bands: np.ndarray, focus_level: int = 3) -> SkillFit:
+    # hours, bands: (results, skills). All skills are solved at once through
+    # their 2x2 normal equations; the prior adds one pseudo-row [0, sqrt(k)]
+    # with target sqrt(k) * prior_rate.
+    hours = np.asarray(hours, dtype=np.float64)
+    bands = np.asarray(bands, dtype=np.float64)
+    n = bands.shape[0]
+    X = np.stack([np.ones_like(hours), hours], axis=-1)  # (n, skills, 2)
+    xtx = np.einsum('nsk,nsl->skl', X, X)
+    xtx[:, 1, 1] += PRIOR_STRENGTH
+    xty = np.einsum('nsk,ns->sk', X, bands)
+    xty[:, 1] += PRIOR_STRENGTH * prior_rate(focus_level)
+    beta = np.linalg.solve(xtx, xty[..., None])[..., 0]  # (skills, 2)
+
+    residuals = bands - (beta[:, 0] + beta[:, 1] * hours)
+    rss = (residuals ** 2).sum(axis=0)
+    sigma2 = (PRIOR_DOF * PRIOR_SIGMA ** 2 + rss) / (PRIOR_DOF + max(n - 2, 0))
+    cov = sigma2[:, None, None] * np.linalg.inv(xtx)
+    return SkillFit(beta[:, 0], np.maximum(beta[:, 1], 0.0), cov, np.sqrt(sigma2), n)
+
+
+def project(skill_fit: SkillFit, hours_now: np.ndarray, planned: np.ndarray, adherence: float = 1.0) -> Forecast:
+    # planned: (days, skills) hours scheduled per day; day i of the result is
+    # the score at the end of day i if `adherence` of the plan gets done
+    H = np.asarray(hours_now, dtype=np.float64) + np.cumsum(planned, axis=0) * adherence
+    mean = np.clip(skill_fit.intercept + skill_fit.rate * H, 0.0, MAX_BAND)
+    c = skill_fit.cov
+    var = c[:, 0, 0] + 2.0 * c[:, 0, 1] * H + c[:, 1, 1] * H * H
+    sd = np.sqrt(np.maximum(var, 0.0))
+    n_skills = mean.shape[1]
+    average = mean.mean(axis=1)
+    # Skills are fitted separately, so their errors add as independent
+    average_sd = np.sqrt((sd ** 2).sum(axis=1)) / n_skills
+    return Forecast(mean, sd, average,
+                    np.clip(average - Z95 * average_sd, 0.0, MAX_BAND),
+                    np.clip(average + Z95 * average_sd, 0.0, MAX_BAND))
+
+
+def hours_before(events: Iterable[CompletionEvent], days: Sequence[datetime.date],
+                 skills: Sequence[str] = SKILLS) -> np.ndarray:
+    # (len(days), skills): hours completed before each day, from the event log
+    index = {skill: i for i, skill in enumerate(skills)}
+    rows = [(e.day.toordinal(), index[e.skill], e.hours if e.kind == COMPLETED else -e.hours)
+            for e in events if e.skill in index]
+    out = np.zeros((len(days), len(skills)))
+    if not rows:
+        return out
+    data = np.array(rows, dtype=np.float64)
+    data = data[np.argsort(data[:, 0], kind='stable')]
+    per_event = np.zeros((len(data), len(skills)))
+    per_event[np.arange(len(data)), data[:, 1].astype(np.intp)] = data[:, 2]
+    cumulative = np.cumsum(per_event, axis=0)
+    pos = np.searchsorted(data[:, 0], [d.toordinal() for d in days], side='left')
+    has = pos > 0
+    out[has] = cumulative[pos[has] - 1]
+    return out
+
+
+def planned_hours(timetable, first_day: int, n_days: int, skills: Sequence[str] = SKILLS) -> np.ndarray:
+    # (n_days, skills) hours scheduled on days [first_day, first_day + n_days).
+    # A compressed plan is tiled from its 14-day templates; other plans are
+    # read day by day.
+    index = {skill: i for i, skill in enumerate(skills)}
+    out = np.zeros((n_days, len(skills)))
+    stop = first_day + n_days
+    if hasattr(timetable, 'template_runs'):
+        for run_first, run_stop, templates in timetable.template_runs():
+            lo, hi = max(run_first, first_day), min(run_stop, stop)
+            if lo >= hi:
+                continue
+            period = np.zeros((len(templates), len(skills)))
+            for i, template in enumerate(templates):
+                for task in template.tasks:
+                    if task.skill in index:
+                        period[i, index[task.skill]] += task.hours
+            out[lo - first_day:hi - first_day] = period[np.arange(lo, hi) % len(templates)]
+        overrides = [(d, day) for d, day in timetable.overrides.items() if first_day <= d < stop]
+    else:
+        overrides = [(d, timetable[d]) for d in range(first_day, min(stop, len(timetable)))]
+    for d, day in overrides:
+        out[d - first_day] = 0.0
+        for task in day.tasks:
+            if task.skill in index:
+                out[d - first_day, index[task.skill]] += task.duration_hours
+    return out
+
+
+def fit_history(history: List[Tuple[datetime.date, Dict[str, float]]], events: List[CompletionEvent],
+                focus_level: int, current_scores: Dict[str, float],
+                today: Optional[datetime.date] = None) -> SkillFit:
+    # history as LearningLog.score_history(); without any, the current
+    # scores count as today's result
+    if not history:
+        history = [(today or datetime.date.today(), current_scores)]
+    days = [day for day, _ in history]
+    bands = np.array([[scores.get(s, current_scores[s]) for s in SKILLS] for _, scores in history])
+    return fit(hours_before(events, days), bands, focus_level)
+
+
+def learner_forecast(timetable, history: List[Tuple[datetime.date, Dict[str, float]]],
+                     events: List[CompletionEvent], focus_level: int, current_scores: Dict[str, float],
+                     end: datetime.date, today: Optional[datetime.date] = None
+                     ) -> Tuple[List[datetime.date], Forecast, SkillFit]:
+    # Forecast from today to `end` for the app: fits the learner's history
+    # and projects the rest of their plan at the pace they have kept so far
+    today = today or datetime.date.today()
+    skill_fit = fit_history(history, events, focus_level, current_scores, today)
+
+    hours_now = hours_before(events, [today])[0]
+    start = timetable.start if hasattr(timetable, 'start') else timetable[0].date if len(timetable) else today
+    start_idx = max(0, (today - start).days)
+    n_days = max(1, (end - today).days + 1)
+    planned = planned_hours(timetable, start_idx, n_days)
+    # Pace so far: hours done against hours planned before today
+    adherence = 1.0
+    if start_idx > 0:
+        done_since = hours_now.sum() - hours_before(events, [start])[0].sum()
+        scheduled = planned_hours(timetable, 0, start_idx).sum()
+        if scheduled > 0:
+            adherence = float(np.clip(done_since / scheduled, 0.1, 1.0))
+    dates = [today + datetime.timedelta(days=i) for i in range(n_days)]
+    return dates, project(skill_fit, hours_now, planned, adherence), skill_fit
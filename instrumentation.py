@@ -0,0 +1,150 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, TextIO, Union
+
+# Opt-in: nothing is recorded unless ILMS_PROFILE=1 or enable() is called
+# (every session), or a session turns recording on for itself with
+# enable_session(). When nothing is on a span or timed call costs two flag
+# checks. Spans without an explicit session belong to the one bound to the
+# current thread, so scheduler timings land in the session that caused them.
+_enabled = os.environ.get('ILMS_PROFILE') == '1'
+_sessions: set = set()
+_records: deque = deque(maxlen=int(os.environ.get('ILMS_PROFILE_BUFFER', '10000')))
+_reruns: Dict[str, int] = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def enable(flag: bool = True):
+    global _enabled
+    _enabled = flag
+
+
+def enable_session(session: str, flag: bool = True):
+    with _lock:
+        if flag:
+            _sessions.add(session)
+        else:
+            _sessions.discard(session)
+
+
+def is_enabled(session: Optional[str] = None) -> bool:
+    return _enabled or (session is not None and session in _sessions)
+
+
+def bind_session(session: Optional[str]):
+    # Session of the code running on this thread from now on
+    _local.session = session
+
+
+def _session_of(session: Optional[str]) -> Optional[str]:
+    return session if session is not None else getattr(_local, 'session', None)
+
+
+def _recording(session: Optional[str]) -> bool:
+    if not _enabled and not _sessions:
+        return False
+    return _enabled or _session_of(session) in _sessions
+
+
+def record_since(name: str, started: float, session: Optional[str] = None):
+    # Records a span that began at perf_counter() value `started`
+    if not _recording(session):
+        return
+    _records.append({
+        'name': name,
+        'ms': (time.perf_counter() - started) * 1000.0,
+        'ts': time.time(),
+        'session': _session_of(session),
+    })
+
+
+@contextmanager
+def span(name: str, session: Optional[str] = None):
+    if not _recording(session):
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_since(name, started, session)
+
+
+def timed(name: Optional[str] = None) -> Callable:
+    def decorator(fn: Callable) -> Callable:
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _recording(None):
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record_since(label, started)
+        return wrapper
+    return decorator
+
+
+def count_rerun(session: str) -> int:
+    with _lock:
+        _reruns[session] = _reruns.get(session, 0) + 1
+        return _reruns[session]
+
+
+def rerun_counts() -> Dict[str, int]:
+    with _lock:
+        return dict(_reruns)
+
+
+def records(name: Optional[str] = None, session: Optional[str] = None) -> List[dict]:
+    # All records, or those of one span name and/or one session
+    return [r for r in list(_records)
+            if (name is None or r['name'] == name) and (session is None or r['session'] == session)]
+
+
+def summary(session: Optional[str] = None) -> List[dict]:
+    # Per span name: count, total, mean, p95 and max in milliseconds
+    by_name: Dict[str, List[float]] = {}
+    for r in records(session=session):
+        by_name.setdefault(r['name'], []).append(r['ms'])
+    rows = []
+    for name, values in by_name.items():
+        values.sort()
+        rows.append({
+            'name': name,
+            'count': len(values),
+            'total_ms': sum(values),
+            'mean_ms': sum(values) / len(values),
+            'p95_ms': values[min(len(values) - 1, int(len(values) * 0.95))],
+            'max_ms': values[-1],
+        })
+    rows.sort(key=lambda row: row['total_ms'], reverse=True)
+    return rows
+
+
+def dump_jsonl(target: Union[str, TextIO, None] = None, session: Optional[str] = None) -> str:
+    # Writes one JSON object per record (of `session` only, if given);
+    # returns the text when no target is given
+    lines = ''.join(json.dumps(r) + '\n' for r in records(session=session))
+    if target is None:
+        return lines
+    if isinstance(target, str):
+        with open(target, 'a', encoding='utf-8') as f:
+            f.write(lines)
+    else:
+        target.write(lines)
+    return lines
+
+
+def reset():
+    _records.clear()
+    with _lock:
+        _reruns.clear()
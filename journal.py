@@ -0,0 +1,282 @@
+import datetime
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # not on Windows: one writer per learner there
+    fcntl = None
+
+from models import UserProfile
+from scheduler import IELTSScheduler
+from serialization import dump_profile, load_profile
+from timetable import CompressedTimetable
+
+# Per-learner session journal: an append-only file of binary records plus a
+# snapshot of the state they add up to. Restore reads the snapshot, then
+# replays only the records written after it.
+#
+#   journal:  MAGIC, then records [u32 length][u8 kind][u32 crc32][payload]
+#   snapshot: SNAPSHOT_MAGIC, u64 journal offset, zlib(JSON state)
+#
+# A plan is not stored day by day: it is rebuilt from the profile, weights
+# and text seed of each of its runs (see CompressedTimetable).
+#
+# Several sessions of one learner may hold the same journal open. Appends
+# and snapshots take an exclusive flock on the journal and first replay
+# whatever the other writers appended, so every record is kept and a
+# snapshot always covers all records before its offset.
+
+MAGIC = b'ILMSJRN1'
+SNAPSHOT_MAGIC = b'ILMSNAP1'
+_HEADER = struct.Struct('<IBI')
+_OFFSET = struct.Struct('<Q')
+_TOGGLE = struct.Struct('<d')
+
+PROFILE = 1  # JSON: dump_profile()
+GENERATE = 2  # JSON: {"start", "total_days", "text_seed", "weights"}
+REBASE = 3  # JSON: {"from_date", "weights", "rates"?}
+TOGGLE = 4  # f64 completion timestamp (NaN = not completed) + UTF-8 task id
+
+SNAPSHOT_EVERY = 256  # records
+
+
+@dataclass
+class JournalState:
+    profile: Optional[Dict] = None
+    # {"start", "total_days", "text_seed", "runs": [{"first_day", "profile", "weights", "rates"?}]}
+    plan: Optional[Dict] = None
+    completed: Dict[str, float] = field(default_factory=dict)  # task id -> timestamp
+
+    def apply(self, kind: int, payload: bytes):
+        if kind == TOGGLE:
+            (ts,) = _TOGGLE.unpack_from(payload)
+            task_id = payload[_TOGGLE.size:].decode('utf-8')
+            if ts != ts:  # NaN
+                self.completed.pop(task_id, None)
+            else:
+                self.completed[task_id] = ts
+            return
+        data = json.loads(payload)
+        if kind == PROFILE:
+            self.profile = data
+        elif kind == GENERATE:
+            self.plan = {'start': data['start'], 'total_days': data['total_days'], 'text_seed': data['text_seed'],
+                         'runs': [{'first_day': 0, 'profile': self.profile, 'weights': data['weights']}]}
+        elif kind == REBASE and self.plan is not None:
+            start = datetime.date.fromisoformat(self.plan['start'])
+            split = max(0, (datetime.date.fromisoformat(data['from_date']) - start).days)
+            runs = [run for run in self.plan['runs'] if run['first_day'] < split]
+            runs.append({'first_day': split, 'profile': self.profile, 'weights': data['weights'],
+                         'rates': data.get('rates')})
+            self.plan['runs'] = runs
+
+
+def _scheduler(profile_data: Dict, weights: Dict[str, float],
+               rates: Optional[Dict[str, float]] = None) -> IELTSScheduler:
+    scheduler = IELTSScheduler(load_profile(profile_data))
+    scheduler.skill_weights = dict(weights)
+    scheduler.learning_rates = rates
+    return scheduler
+
+
+def build_session(state: JournalState) -> Tuple[Optional[UserProfile], Optional[CompressedTimetable]]:
+    # Turns a replayed state back into the objects the app keeps in session_state
+    profile = load_profile(state.profile) if state.profile else None
+    if state.plan is None:
+        return profile, None
+    plan = state.plan
+    start = datetime.date.fromisoformat(plan['start'])
+    completed_at = {task_id: datetime.datetime.fromtimestamp(ts) for task_id, ts in state.completed.items()}
+    first, *rest = plan['runs']
+    timetable = CompressedTimetable(_scheduler(first['profile'], first['weights']), start, plan['total_days'],
+                                    completed_at, plan['text_seed'])
+    for run in rest:
+        timetable, _ = timetable.rebase(_scheduler(run['profile'], run['weights'], run.get('rates')),
+                                        start + datetime.timedelta(days=run['first_day']))
+    return profile, timetable
+
+
+def _file_name(learner_id: str) -> str:
+    # Learner ids come from the URL; anything unusual is hashed into a file
+    # name. At 65 characters a hashed name cannot equal a kept id, and it
+    # maps to itself, so journal_learners() can hand it back as an id.
+    if re.fullmatch(r'[A-Za-z0-9_-]{1,64}|_[0-9a-f]{64}', learner_id):
+        return learner_id
+    return '_' + hashlib.sha256(learner_id.encode('utf-8')).hexdigest()
+
+
+def journal_exists(directory: str, learner_id: str) -> bool:
+    name = _file_name(learner_id)
+    return any(os.path.exists(os.path.join(directory, name + ext)) for ext in ('.journal', '.snapshot'))
+
+
+def journal_learners(directory: str, known: Iterable[str] = ()) -> List[str]:
+    # Every learner with a journal or snapshot. File names are the learner
+    # ids; hashed ones are the ids in `known` they belong to, or else stand
+    # in for an id that cannot be recovered.
+    if not os.path.isdir(directory):
+        return []
+    by_name = {_file_name(learner_id): learner_id for learner_id in known}
+    names = {name.rsplit('.', 1)[0] for name in os.listdir(directory) if name.endswith(('.journal', '.snapshot'))}
+    return sorted(by_name.get(name, name) for name in names)
+
+
+def _replay(view, offset: int, end: int, state: JournalState) -> Tuple[int, int]:
+    # Applies the records in view[offset:end] until the first torn one;
+    # (offset after the last good record, records applied)
+    applied = 0
+    while offset + _HEADER.size <= end:
+        length, kind, crc = _HEADER.unpack_from(view, offset)
+        start = offset + _HEADER.size
+        if start + length > end:
+            break
+        payload = view[start:start + length]
+        if zlib.crc32(payload) != crc:
+            break
+        state.apply(kind, payload)
+        offset = start + length
+        applied += 1
+    return offset, applied
+
+
+def _restore(path: str, snapshot_path: str) -> Tuple[JournalState, int, int]:
+    # (state, end of the last good record, records replayed after the
+    # snapshot); offset 0 means there is no usable journal
+    state, offset = JournalState(), len(MAGIC)
+    if os.path.exists(snapshot_path):
+        with open(snapshot_path, 'rb') as f:
+            blob = f.read()
+        if blob[:len(SNAPSHOT_MAGIC)] == SNAPSHOT_MAGIC:
+            (offset,) = _OFFSET.unpack_from(blob, len(SNAPSHOT_MAGIC))
+            data = json.loads(zlib.decompress(blob[len(SNAPSHOT_MAGIC) + _OFFSET.size:]))
+            state = JournalState(data['profile'], data['plan'], data['completed'])
+    if not os.path.exists(path) or os.path.getsize(path) < max(offset, len(MAGIC)):
+        return state, 0, 0
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        if view[:len(MAGIC)] != MAGIC:
+            return JournalState(), 0, 0
+        offset, replayed = _replay(view, offset, len(view), state)
+    return state, offset, replayed
+
+
+class Journal:
+    def __init__(self, directory: str, learner_id: str, snapshot_every: int = SNAPSHOT_EVERY):
+        os.makedirs(directory, exist_ok=True)
+        name = _file_name(learner_id)
+        self.path = os.path.join(directory, name + '.journal')
+        self.snapshot_path = os.path.join(directory, name + '.snapshot')
+        self.snapshot_every = snapshot_every
+        self._file = open(self.path, 'ab', buffering=0)
+        with self._locked():
+            self.state, offset, self._since_snapshot = _restore(self.path, self.snapshot_path)
+            fresh = offset == 0
+            if fresh:
+                self._file.truncate(0)
+                self._file.write(MAGIC)
+                offset = len(MAGIC)
+            elif os.path.getsize(self.path) != offset:
+                self._file.truncate(offset)  # drop a torn record left by a crash
+            self._offset = offset
+            if fresh and (self.state.profile or self.state.plan):
+                # The journal was lost but a snapshot survived: re-anchor it
+                self._write_snapshot()
+
+    @classmethod
+    def read(cls, directory: str, learner_id: str) -> Tuple[Optional[UserProfile], Optional[CompressedTimetable]]:
+        # Restores a learner's session without opening anything for writing,
+        # for readers running beside live sessions: a record being written
+        # is skipped rather than truncated, and no snapshot is taken
+        name = _file_name(learner_id)
+        state, _, _ = _restore(os.path.join(directory, name + '.journal'),
+                               os.path.join(directory, name + '.snapshot'))
+        return build_session(state)
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def _sync(self):
+        # Under the lock: replays records other writers appended after ours
+        end = os.fstat(self._file.fileno()).st_size
+        if end <= self._offset:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            tail = f.read(end - self._offset)
+        consumed, applied = _replay(tail, 0, len(tail), self.state)
+        self._offset += consumed
+        self._since_snapshot += applied
+        if consumed < len(tail):
+            self._file.truncate(self._offset)  # a writer crashed mid-record
+
+    def _append(self, kind: int, payload: bytes):
+        record = _HEADER.pack(len(payload), kind, zlib.crc32(payload)) + payload
+        with self._locked():
+            self._sync()
+            self._file.write(record)
+            self._offset += len(record)
+            self.state.apply(kind, payload)
+            self._since_snapshot += 1
+            if self._since_snapshot >= self.snapshot_every:
+                self._write_snapshot()
+
+    def _append_json(self, kind: int, data: Dict):
+        self._append(kind, json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+
+    def record_profile(self, profile: UserProfile):
+        self._append_json(PROFILE, dump_profile(profile))
+
+    def record_generate(self, timetable: CompressedTimetable, scheduler: IELTSScheduler):
+        self._append_json(GENERATE, {'start': timetable.start.isoformat(), 'total_days': timetable.total_days,
+                                     'text_seed': timetable.text_seed, 'weights': scheduler.skill_weights})
+
+    def record_rebase(self, from_date: datetime.date, scheduler: IELTSScheduler):
+        data = {'from_date': from_date.isoformat(), 'weights': scheduler.skill_weights}
+        if scheduler.learning_rates:
+            data['rates'] = scheduler.learning_rates
+        self._append_json(REBASE, data)
+
+    def record_toggle(self, task_id: str, completed_at: Optional[datetime.datetime]):
+        ts = completed_at.timestamp() if completed_at else float('nan')
+        self._append(TOGGLE, _TOGGLE.pack(ts) + task_id.encode('utf-8'))
+
+    def snapshot(self):
+        with self._locked():
+            self._sync()
+            self._write_snapshot()
+
+    def _write_snapshot(self):
+        # Under the lock. Written beside the old one and renamed over it, so a
+        # crash leaves either snapshot intact
+        data = {'profile': self.state.profile, 'plan': self.state.plan, 'completed': self.state.completed}
+        blob = (SNAPSHOT_MAGIC + _OFFSET.pack(self._offset)
+                + zlib.compress(json.dumps(data, separators=(',', ':')).encode('utf-8')))
+        tmp = self.snapshot_path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(blob)
+        os.replace(tmp, self.snapshot_path)
+        self._since_snapshot = 0
+
+    def restore(self) -> Tuple[Optional[UserProfile], Optional[CompressedTimetable]]:
+        with self._locked():
+            self._sync()
+        return build_session(self.state)
+
+    def close(self):
+        self._file.close()
@@ -1,8 +1,14 @@
+import bisect
+import sqlite3
+import threading
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from datetime import date, datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 
-@dataclass
+from events import COMPLETED, HALF_LIFE_DAYS, UNCOMPLETED, WINDOW_DAYS, CompletionEvent, CompletionStats
+
+@dataclass(slots=True)
 class UserProfile:
     current_scores: Dict[str, float]  # {'Listening': 6.0, 'Reading': 6.5, ...}
     target_scores: Dict[str, float]
@@ -11,7 +17,9 @@ class UserProfile:
     focus_level: int  # 1-5
     learning_style: str  # 'Visual', 'Auditory', 'Kinesthetic', 'Read/Write'
 
-@dataclass
+# Slotted (no per-instance __dict__): plans of these live in st.session_state
+# for every connected user.
+@dataclass(slots=True)
 class StudyTask:
     id: str
     skill: str
@@ -22,20 +30,316 @@ class StudyTask:
     predicted_impact: float = 0.0  # Estimated band score increase
     resource_link: Optional[str] = None  # Link to PDF, Video, or Article
     study_guide: Optional[str] = None  # Specific instructions on how to learn
+    start_hour: Optional[float] = None  # Clock time within an availability window, 18.5 = 18:30
+    end_hour: Optional[float] = None
 
-@dataclass
+@dataclass(slots=True)
 class DailySchedule:
     date: date
     tasks: List[StudyTask] = field(default_factory=list)
     is_buffer_day: bool = False
 
-@dataclass
+@dataclass(slots=True)
+class TimetableDiff:
+    changed: List[date] = field(default_factory=list)  # Days rebuilt or added
+    removed: List[date] = field(default_factory=list)  # Days no longer in the plan
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.changed and not self.removed
+
 class LearningLog:
-    logs: List[StudyTask] = field(default_factory=list)
+    # Completed tasks of one learner, kept in SQLite so history survives a
+    # server restart. Several learners can share one database file; WAL mode
+    # lets their sessions read while another one writes.
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS completed_tasks (
+            learner_id TEXT NOT NULL,
+            task_id TEXT NOT NULL,
+            skill TEXT NOT NULL,
+            description TEXT,
+            duration_hours REAL NOT NULL,
+            predicted_impact REAL NOT NULL,
+            completed_at TEXT NOT NULL,
+            completed_day TEXT NOT NULL,
+            resource_link TEXT,
+            study_guide TEXT,
+            PRIMARY KEY (learner_id, task_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_completed_skill ON completed_tasks (learner_id, skill);
+        CREATE INDEX IF NOT EXISTS idx_completed_day ON completed_tasks (learner_id, completed_day);
+        CREATE TABLE IF NOT EXISTS completion_events (
+            learner_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            kind INTEGER NOT NULL,
+            task_id TEXT NOT NULL,
+            skill TEXT NOT NULL,
+            duration_hours REAL NOT NULL,
+            predicted_impact REAL NOT NULL,
+            recorded_at TEXT NOT NULL,
+            completed_day TEXT NOT NULL,
+            PRIMARY KEY (learner_id, seq)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS score_history (
+            learner_id TEXT NOT NULL,
+            taken_on TEXT NOT NULL,
+            skill TEXT NOT NULL,
+            band REAL NOT NULL,
+            PRIMARY KEY (learner_id, taken_on, skill)
+        ) WITHOUT ROWID;
+    """
+    _COLUMNS = ("task_id, skill, description, duration_hours, predicted_impact, "
+                "completed_at, resource_link, study_guide")
+
+    def __init__(self, path: str = ':memory:', learner_id: str = 'default',
+                 half_life_days: float = HALF_LIFE_DAYS, window_days: int = WINDOW_DAYS):
+        self.path = path
+        self.learner_id = learner_id
+        # Bumped on every change; lets callers cache anything derived from the log
+        self.version = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ':memory:':
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self._SCHEMA)
+        # Impact per completion day plus its running total, kept in step with
+        # every add/remove so progress queries never rescan the table. Writes
+        # from other sessions of the same learner are caught up with on the
+        # next write here, or on refresh().
+        self._days: List[date] = []
+        self._daily_impact: List[float] = []
+        self._cumulative: List[float] = []
+        for day, impact in self._query("SELECT completed_day, SUM(predicted_impact) FROM completed_tasks "
+                                       "WHERE learner_id = ? GROUP BY completed_day ORDER BY completed_day"):
+            self._days.append(date.fromisoformat(day))
+            self._daily_impact.append(impact)
+            self._cumulative.append(impact + (self._cumulative[-1] if self._cumulative else 0.0))
+
+        # Every completion and un-completion is also appended to
+        # completion_events; `stats` is rebuilt from them here and then
+        # updated per event, so analytics never rescan completed_tasks.
+        self.stats = CompletionStats(half_life_days, window_days)
+        if not self._query("SELECT 1 FROM completion_events WHERE learner_id = ? LIMIT 1"):
+            self._seed_events()
+        for event in self.events():
+            self.stats.apply(event)
+
+    def _seed_events(self):
+        # Logs written before events existed start from one event per completion
+        rows = self._query("SELECT task_id, skill, duration_hours, predicted_impact, completed_at, completed_day "
+                           "FROM completed_tasks WHERE learner_id = ? ORDER BY completed_at")
+        with self._lock, self._transaction():
+            if self._select("SELECT 1 FROM completion_events WHERE learner_id = ? LIMIT 1"):
+                return  # another session seeded them first
+            self._conn.executemany(
+                "INSERT INTO completion_events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(self.learner_id, seq, COMPLETED) + tuple(row) for seq, row in enumerate(rows, 1)]
+            )
+
+    @contextmanager
+    def _transaction(self):
+        # The connection autocommits; group a table write with its event.
+        # IMMEDIATE takes the write lock up front, so reading the last seq
+        # and inserting the next one cannot interleave with another session.
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def events(self, after_seq: int = 0) -> List[CompletionEvent]:
+        with self._lock:
+            return self._events(after_seq)
+
+    def _events(self, after_seq: int) -> List[CompletionEvent]:
+        return [
+            CompletionEvent(seq, kind, task_id, skill, hours, impact, datetime.fromisoformat(at), date.fromisoformat(day))
+            for seq, kind, task_id, skill, hours, impact, at, day in self._select(
+                "SELECT seq, kind, task_id, skill, duration_hours, predicted_impact, recorded_at, completed_day "
+                "FROM completion_events WHERE learner_id = ? AND seq > ? ORDER BY seq", (after_seq,))
+        ]
+
+    def _catch_up(self):
+        # Caller holds the lock. Applies events other sessions of this learner
+        # wrote since ours, so stats.last_seq is the table's last seq again.
+        missed = self._events(self.stats.last_seq)
+        for event in missed:
+            self.stats.apply(event)
+            self._add_impact(event.day, event.impact, sign=1.0 if event.kind == COMPLETED else -1.0)
+        if missed:
+            self.version += 1
+
+    def refresh(self):
+        with self._lock:
+            self._catch_up()
+
+    def _record(self, seq: int, kind: int, task_id: str, skill: str, hours: float, impact: float,
+                day: date) -> CompletionEvent:
+        # Caller holds the lock and a transaction, and applies the event once committed
+        event = CompletionEvent(seq, kind, task_id, skill, hours, impact, datetime.now(), day)
+        self._conn.execute(
+            "INSERT INTO completion_events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.learner_id, seq, kind, task_id, skill, hours, impact, event.at.isoformat(), day.isoformat())
+        )
+        return event
 
     def add_task(self, task: StudyTask):
-        self.logs.append(task)
+        completed_at = task.completed_at or datetime.now()
+        with self._lock:
+            events = []
+            with self._transaction():
+                self._catch_up()
+                previous = self._lookup(task.id)
+                seq = self.stats.last_seq
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO completed_tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (self.learner_id, task.id, task.skill, task.description, task.duration_hours,
+                     task.predicted_impact, completed_at.isoformat(), completed_at.date().isoformat(),
+                     task.resource_link, task.study_guide)
+                )
+                if previous:
+                    events.append(self._record(seq + 1, UNCOMPLETED, task.id, *previous))
+                events.append(self._record(seq + len(events) + 1, COMPLETED, task.id, task.skill,
+                                           task.duration_hours, task.predicted_impact, completed_at.date()))
+            for event in events:
+                self.stats.apply(event)
+            if previous:
+                self._add_impact(previous[3], previous[2], sign=-1.0)
+            self._add_impact(completed_at.date(), task.predicted_impact)
+            self.version += 1
+
+    def remove_task(self, task_id: str):
+        with self._lock:
+            with self._transaction():
+                self._catch_up()
+                previous = self._lookup(task_id)
+                if previous is None:
+                    return
+                self._conn.execute("DELETE FROM completed_tasks WHERE learner_id = ? AND task_id = ?",
+                                   (self.learner_id, task_id))
+                event = self._record(self.stats.last_seq + 1, UNCOMPLETED, task_id, *previous)
+            self.stats.apply(event)
+            self._add_impact(previous[3], previous[2], sign=-1.0)
+            self.version += 1
+
+    def _lookup(self, task_id: str) -> Optional[Tuple[str, float, float, date]]:
+        # (skill, hours, impact, completed day) of a logged completion
+        row = self._conn.execute("SELECT skill, duration_hours, predicted_impact, completed_day FROM completed_tasks "
+                                 "WHERE learner_id = ? AND task_id = ?", (self.learner_id, task_id)).fetchone()
+        return (row[0], row[1], row[2], date.fromisoformat(row[3])) if row else None
+
+    def record_scores(self, scores: Dict[str, float], on: Optional[date] = None):
+        # Band per skill from a mock test or self-assessment; a later result
+        # on the same day replaces the earlier one
+        on = on or date.today()
+        with self._lock:
+            with self._transaction():
+                self._conn.executemany("INSERT OR REPLACE INTO score_history VALUES (?, ?, ?, ?)",
+                                       [(self.learner_id, on.isoformat(), skill, band) for skill, band in scores.items()])
+            self.version += 1
+
+    def score_history(self) -> List[Tuple[date, Dict[str, float]]]:
+        # [(day, {skill: band})], oldest first
+        history: Dict[str, Dict[str, float]] = {}
+        for day, skill, band in self._query("SELECT taken_on, skill, band FROM score_history "
+                                            "WHERE learner_id = ? ORDER BY taken_on"):
+            history.setdefault(day, {})[skill] = band
+        return [(date.fromisoformat(day), scores) for day, scores in history.items()]
+
+    def _add_impact(self, day: date, impact: float, sign: float = 1.0):
+        # O(days after `day`) - completions are almost always today, the last entry
+        delta = sign * impact
+        pos = bisect.bisect_left(self._days, day)
+        if pos == len(self._days) or self._days[pos] != day:
+            self._days.insert(pos, day)
+            self._daily_impact.insert(pos, 0.0)
+            self._cumulative.insert(pos, self._cumulative[pos - 1] if pos else 0.0)
+        self._daily_impact[pos] += delta
+        for i in range(pos, len(self._cumulative)):
+            self._cumulative[i] += delta
+
+    def _query(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            return self._select(sql, params)
+
+    def _select(self, sql: str, params: tuple = ()) -> list:
+        # Caller holds the lock
+        return self._conn.execute(sql, (self.learner_id,) + params).fetchall()
+
+    def __contains__(self, task_id: str) -> bool:
+        return bool(self._query("SELECT 1 FROM completed_tasks WHERE learner_id = ? AND task_id = ?", (task_id,)))
+
+    def __len__(self) -> int:
+        return self.stats.total_count
+
+    def __iter__(self):
+        return iter(self.tasks())
+
+    @property
+    def logs(self) -> List[StudyTask]:
+        return self.tasks()
+
+    def tasks(self, skill: Optional[str] = None, since: Optional[date] = None,
+              until: Optional[date] = None) -> List[StudyTask]:
+        # Ordered by completion time; since/until are inclusive days
+        sql = f"SELECT {self._COLUMNS} FROM completed_tasks WHERE learner_id = ?"
+        params = ()
+        if skill is not None:
+            sql += " AND skill = ?"
+            params += (skill,)
+        if since is not None:
+            sql += " AND completed_day >= ?"
+            params += (since.isoformat(),)
+        if until is not None:
+            sql += " AND completed_day <= ?"
+            params += (until.isoformat(),)
+        return [
+            StudyTask(id=task_id, skill=skill_, description=description, duration_hours=hours,
+                      is_completed=True, completed_at=datetime.fromisoformat(completed_at),
+                      predicted_impact=impact, resource_link=link, study_guide=guide)
+            for task_id, skill_, description, hours, impact, completed_at, link, guide
+            in self._query(sql + " ORDER BY completed_at", params)
+        ]
+
+    def completed_at(self) -> Dict[str, datetime]:
+        return {task_id: datetime.fromisoformat(ts) for task_id, ts in
+                self._query("SELECT task_id, completed_at FROM completed_tasks WHERE learner_id = ?")}
+
+    def mark_completed(self, timetable: List[DailySchedule]):
+        # Restore completion flags on a freshly generated plan
+        done = self.completed_at()
+        for day in timetable:
+            for task in day.tasks:
+                if task.id in done:
+                    task.is_completed = True
+                    task.completed_at = done[task.id]
+
+    # Aggregates, read from the materialised stats
+
+    def total_hours(self) -> float:
+        return self.stats.total_hours
+
+    def skill_stats(self) -> List[Tuple[str, float, float]]:
+        # (skill, hours, impact) per skill
+        return [(skill, hours, impact) for skill, hours, impact, _ in self.stats.skill_rows()]
+
+    def hours_by_skill(self) -> Dict[str, float]:
+        return dict(self.stats.hours)
+
+    def daily_counts(self) -> List[Tuple[date, int]]:
+        return self.stats.daily_counts()
+
+    def close(self):
+        self._conn.close()
+
+    def impact_until(self, day: date) -> float:
+        # Total predicted impact of everything completed on or before `day`
+        pos = bisect.bisect_right(self._days, day)
+        return self._cumulative[pos - 1] if pos else 0.0
 
-    def get_progress_data(self):
-        # Logic to calculate progress over time
-        pass
+    def get_progress_data(self, dates: List[date]) -> List[float]:
+        # Cumulative impact at each date, O(log d) per point
+        return [self.impact_until(d) for d in dates]
@@ -0,0 +1,72 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+import zlib
+from typing import Callable, Optional
+
+# Generated plans on disk, addressed by a hash of everything that determines
+# them. A file is written once under a temporary name and renamed into place,
+# so server processes and restarts can share the directory without locks:
+# two workers that miss together both write the same bytes.
+
+STORE_VERSION = 1
+
+
+class PlanStore:
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(**parts) -> str:
+        # Any JSON-serialisable inputs; order of keyword arguments does not matter
+        payload = json.dumps({'v': STORE_VERSION, **parts}, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        # Two-level fan-out keeps directories small
+        return os.path.join(self.directory, key[:2], key[2:] + '.z')
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), 'rb') as f:
+                return zlib.decompress(f.read())
+        except (FileNotFoundError, zlib.error):
+            return None
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(zlib.compress(data, 6))
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def get_or_create(self, key: str, factory: Callable[[], bytes]) -> bytes:
+        data = self.get(key)
+        if data is None:
+            data = factory()
+            self.put(key, data)
+        return data
+
+    def prune(self, max_age_days: float) -> int:
+        # Plans are keyed by their start date, so old entries are never asked
+        # for again; returns the number of files removed
+        cutoff = time.time() - max_age_days * 86400
+        removed = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.unlink(path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
@@ -0,0 +1,162 @@
+import datetime
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from events import COMPLETED, CompletionEvent
+from forecast import MAX_BAND, SKILLS, SkillFit, fit_history, hours_before, planned_hours
+
+# Monte Carlo answer to "will I reach my target by the exam?". Each
+# trajectory draws a completion rate per skill from what the learner has
+# actually done, completes each remaining planned session with that
+# probability, and turns the hours done into a band with a learning rate
+# drawn from the forecast fit. Sessions of equal length are summed as one
+# binomial draw, which has the same distribution as drawing them day by day
+# and keeps a trajectory at a few numbers per skill.
+
+N_TRAJECTORIES = 10_000
+# Beta prior on a skill's completion rate before any task was due: mean 0.8,
+# worth five tasks
+PRIOR_DONE = 4.0
+PRIOR_MISSED = 1.0
+# Upper bound on array elements per batch, ~32 MB of float64
+MAX_BATCH_ELEMENTS = 4_000_000
+
+
+@dataclass(slots=True)
+class ReadinessInput:
+    skill_fit: SkillFit
+    hours_now: np.ndarray  # (skills,) hours studied so far
+    planned: np.ndarray  # (days, skills) hours planned from today to the exam
+    completed: np.ndarray  # (skills,) tasks completed so far
+    scheduled: np.ndarray  # (skills,) tasks that were due so far
+    targets: np.ndarray  # (skills,)
+
+
+@dataclass(slots=True)
+class Readiness:
+    p_skill: np.ndarray  # (skills,) P(band >= target) per skill
+    p_all: float  # every skill on target
+    p_average: float  # overall band on target
+    p10: np.ndarray  # (skills,) exam-day band percentiles
+    p50: np.ndarray
+    p90: np.ndarray
+
+    def by_skill(self, skills: Sequence[str] = SKILLS) -> Dict[str, float]:
+        return {skill: float(p) for skill, p in zip(skills, self.p_skill)}
+
+
+def learner_input(timetable, profile, events: List[CompletionEvent],
+                  history: List[Tuple[datetime.date, Dict[str, float]]],
+                  today: Optional[datetime.date] = None) -> ReadinessInput:
+    # Gathers one learner's inputs from the objects the app already holds
+    today = today or datetime.date.today()
+    start = timetable.start if hasattr(timetable, 'start') else timetable[0].date
+    today_idx = max(0, (today - start).days)
+    end_idx = max(today_idx, (profile.exam_date - start).days)
+    if hasattr(timetable, 'task_counts'):
+        due = timetable.task_counts(today_idx)
+    else:
+        due = {}
+        for day in timetable[:today_idx]:
+            for task in day.tasks:
+                due[task.skill] = due.get(task.skill, 0) + 1
+    # Completions over the same days as `due`: from the start of this plan to
+    # yesterday, whatever was done under earlier plans
+    done: Dict[str, int] = {}
+    for event in events:
+        if start <= event.day < today:
+            done[event.skill] = done.get(event.skill, 0) + (1 if event.kind == COMPLETED else -1)
+    completed = np.array([max(0, done.get(s, 0)) for s in SKILLS], dtype=np.float64)
+    return ReadinessInput(
+        skill_fit=fit_history(history, events, profile.focus_level, profile.current_scores, today),
+        hours_now=hours_before(events, [today])[0],
+        planned=planned_hours(timetable, today_idx, end_idx - today_idx),
+        completed=completed,
+        # A task done ahead of its day counts as due
+        scheduled=np.maximum(completed, [due.get(s, 0) for s in SKILLS]),
+        targets=np.array([profile.target_scores[s] for s in SKILLS], dtype=np.float64),
+    )
+
+
+def _sessions(planned: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # (lengths, counts), each (sessions, skills): the distinct session lengths
+    # of every skill and how often each one is planned, zero-padded
+    columns = []
+    for s in range(planned.shape[1]):
+        column = planned[:, s]
+        lengths, counts = np.unique(column[column > 0], return_counts=True)
+        columns.append((lengths, counts))
+    width = max(1, max(len(lengths) for lengths, _ in columns))
+    out_lengths = np.zeros((width, planned.shape[1]))
+    out_counts = np.zeros((width, planned.shape[1]), dtype=np.int64)
+    for s, (lengths, counts) in enumerate(columns):
+        out_lengths[:len(lengths), s] = lengths
+        out_counts[:len(counts), s] = counts
+    return out_lengths, out_counts
+
+
+def _simulate_batch(batch: List[ReadinessInput], sessions: List[Tuple[np.ndarray, np.ndarray]], n: int,
+                    rng: np.random.Generator) -> List[Readiness]:
+    # Learners in the batch are stacked on axis 0: (learners, trajectories, ...)
+    width = max(item_lengths.shape[0] for item_lengths, _ in sessions)
+    n_skills = len(SKILLS)
+    lengths = np.zeros((len(batch), width, n_skills))
+    counts = np.zeros((len(batch), width, n_skills), dtype=np.int64)
+    for i, (item_lengths, item_counts) in enumerate(sessions):
+        lengths[i, :item_lengths.shape[0]] = item_lengths
+        counts[i, :item_counts.shape[0]] = item_counts
+
+    completed = np.stack([item.completed for item in batch])
+    scheduled = np.stack([item.scheduled for item in batch])
+    rate = rng.beta(PRIOR_DONE + completed[:, None, :],
+                    PRIOR_MISSED + (scheduled - completed)[:, None, :],
+                    size=(len(batch), n, n_skills))
+    # (learners, trajectories, sessions, skills) -> hours done per skill
+    done = rng.binomial(counts[:, None], rate[:, :, None, :])
+    hours = np.einsum('btvs,bvs->bts', done, lengths)
+
+    # (intercept, rate) per skill from the fit, drawn jointly
+    mean = np.stack([np.stack([item.skill_fit.intercept, item.skill_fit.rate], axis=-1) for item in batch])
+    cov = np.stack([item.skill_fit.cov for item in batch])
+    chol = np.linalg.cholesky(cov + 1e-12 * np.eye(2))
+    z = rng.standard_normal((len(batch), n, n_skills, 2))
+    coef = mean[:, None] + np.einsum('bskl,btsl->btsk', chol, z)
+    hours_now = np.stack([item.hours_now for item in batch])
+    band = np.clip(coef[..., 0] + np.maximum(coef[..., 1], 0.0) * (hours_now[:, None] + hours), 0.0, MAX_BAND)
+
+    targets = np.stack([item.targets for item in batch])[:, None]
+    hit = band >= targets
+    p10, p50, p90 = np.percentile(band, [10, 50, 90], axis=1)
+    p_average = (band.mean(axis=2) >= targets.mean(axis=2)).mean(axis=1)
+    return [
+        Readiness(hit[i].mean(axis=0), float(hit[i].all(axis=1).mean()), float(p_average[i]),
+                  p10[i], p50[i], p90[i])
+        for i in range(len(batch))
+    ]
+
+
+def simulate_cohort(inputs: Iterable[ReadinessInput], n_trajectories: int = N_TRAJECTORIES,
+                    seed: Optional[int] = 0, max_elements: int = MAX_BATCH_ELEMENTS) -> Iterator[Readiness]:
+    # Yields one result per input, in order. Learners are simulated together
+    # in batches sized so the largest array stays under `max_elements`.
+    rng = np.random.default_rng(seed)
+    batch: List[ReadinessInput] = []
+    sessions: List[Tuple[np.ndarray, np.ndarray]] = []
+    width = 0
+    for item in inputs:
+        item_sessions = _sessions(item.planned)
+        new_width = max(width, item_sessions[0].shape[0])
+        if batch and (len(batch) + 1) * n_trajectories * new_width * len(SKILLS) > max_elements:
+            yield from _simulate_batch(batch, sessions, n_trajectories, rng)
+            batch, sessions, new_width = [], [], item_sessions[0].shape[0]
+        batch.append(item)
+        sessions.append(item_sessions)
+        width = new_width
+    if batch:
+        yield from _simulate_batch(batch, sessions, n_trajectories, rng)
+
+
+def simulate(item: ReadinessInput, n_trajectories: int = N_TRAJECTORIES, seed: Optional[int] = 0) -> Readiness:
+    return next(simulate_cohort([item], n_trajectories, seed))
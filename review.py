@@ -0,0 +1,206 @@
+import heapq
+import sqlite3
+import threading
+from dataclasses import dataclass, replace
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# SM-2 spaced repetition for the items a learner wants to keep reviewing:
+# vocabulary and their own recurring mistakes. Review days pull the items
+# that are due from a heap keyed by due date.
+
+KINDS = ('vocab', 'error')
+MIN_EASE = 1.3
+# Answer grades shown in the app, SM-2 quality 0-5
+GRADES = {'Quên': 1, 'Khó': 3, 'Tốt': 4, 'Dễ': 5}
+
+
+@dataclass(slots=True)
+class ReviewItem:
+    item_id: str
+    kind: str  # 'vocab' or 'error'
+    prompt: str
+    answer: Optional[str] = None
+    ease: float = 2.5
+    interval: int = 0  # days
+    repetitions: int = 0
+    lapses: int = 0
+    due: date = date.min
+
+
+def sm2(item: ReviewItem, quality: int, on: date):
+    # Updates ease, interval and due date in place for an answer of `quality`
+    if quality < 3:
+        item.repetitions = 0
+        item.interval = 1
+        item.lapses += 1
+    else:
+        item.repetitions += 1
+        if item.repetitions == 1:
+            item.interval = 1
+        elif item.repetitions == 2:
+            item.interval = 6
+        else:
+            item.interval = max(1, round(item.interval * item.ease))
+    item.ease = max(MIN_EASE, item.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    item.due = date.fromordinal(on.toordinal() + item.interval)
+
+
+class ReviewDeck:
+    # One learner's review items, stored next to the learning log. Rows are
+    # integers where possible (kind code, ease in thousandths, due as a day
+    # ordinal) so 100k items stay a few MB. The heap holds (due, seq, id);
+    # an item rescheduled by grading gets a new entry and its old one is
+    # skipped when it surfaces.
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS review_items (
+            learner_id TEXT NOT NULL,
+            item_id TEXT NOT NULL,
+            kind INTEGER NOT NULL,
+            prompt TEXT NOT NULL,
+            answer TEXT,
+            ease INTEGER NOT NULL,
+            interval INTEGER NOT NULL,
+            repetitions INTEGER NOT NULL,
+            lapses INTEGER NOT NULL,
+            due INTEGER NOT NULL,
+            PRIMARY KEY (learner_id, item_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_review_due ON review_items (learner_id, due);
+    """
+
+    def __init__(self, path: str = ':memory:', learner_id: str = 'default'):
+        self.path = path
+        self.learner_id = learner_id
+        self.version = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ':memory:':
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self._SCHEMA)
+        self.items: Dict[str, ReviewItem] = {}
+        self._seq: Dict[str, int] = {}
+        self._counter = 0
+        heap = []
+        rows = self._conn.execute(
+            "SELECT item_id, kind, prompt, answer, ease, interval, repetitions, lapses, due "
+            "FROM review_items WHERE learner_id = ?", (learner_id,))
+        for item_id, kind, prompt, answer, ease, interval, reps, lapses, due in rows:
+            self.items[item_id] = ReviewItem(item_id, KINDS[kind], prompt, answer, ease / 1000.0,
+                                             interval, reps, lapses, date.fromordinal(due))
+            self._counter += 1
+            self._seq[item_id] = self._counter
+            heap.append((due, self._counter, item_id))
+        heapq.heapify(heap)  # O(n)
+        self._heap: List[Tuple[int, int, str]] = heap
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self.items
+
+    def _push(self, item: ReviewItem):
+        self._counter += 1
+        self._seq[item.item_id] = self._counter
+        heapq.heappush(self._heap, (item.due.toordinal(), self._counter, item.item_id))
+        # Drop stale entries once they outnumber live ones
+        if len(self._heap) > 2 * len(self.items) + 64:
+            self._heap = [(self.items[i].due.toordinal(), s, i) for i, s in self._seq.items()]
+            heapq.heapify(self._heap)
+
+    @staticmethod
+    def _row(learner_id: str, item: ReviewItem) -> tuple:
+        return (learner_id, item.item_id, KINDS.index(item.kind), item.prompt, item.answer,
+                round(item.ease * 1000), item.interval, item.repetitions, item.lapses, item.due.toordinal())
+
+    def add_items(self, items: Iterable[ReviewItem]):
+        # New items are due on their `due` date (today if left at date.min).
+        # All or nothing: the batch is checked, then written, and only then
+        # does it enter the in-memory deck.
+        items = list(items)
+        for item in items:
+            if item.kind not in KINDS:
+                raise ValueError(f"Unknown review item kind: {item.kind!r}")
+        today = date.today()
+        for item in items:
+            if item.due == date.min:
+                item.due = today
+        with self._lock:
+            rows = [self._row(self.learner_id, item) for item in items]
+            # One transaction for the batch: the connection autocommits otherwise
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("INSERT OR REPLACE INTO review_items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                       rows)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            for item in items:
+                self.items[item.item_id] = item
+                self._push(item)
+            self.version += 1
+
+    def add(self, item_id: str, kind: str, prompt: str, answer: Optional[str] = None,
+            due: Optional[date] = None) -> ReviewItem:
+        item = ReviewItem(item_id, kind, prompt, answer, due=due or date.today())
+        self.add_items([item])
+        return item
+
+    def remove(self, item_id: str):
+        with self._lock:
+            if self.items.pop(item_id, None) is None:
+                return
+            self._seq.pop(item_id)
+            self._conn.execute("DELETE FROM review_items WHERE learner_id = ? AND item_id = ?",
+                               (self.learner_id, item_id))
+            self.version += 1
+
+    def due(self, on: Optional[date] = None, limit: int = 20) -> List[ReviewItem]:
+        # Up to `limit` items due on or before `on`, most overdue first.
+        # O(k log n): entries are popped and pushed back, nothing is scanned.
+        cutoff = (on or date.today()).toordinal()
+        with self._lock:
+            taken = []
+            while self._heap and len(taken) < limit and self._heap[0][0] <= cutoff:
+                entry = heapq.heappop(self._heap)
+                if self._seq.get(entry[2]) == entry[1]:
+                    taken.append(entry)
+            for entry in taken:
+                heapq.heappush(self._heap, entry)
+            return [self.items[item_id] for _, _, item_id in taken]
+
+    def count_due(self, on: Optional[date] = None) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM review_items WHERE learner_id = ? AND due <= ?",
+                                  (self.learner_id, (on or date.today()).toordinal())).fetchone()[0]
+
+    def grade(self, item_id: str, quality: int, on: Optional[date] = None) -> ReviewItem:
+        if not 0 <= quality <= 5:
+            raise ValueError(f"Quality must be 0-5, got {quality}")
+        with self._lock:
+            item = self.items[item_id]
+            # Graded on a copy: the deck only changes once the row is committed
+            graded = replace(item)
+            sm2(graded, quality, on or date.today())
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "UPDATE review_items SET ease = ?, interval = ?, repetitions = ?, lapses = ?, due = ? "
+                    "WHERE learner_id = ? AND item_id = ?",
+                    (round(graded.ease * 1000), graded.interval, graded.repetitions, graded.lapses,
+                     graded.due.toordinal(), self.learner_id, item_id)
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            item.ease, item.interval, item.repetitions = graded.ease, graded.interval, graded.repetitions
+            item.lapses, item.due = graded.lapses, graded.due
+            self._push(item)
+            self.version += 1
+            return item
+
+    def close(self):
+        self._conn.close()
@@ -1,13 +1,34 @@
 import datetime
-from typing import List, Dict
-from models import UserProfile, DailySchedule, StudyTask
-import math
+import random
+from typing import List, Dict, Optional, Tuple, Union
+from models import UserProfile, DailySchedule, StudyTask, TimetableDiff
+from catalog import Catalog, default_catalog, normalize_style
+from timetable import CompressedTimetable, DayTemplate, LazyTimetable, TaskTemplate, day_rng, merge_day, task_id
+from allocator import allocate_week
+from slots import Slot, WeeklyAvailability
+from instrumentation import timed
+from events import CompletionStats, DecayedCounts, decay_weight
+from serialization import profile_key
 
 class IELTSScheduler:
-    def __init__(self, profile: UserProfile):
+    def __init__(self, profile: UserProfile, catalog: Optional[Catalog] = None, seed: Optional[int] = None):
         self.profile = profile
+        self.catalog = catalog or default_catalog()
+        self.learning_style = normalize_style(profile.learning_style)
+        # Without an explicit seed the profile is the seed, so the same
+        # profile always yields the same plan
+        self.seed = seed if seed is not None else int(profile_key(profile)[:8], 16)
+        self.rng = random.Random(self.seed)
         self.skills = ['Listening', 'Reading', 'Writing', 'Speaking']
         self.skill_weights = self._calculate_skill_weights()
+        # Performance feedback scales these, never the current weights, so
+        # recalculating twice gives the same plan
+        self.base_weights = dict(self.skill_weights)
+        # Band per hour for each skill, fitted from the learner's results
+        # (see forecast.py); the fixed rate below applies until then
+        self.learning_rates: Optional[Dict[str, float]] = None
+        self.availability = WeeklyAvailability(profile.availability)
+        self._week_plans: Dict[tuple, List[List[Tuple[str, float, Optional[Slot], int]]]] = {}
 
     def _calculate_skill_weights(self) -> Dict[str, float]:
         gaps = {
@@ -19,6 +40,7 @@ class IELTSScheduler:
             return {skill: 0.25 for skill in self.skills}
         return {skill: gaps[skill] / total_gap for skill in self.skills}
 
+    @timed('scheduler.generate_timetable')
     def generate_timetable(self, completed_tasks: List[StudyTask] = None) -> List[DailySchedule]:
         today = datetime.date.today()
         exam_date = self.profile.exam_date
@@ -36,105 +58,193 @@ class IELTSScheduler:
         timetable = []
         for day_idx in range(total_days):
             current_date = today + datetime.timedelta(days=day_idx)
-            weekday_name = current_date.strftime('%A')
-            
-            daily_schedule = DailySchedule(date=current_date)
-            
-            # Buffer Day (Review) every 7 days (End of each week)
-            if (day_idx + 1) % 7 == 0:
-                daily_schedule.is_buffer_day = True
-                
-                # Mock Test every 14 days (End of even weeks)
-                if (day_idx + 1) % 14 == 0:
-                    desc, link = self._get_task_and_resource("Mock Test")
-                    guide = self._get_study_guide("Mock Test", 6.0)
-                    daily_schedule.tasks.append(StudyTask(
-                        id=f"mock-{day_idx}",
-                        skill="Mock Test",
-                        description=desc,
-                        duration_hours=3.5,
-                        resource_link=link,
-                        study_guide=guide
-                    ))
-                else:
-                    desc, link = self._get_task_and_resource("Spaced Repetition")
-                    guide = self._get_study_guide("Review", 6.0)
-                    daily_schedule.tasks.append(StudyTask(
-                        id=f"review-{day_idx}",
-                        skill="Review",
-                        description=desc,
-                        duration_hours=2.0,
-                        resource_link=link,
-                        study_guide=guide
-                    ))
-            else:
-                available_hours = self._get_available_hours(weekday_name)
-                if available_hours > 0:
-                    daily_schedule.tasks = self._assign_tasks(current_date, available_hours, day_idx)
-            
-            timetable.append(daily_schedule)
+            timetable.append(self._build_day(day_idx, current_date))
         
         return timetable
 
-    def _assign_tasks(self, day: datetime.date, total_hours: float, day_idx: int) -> List[StudyTask]:
-        tasks = []
-        
-        # For 8-week plan, we rotate focus skills to ensure all 4 skills are covered properly
-        # but prioritized by weights.
-        # Day rotation: 
-        # Mon: L/R, Tue: W/S, Wed: L/R, Thu: W/S, Fri: L/R, Sat: W/S
-        # This ensures balanced coverage across all 4 skills within a week.
-        
-        rotation_map = {
-            0: ['Listening', 'Reading'], # Monday
-            1: ['Writing', 'Speaking'],   # Tuesday
-            2: ['Listening', 'Reading'], # Wednesday
-            3: ['Writing', 'Speaking'],   # Thursday
-            4: ['Listening', 'Reading'], # Friday
-            5: ['Writing', 'Speaking'],   # Saturday
-            6: ['Listening', 'Reading', 'Writing', 'Speaking'] # Sunday (if not buffer)
-        }
-        
-        weekday_idx = day.weekday() # 0 is Monday
-        active_skills = rotation_map.get(weekday_idx, self.skills)
-        
-        # Calculate weights only for active skills of the day
-        active_weights = {s: self.skill_weights[s] for s in active_skills}
-        total_active_weight = sum(active_weights.values())
-        
-        if total_active_weight > 0:
-            normalized_weights = {s: active_weights[s] / total_active_weight for s in active_skills}
-        else:
-            normalized_weights = {s: 1.0/len(active_skills) for s in active_skills}
+    @timed('scheduler.generate_lazy_timetable')
+    def generate_lazy_timetable(self, completed_tasks: List[StudyTask] = None,
+                                completed_at: Optional[Dict[str, datetime.datetime]] = None) -> LazyTimetable:
+        # Same plan as generate_timetable(), but weeks are only built when shown
+        today = datetime.date.today()
+        total_days = max(56, (self.profile.exam_date - today).days)
+        if completed_tasks:
+            self._adjust_weights_based_on_performance(completed_tasks)
+        return LazyTimetable(self, today, total_days, completed_at)
+
+    @timed('scheduler.generate_compressed_timetable')
+    def generate_compressed_timetable(self, completed_tasks: List[StudyTask] = None,
+                                      completed_at: Optional[Dict[str, datetime.datetime]] = None) -> CompressedTimetable:
+        # Same plan structure as generate_timetable(), stored as one 14-day
+        # template; days are expanded when shown
+        today = datetime.date.today()
+        total_days = max(56, (self.profile.exam_date - today).days)
+        if completed_tasks:
+            self._adjust_weights_based_on_performance(completed_tasks)
+        return CompressedTimetable(self, today, total_days, completed_at)
+
+    @timed('scheduler.regenerate_from')
+    def regenerate_from(self, timetable: Union[List[DailySchedule], LazyTimetable, CompressedTimetable],
+                        from_date: Optional[datetime.date] = None,
+                        completed_tasks: Union[List[StudyTask], CompletionStats, None] = None
+                        ) -> Tuple[Union[List[DailySchedule], LazyTimetable, CompressedTimetable], TimetableDiff]:
+        # Rebuild only the days on or after from_date (default: today). Earlier
+        # days are returned untouched, and day indices stay anchored to the
+        # first day of the existing plan so buffer/mock days do not shift.
+        if isinstance(timetable, (LazyTimetable, CompressedTimetable)):
+            from_date = from_date or datetime.date.today()
+            if isinstance(completed_tasks, CompletionStats):
+                # Aggregates only: completion state stays what the plan already holds
+                due = self._recent_due(timetable, from_date, completed_tasks.recent)
+                self._adjust_weights_based_on_performance(completed_tasks, due, from_date)
+                return timetable.rebase(self, from_date)
+            if completed_tasks:
+                self._adjust_weights_based_on_performance(completed_tasks)
+            completed_at = None if completed_tasks is None else {t.id: t.completed_at for t in completed_tasks}
+            return timetable.rebase(self, from_date, completed_at)
+
+        if not timetable:
+            new_timetable = self.generate_timetable(completed_tasks)
+            return new_timetable, TimetableDiff(changed=[d.date for d in new_timetable])
+
+        anchor = timetable[0].date
+        from_date = max(from_date or datetime.date.today(), anchor)
+        total_days = max(56, (self.profile.exam_date - anchor).days)
+
+        if isinstance(completed_tasks, CompletionStats):
+            due = self._recent_due(timetable, from_date, completed_tasks.recent)
+            self._adjust_weights_based_on_performance(completed_tasks, due, from_date)
+        elif completed_tasks:
+            self._adjust_weights_based_on_performance(completed_tasks)
 
-        for skill in active_skills:
-            skill_hours = total_hours * normalized_weights[skill]
-            if skill_hours >= 0.5:
-                desc, link = self._get_task_and_resource(skill)
-                current_score = self.profile.current_scores.get(skill, 5.0)
-                guide = self._get_study_guide(skill, current_score)
-                tasks.append(StudyTask(
-                    id=f"{skill}-{day.isoformat()}",
-                    skill=skill,
-                    description=desc,
-                    duration_hours=round(skill_hours, 1),
-                    predicted_impact=self._calculate_impact(skill, skill_hours),
-                    resource_link=link,
-                    study_guide=guide
-                ))
-        return tasks
+        new_timetable = [day for day in timetable if day.date < from_date]
+        old_days = {day.date: day for day in timetable if day.date >= from_date}
+        diff = TimetableDiff()
 
-    def _adjust_weights_based_on_performance(self, completed_tasks: List[StudyTask]):
+        for day_idx in range((from_date - anchor).days, total_days):
+            current_date = anchor + datetime.timedelta(days=day_idx)
+            day, changed = merge_day(old_days.pop(current_date, None), self._build_day(day_idx, current_date))
+            new_timetable.append(day)
+            if changed:
+                diff.changed.append(current_date)
+
+        diff.removed = sorted(old_days)
+        return new_timetable, diff
+
+    def _build_day(self, day_idx: int, current_date: datetime.date) -> DailySchedule:
+        return self._expand_day(self._day_template(day_idx, current_date), day_idx, current_date,
+                                day_rng(self.seed, day_idx))
+
+    def _day_template(self, day_idx: int, current_date: datetime.date) -> DayTemplate:
+        # Structure of a day: which tasks, how long, when. It depends only on
+        # day_idx % 14 (buffer/mock rhythm) and the weekday, so a plan repeats
+        # every 14 days.
+        weekday_name = current_date.strftime('%A')
+
+        # Buffer Day (Review) every 7 days (End of each week)
+        if (day_idx + 1) % 7 == 0:
+            # Mock Test every 14 days (End of even weeks)
+            skill, hours = ("Mock Test", 3.5) if (day_idx + 1) % 14 == 0 else ("Review", 2.0)
+            # Review and mock-test sessions take the day's first window that fits
+            slot = self.availability.place_session(weekday_name, hours)
+            return DayTemplate(is_buffer_day=True, tasks=(TaskTemplate(skill, hours, slot),))
+
+        return DayTemplate(is_buffer_day=False, tasks=tuple(
+            TaskTemplate(skill, round(skill_hours, 2), slot, part, self._calculate_impact(skill, skill_hours))
+            for skill, skill_hours, slot, part in self._week_plan(day_idx, current_date)[day_idx % 7]
+        ))
+
+    def _expand_day(self, template: DayTemplate, day_idx: int, current_date: datetime.date,
+                    rng: Optional[random.Random] = None) -> DailySchedule:
+        # Fills in ids and the texts picked from the catalog
+        daily_schedule = DailySchedule(date=current_date, is_buffer_day=template.is_buffer_day)
+        for t in template.tasks:
+            if t.skill == "Mock Test":
+                desc, link = self._get_task_and_resource("Mock Test", rng)
+                guide = self._get_study_guide("Mock Test", 6.0, rng)
+            elif t.skill == "Review":
+                desc, link = self._get_task_and_resource("Spaced Repetition", rng)
+                guide = self._get_study_guide("Review", 6.0, rng)
+            else:
+                desc, link = self._get_task_and_resource(t.skill, rng)
+                guide = self._get_study_guide(t.skill, self.profile.current_scores.get(t.skill, 5.0), rng)
+            daily_schedule.tasks.append(StudyTask(
+                id=task_id(t.skill, current_date, day_idx, t.part),
+                skill=t.skill,
+                description=desc,
+                duration_hours=t.hours,
+                predicted_impact=t.impact,
+                resource_link=link,
+                study_guide=guide,
+                start_hour=t.slot[0] if t.slot else None,
+                end_hour=t.slot[1] if t.slot else None
+            ))
+        return daily_schedule
+
+    def _week_plan(self, day_idx: int, current_date: datetime.date) -> List[List[Tuple[str, float, Optional[Slot], int]]]:
+        # Every 7-day window of the plan has the same availability and buffer
+        # day, so the allocation and clock times are solved once per anchor
+        # and weight set. Entries are (skill, hours, slot, part): a skill's
+        # time that spans two availability windows becomes one part per window.
+        anchor = current_date - datetime.timedelta(days=day_idx)
+        key = (anchor.weekday(), tuple(self.skill_weights[s] for s in self.skills))
+        plan = self._week_plans.get(key)
+        if plan is None:
+            weekdays = [(anchor + datetime.timedelta(days=offset)).strftime('%A') for offset in range(7)]
+            day_hours = [0.0 if offset == 6 else self._get_available_hours(weekdays[offset]) for offset in range(7)]
+            plan = []
+            for weekday, segments in zip(weekdays, allocate_week(day_hours, self.skill_weights, self.skills)):
+                placed = self.availability.place(weekday, [hours for _, hours in segments])
+                entries = []
+                for (skill, hours), pieces in zip(segments, placed):
+                    if pieces is None:
+                        entries.append((skill, hours, None, 0))
+                    else:
+                        entries.extend((skill, end - start, (start, end), part)
+                                       for part, (start, end) in enumerate(pieces))
+                plan.append(entries)
+            self._week_plans[key] = plan
+        return plan
+
+    def _recent_due(self, timetable: Union[List[DailySchedule], LazyTimetable, CompressedTimetable],
+                    today: datetime.date, recent: DecayedCounts) -> Dict[str, float]:
+        # Tasks per skill that were due in the window before today, weighted
+        # like the completions in `recent`. A compressed plan is read from its
+        # templates, so this is O(window) whatever the plan's length.
+        start = timetable[0].date if isinstance(timetable, list) else timetable.start
+        stop = min((today - start).days, len(timetable))
+        due: Dict[str, float] = {}
+        for day_idx in range(max(0, stop - recent.window_days), stop):
+            if isinstance(timetable, CompressedTimetable) and day_idx not in timetable.overrides:
+                tasks = timetable.template(day_idx).tasks
+            else:
+                tasks = timetable[day_idx].tasks
+            weight = decay_weight(start + datetime.timedelta(days=day_idx), today, recent.half_life_days)
+            for task in tasks:
+                due[task.skill] = due.get(task.skill, 0.0) + weight
+        return due
+
+    @timed('scheduler.adjust_weights')
+    def _adjust_weights_based_on_performance(self, completed_tasks: Union[List[StudyTask], CompletionStats],
+                                             scheduled: Optional[Dict[str, float]] = None,
+                                             today: Optional[datetime.date] = None):
         # Analyze performance: which skills are being completed and which are not
-        skill_counts = {skill: 0 for skill in self.skills}
-        completed_counts = {skill: 0 for skill in self.skills}
-        
-        # We look at tasks in the last 7 days for current trend
-        for task in completed_tasks:
-            if task.skill in skill_counts:
-                skill_counts[task.skill] += 1
-                if task.is_completed:
-                    completed_counts[task.skill] += 1
+        if isinstance(completed_tasks, CompletionStats):
+            # O(window): recent completions are kept decayed by the event stream,
+            # `scheduled` is what was due over the same window, weighted alike
+            recent = completed_tasks.recent.counts(today)
+            completed_counts = {skill: recent.get(skill, 0.0) for skill in self.skills}
+            skill_counts = {skill: max(completed_counts[skill], (scheduled or {}).get(skill, 0.0)) for skill in self.skills}
+        else:
+            skill_counts = {skill: 0 for skill in self.skills}
+            completed_counts = {skill: 0 for skill in self.skills}
+
+            # Every task given counts, done or not
+            for task in completed_tasks:
+                if task.skill in skill_counts:
+                    skill_counts[task.skill] += 1
+                    if task.is_completed:
+                        completed_counts[task.skill] += 1
         
         # Calculate "struggle factor" - higher if tasks are missed
         struggle_factors = {}
@@ -147,159 +257,25 @@ class IELTSScheduler:
                 struggle_factors[skill] = 1.0
                 
         # Apply struggle factors to original weights
-        new_weights = {skill: self.skill_weights[skill] * struggle_factors[skill] for skill in self.skills}
+        new_weights = {skill: self.base_weights[skill] * struggle_factors[skill] for skill in self.skills}
         total_weight = sum(new_weights.values())
         if total_weight > 0:
             self.skill_weights = {skill: new_weights[skill] / total_weight for skill in self.skills}
 
     def _get_available_hours(self, weekday: str) -> float:
-        times = self.profile.availability.get(weekday, [])
-        if not isinstance(times, list):
-            # If it's stored as a single number (from the current UI slider)
-            return float(times)
-        
-        if not times:
-            return 0.0
-        # Simple duration calculation (assuming pairs of start/end hours)
-        total = 0
-        for i in range(0, len(times), 2):
-            if i + 1 < len(times):
-                total += (times[i+1] - times[i])
-        return float(total)
+        # Parsed once in WeeklyAvailability; overlapping windows count once
+        return self.availability.hours_on(weekday)
 
-    def _get_study_guide(self, skill: str, current_score: float) -> str:
-        import random
-        
-        # Define level-based guides
-        if current_score < 5.5:
-            level = "Beginner"
-            guides = {
-                'Listening': [
-                    "Tập trung nghe các đoạn hội thoại ngắn và chép lại những từ khóa chính (danh từ, con số).",
-                    "Hãy làm quen với các âm cơ bản và bảng chữ cái tiếng Anh để tránh sai sót ở Section 1.",
-                    "Đừng quá lo lắng nếu không hiểu hết, hãy cố gắng nắm bắt ý chính của cuộc hội thoại."
-                ],
-                'Reading': [
-                    "Tập trung vào việc xây dựng vốn từ vựng cơ bản. Đọc các đoạn văn ngắn và gạch chân từ mới.",
-                    "Học cách tìm các thông tin rõ ràng như tên riêng, ngày tháng trong bài đọc.",
-                    "Hãy đọc kỹ câu hỏi trước khi tìm câu trả lời trong bài để tiết kiệm thời gian."
-                ],
-                'Writing': [
-                    "Tập viết các câu đơn đúng ngữ pháp trước khi học các cấu trúc phức tạp.",
-                    "Học cách sử dụng các từ nối cơ bản như: and, but, because, so.",
-                    "Hãy đảm bảo bạn hiểu rõ yêu cầu của đề bài và trả lời đúng trọng tâm."
-                ],
-                'Speaking': [
-                    "Hãy tự tin nói ra những gì bạn nghĩ, đừng quá chú trọng vào ngữ pháp ở giai đoạn này.",
-                    "Luyện tập giới thiệu bản thân và các chủ đề quen thuộc như gia đình, sở thích.",
-                    "Hãy cố gắng nói to, rõ ràng để cải thiện sự tự tin khi giao tiếp."
-                ]
-            }
-        elif current_score < 7.0:
-            level = "Intermediate"
-            guides = {
-                'Listening': [
-                    "Luyện tập nghe và nhận diện các từ đồng nghĩa (Synonyms) trong câu hỏi.",
-                    "Tập trung vào Section 3 với các cuộc thảo luận học thuật có nhiều ý kiến trái chiều.",
-                    "Hãy chú ý đến các 'bẫy' (Distractors) mà người nói thường dùng để làm nhiễu thông tin."
-                ],
-                'Reading': [
-                    "Rèn luyện kỹ thuật Skimming và Scanning để xử lý bài đọc dài trong thời gian ngắn.",
-                    "Tập trung vào dạng bài Matching Headings và True/False/Not Given.",
-                    "Học cách suy luận nghĩa của từ mới dựa vào ngữ cảnh xung quanh đoạn văn."
-                ],
-                'Writing': [
-                    "Sử dụng đa dạng các cấu trúc câu phức và câu ghép để nâng điểm ngữ pháp.",
-                    "Tập trung vào tính mạch lạc (Coherence) bằng cách sử dụng các từ nối nâng cao.",
-                    "Hãy dành ít nhất 5 phút để lập dàn ý chi tiết trước khi bắt đầu viết bài."
-                ],
-                'Speaking': [
-                    "Mở rộng câu trả lời bằng cách đưa ra lý do và ví dụ cụ thể cho mỗi ý điểm.",
-                    "Luyện tập sử dụng các cụm từ (Collocations) để cách nói tự nhiên hơn.",
-                    "Hãy chú ý đến ngữ điệu và trọng âm để bài nói có sức thuyết phục hơn."
-                ]
-            }
-        else:
-            level = "Advanced"
-            guides = {
-                'Listening': [
-                    "Thử thách bản thân với Section 4 - bài giảng học thuật không có thời gian nghỉ.",
-                    "Luyện nghe các accent khó (Anh-Úc, Ấn Độ) để tăng khả năng thích nghi.",
-                    "Tập trung vào việc ghi chú (Note-taking) nhanh và chính xác các ý chính."
-                ],
-                'Reading': [
-                    "Đọc các bài báo khoa học hoặc kinh tế khó để tăng tốc độ xử lý thông tin phức tạp.",
-                    "Tập trung vào việc hiểu thái độ và mục đích của tác giả trong các bài đọc khó.",
-                    "Hãy rèn luyện khả năng quản lý thời gian cực tốt để hoàn thành bài trước 5-10 phút."
-                ],
-                'Writing': [
-                    "Sử dụng từ vựng chuyên sâu (Less common vocabulary) một cách chính xác và tự nhiên.",
-                    "Phân tích kỹ các đề bài khó và đưa ra lập luận đa chiều, sắc bén.",
-                    "Kiểm soát chặt chẽ các lỗi nhỏ về dấu câu và mạo từ để đạt điểm tuyệt đối."
-                ],
-                'Speaking': [
-                    "Sử dụng các cấu trúc ngữ pháp bậc cao (Câu điều kiện loại 3, đảo ngữ) một cách nhuần nhuyễn.",
-                    "Luyện tập thảo luận các vấn đề trừu tượng ở Part 3 với tư duy phản biện.",
-                    "Hãy tập trung vào sự trôi chảy và mạch lạc tuyệt đối trong suốt buổi thi."
-                ]
-            }
-            
-        # Common guides for Review and Mock Test
-        common_guides = {
-            'Review': [
-                "Ôn tập lại các lỗi sai phổ biến bạn đã mắc phải trong tuần qua.",
-                "Sử dụng Flashcards để củng cố các từ vựng mới học được.",
-                "Hãy tự kiểm tra lại các cấu trúc ngữ pháp mà bạn cảm thấy chưa tự tin."
-            ],
-            'Mock Test': [
-                "Làm bài trong không gian yên tĩnh và tuân thủ nghiêm ngặt thời gian thi thật.",
-                "Đừng bỏ trống bất kỳ câu hỏi nào, hãy dự đoán nếu bạn không chắc chắn.",
-                "Sau khi thi xong, hãy dành thời gian phân tích kỹ lý do tại sao bạn làm sai."
-            ]
-        }
+    def _get_study_guide(self, skill: str, current_score: float, rng: Optional[random.Random] = None) -> str:
+        return self.catalog.pick_guide(skill, current_score, self.learning_style, rng or self.rng)
 
-        options = guides.get(skill, common_guides.get(skill, ["Hãy tập trung học tập thật tốt!"]))
-        return f"[{level}] {random.choice(options)}"
-
-    def _get_task_and_resource(self, skill: str) -> (str, str):
-        # Database of tasks and curated links
-        resources = {
-            'Listening': [
-                ("Luyện Listening Section 1 & 2 (Cambridge 18)", "https://ieltsonlinetests.com/ielts-exam-library"),
-                ("Nghe chép chính tả (Dictation) bài nói TED-Ed", "https://www.ted.com/watch/ted-ed"),
-                ("Luyện kỹ năng Note-taking cho Section 3", "https://www.ieltsbuddy.com/ielts-listening-test.html"),
-                ("Làm Full Test Listening & phân tích lỗi sai", "https://mini-ielts.com/listening")
-            ],
-            'Reading': [
-                ("Đọc Academic Passage 1 & Skimming kỹ thuật", "https://www.ielts-exam.net/ielts_reading/"),
-                ("Luyện dạng bài Matching Headings (Cambridge 17)", "https://ieltsmaterial.com/reading/"),
-                ("Học từ vựng theo chủ đề Education/Environment", "https://www.vocabulary.com/lists/ielts"),
-                ("Làm Full Test Reading trong 60 phút", "https://mini-ielts.com/reading")
-            ],
-            'Writing': [
-                ("Phân tích biểu đồ Task 1 (Line Graph/Bar Chart)", "https://ielts-simon.com/ielts-help-term-course/ielts-writing-task-1/"),
-                ("Viết Body Paragraph cho Task 2 chủ đề Technology", "https://ieltsadvantage.com/writing-task-2/"),
-                ("Học cấu trúc câu phức & từ nối (Cohesion)", "https://www.ieltsbuddy.com/ielts-writing-connectors.html"),
-                ("Luyện viết Full Task 2 & tự chấm theo tiêu chí", "https://writeandimprove.com/")
-            ],
-            'Speaking': [
-                ("Luyện Part 1 các chủ đề quen thuộc (Work/Study)", "https://ieltsliz.com/ielts-speaking-part-1-topics-questions/"),
-                ("Nói Part 2 sử dụng kỹ thuật Mind-map", "https://www.ieltsbuddy.com/ielts-speaking-part-2.html"),
-                ("Luyện Part 3: Giải thích & đưa ra ví dụ", "https://ieltsadvantage.com/ielts-speaking-part-3-guide/"),
-                ("Record & nghe lại để sửa phát âm/ngữ điệu", "https://otter.ai/")
-            ],
-            'Spaced Repetition': [
-                ("Ôn tập lại kiến thức đã học trong tuần qua", "https://ankiweb.net/about")
-            ],
-            'Mock Test': [
-                ("Làm bài Full Mock Test để đánh giá lại năng lực", "https://ielts.idp.com/vietnam/prepare/free-practice-tests")
-            ]
-        }
-        import random
-        options = resources.get(skill, [("Luyện tập tổng hợp", "https://www.ielts.org/")])
-        return random.choice(options)
+    def _get_task_and_resource(self, skill: str, rng: Optional[random.Random] = None) -> (str, str):
+        current_score = self.profile.current_scores.get(skill, 6.0)
+        return self.catalog.pick_resource(skill, current_score, self.learning_style, rng or self.rng)
 
     def _calculate_impact(self, skill: str, hours: float) -> float:
+        if self.learning_rates and skill in self.learning_rates:
+            return hours * self.learning_rates[skill]
         # Simple mathematical model: 100 hours of focused study ~ +1.0 band score
         # Adjusted by focus level (1-5)
         base_rate = 0.01  # +0.01 band score per hour
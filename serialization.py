@@ -0,0 +1,203 @@
+import hashlib
+import json
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional
+
+from models import UserProfile, StudyTask, DailySchedule, TimetableDiff
+
+# Compact JSON form of a timetable. Strings that repeat across tasks
+# (skills, descriptions, links, guides) are stored once in "s" and
+# referenced by position; each task is a positional array:
+#   [id, skill, description, hours, impact, link, guide, done, completed_at, start, end]
+# Version 1 rows stop after completed_at.
+FORMAT_VERSION = 2
+READABLE_VERSIONS = (1, 2)
+# Every profile scores all four skills
+PROFILE_SKILLS = ('Listening', 'Reading', 'Writing', 'Speaking')
+
+
+class _StringTable:
+    def __init__(self, strings: Optional[List[str]] = None):
+        self.strings = strings if strings is not None else []
+        self._index = {s: i for i, s in enumerate(self.strings)}
+
+    def ref(self, value: Optional[str]) -> Optional[int]:
+        if value is None:
+            return None
+        idx = self._index.get(value)
+        if idx is None:
+            idx = self._index[value] = len(self.strings)
+            self.strings.append(value)
+        return idx
+
+    def get(self, idx: Optional[int]) -> Optional[str]:
+        return None if idx is None else self.strings[idx]
+
+
+def _task_row(task: StudyTask, table: _StringTable) -> list:
+    return [
+        task.id,
+        table.ref(task.skill),
+        table.ref(task.description),
+        task.duration_hours,
+        task.predicted_impact,
+        table.ref(task.resource_link),
+        table.ref(task.study_guide),
+        int(task.is_completed),
+        task.completed_at.isoformat() if task.completed_at else None,
+        task.start_hour,
+        task.end_hour,
+    ]
+
+
+def _task_from_row(row: list, table: _StringTable) -> StudyTask:
+    task_id, skill, description, hours, impact, link, guide, done, completed_at = row[:9]
+    start, end = row[9:11] if len(row) > 9 else (None, None)
+    return StudyTask(
+        id=task_id,
+        skill=table.get(skill),
+        description=table.get(description),
+        duration_hours=float(hours),
+        is_completed=bool(done),
+        completed_at=datetime.fromisoformat(completed_at) if completed_at else None,
+        predicted_impact=float(impact),
+        resource_link=table.get(link),
+        study_guide=table.get(guide),
+        start_hour=start,
+        end_hour=end
+    )
+
+
+def _dump_days(timetable: Iterable[DailySchedule], table: _StringTable) -> list:
+    return [
+        [day.date.isoformat(), int(day.is_buffer_day), [_task_row(t, table) for t in day.tasks]]
+        for day in timetable
+    ]
+
+
+def _load_days(days: list, table: _StringTable) -> List[DailySchedule]:
+    return [
+        DailySchedule(date=date.fromisoformat(day), tasks=[_task_from_row(row, table) for row in tasks],
+                      is_buffer_day=bool(buffer))
+        for day, buffer, tasks in days
+    ]
+
+
+def dump_timetable(timetable: Iterable[DailySchedule]) -> Dict:
+    table = _StringTable()
+    days = _dump_days(timetable, table)
+    return {'v': FORMAT_VERSION, 's': table.strings, 'days': days}
+
+
+def load_timetable(data: Dict) -> List[DailySchedule]:
+    if not isinstance(data, dict):
+        raise ValueError("Invalid timetable: expected an object")
+    if data.get('v') not in READABLE_VERSIONS:
+        raise ValueError(f"Unsupported timetable format: {data.get('v')!r}")
+    try:
+        return _load_days(data['days'], _StringTable(data['s']))
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid timetable: {e!r}") from e
+
+
+def dump_timetables(timetables: Iterable[Iterable[DailySchedule]]) -> Dict:
+    # Several plans sharing one string table: catalog texts repeat across
+    # learners, so each is stored once per batch rather than once per plan
+    table = _StringTable()
+    plans = [_dump_days(timetable, table) for timetable in timetables]
+    return {'v': FORMAT_VERSION, 's': table.strings, 'plans': plans}
+
+
+def load_timetables(data: Dict) -> List[List[DailySchedule]]:
+    table = _StringTable(data['s'])
+    return [_load_days(days, table) for days in data['plans']]
+
+
+def dump_tasks(tasks: Iterable[StudyTask]) -> Dict:
+    table = _StringTable()
+    rows = [_task_row(t, table) for t in tasks]
+    return {'v': FORMAT_VERSION, 's': table.strings, 'tasks': rows}
+
+
+def load_tasks(data: Dict) -> List[StudyTask]:
+    try:
+        table = _StringTable(data['s'])
+        return [_task_from_row(row, table) for row in data['tasks']]
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid tasks: {e!r}") from e
+
+
+def dump_diff(diff: TimetableDiff) -> Dict:
+    return {'changed': [d.isoformat() for d in diff.changed], 'removed': [d.isoformat() for d in diff.removed]}
+
+
+def dump_profile(profile: UserProfile) -> Dict:
+    return {
+        'current_scores': profile.current_scores,
+        'target_scores': profile.target_scores,
+        'exam_date': profile.exam_date.isoformat(),
+        'availability': profile.availability,
+        'focus_level': profile.focus_level,
+        'learning_style': profile.learning_style,
+    }
+
+
+def profile_key(profile: UserProfile) -> str:
+    # Stable across processes and reruns: same inputs, same key
+    canonical = {
+        'current_scores': sorted(profile.current_scores.items()),
+        'target_scores': sorted(profile.target_scores.items()),
+        'exam_date': profile.exam_date.isoformat(),
+        'availability': sorted(profile.availability.items()),
+        'focus_level': profile.focus_level,
+        'learning_style': profile.learning_style,
+    }
+    payload = json.dumps(canonical, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _check_availability(availability: Dict):
+    # Per weekday: hours as a number, or [start, end, start, end, ...] clock
+    # hours with every window ending after it starts
+    if not isinstance(availability, dict):
+        raise ValueError("availability must be an object")
+    for day, value in availability.items():
+        if _is_number(value):
+            if value < 0:
+                raise ValueError(f"availability of {day} is negative")
+            continue
+        if not isinstance(value, list) or len(value) % 2 or not all(_is_number(v) for v in value):
+            raise ValueError(f"availability of {day} must be a number or [start, end, ...] hours")
+        for start, end in zip(value[::2], value[1::2]):
+            if not 0 <= start < end <= 24:
+                raise ValueError(f"availability of {day} has an invalid window {start}-{end}")
+
+
+def load_profile(data: Dict) -> UserProfile:
+    try:
+        for scores in (data['current_scores'], data['target_scores']):
+            missing = [skill for skill in PROFILE_SKILLS if skill not in scores]
+            if missing:
+                raise ValueError(f"no score for {', '.join(missing)}")
+        availability = data.get('availability', {})
+        _check_availability(availability)
+        focus_level = data.get('focus_level', 3)
+        if not isinstance(focus_level, int) or isinstance(focus_level, bool) or not 1 <= focus_level <= 5:
+            raise ValueError("focus_level must be an integer from 1 to 5")
+        learning_style = data.get('learning_style', '')
+        if not isinstance(learning_style, str):
+            raise ValueError("learning_style must be a string")
+        return UserProfile(
+            current_scores={k: float(v) for k, v in data['current_scores'].items()},
+            target_scores={k: float(v) for k, v in data['target_scores'].items()},
+            exam_date=date.fromisoformat(data['exam_date']),
+            availability=availability,
+            focus_level=focus_level,
+            learning_style=learning_style
+        )
+    except (KeyError, AttributeError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid profile: {e}") from e
@@ -0,0 +1,101 @@
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+# Clock times are hours of the day as floats: 18.5 is 18:30.
+Slot = Tuple[float, float]
+
+EPS = 1e-9
+
+
+def parse_windows(value: Union[Sequence[float], float, int, None]) -> List[Slot]:
+    # [start, end, start, end, ...] -> sorted, merged (start, end) windows.
+    # A bare number is a duration with no clock time and yields no windows.
+    if not isinstance(value, (list, tuple)):
+        return []
+    pairs = sorted(
+        (float(value[i]), float(value[i + 1]))
+        for i in range(0, len(value) - 1, 2)
+        if value[i + 1] > value[i]
+    )
+    windows: List[Slot] = []
+    for start, end in pairs:
+        if windows and start <= windows[-1][1]:
+            windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+        else:
+            windows.append((start, end))
+    return windows
+
+
+def format_clock(hour: float) -> str:
+    minutes = int(round(hour * 60))
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class WeeklyAvailability:
+    # UserProfile.availability parsed once per profile. Per weekday it keeps
+    # the sorted windows and the prefix sums of their lengths, so the window
+    # holding a point `offset` hours into the day's study time is found with
+    # one bisect, however many windows the day has.
+    def __init__(self, availability: Dict[str, Union[List[float], float]]):
+        self.windows: Dict[str, List[Slot]] = {}
+        self.hours: Dict[str, float] = {}
+        self._cumulative: Dict[str, List[float]] = {}
+        for weekday, value in availability.items():
+            windows = parse_windows(value)
+            if windows:
+                cumulative = [0.0]
+                for start, end in windows:
+                    cumulative.append(cumulative[-1] + end - start)
+                self.windows[weekday] = windows
+                self._cumulative[weekday] = cumulative
+                self.hours[weekday] = cumulative[-1]
+            elif not isinstance(value, (list, tuple)):
+                # Legacy single-number availability: hours only
+                self.hours[weekday] = float(value or 0.0)
+            else:
+                self.hours[weekday] = 0.0
+
+    def hours_on(self, weekday: str) -> float:
+        return self.hours.get(weekday, 0.0)
+
+    def place(self, weekday: str, durations: Sequence[float]) -> List[Optional[List[Slot]]]:
+        # Back-to-back sessions for the given durations, filling the day's
+        # windows from the earliest. A duration that does not fit in what is
+        # left of a window is split across the following windows; time past
+        # the last window runs on after it. Days without clock windows get
+        # None for every duration.
+        if weekday not in self.windows:
+            return [None] * len(durations)
+        windows = self.windows[weekday]
+        cumulative = self._cumulative[weekday]
+        placed: List[Optional[List[Slot]]] = []
+        offset = 0.0
+        for hours in durations:
+            end_offset = offset + hours
+            i = min(bisect_right(cumulative, offset + EPS) - 1, len(windows))
+            pieces: List[Slot] = []
+            while offset < end_offset - EPS:
+                if i >= len(windows):
+                    start = windows[-1][1] + offset - cumulative[-1]
+                    pieces.append((start, start + end_offset - offset))
+                    break
+                take = min(end_offset, cumulative[i + 1]) - offset
+                if take > EPS:
+                    start = windows[i][0] + offset - cumulative[i]
+                    pieces.append((start, start + take))
+                    offset += take
+                i += 1
+            offset = end_offset
+            placed.append(pieces)
+        return placed
+
+    def place_session(self, weekday: str, hours: float) -> Optional[Slot]:
+        # One unbroken session: the first window long enough for it,
+        # otherwise the start of the longest window.
+        windows = self.windows.get(weekday)
+        if not windows:
+            return None
+        start = next((s for s, e in windows if e - s >= hours - EPS), None)
+        if start is None:
+            start = max(windows, key=lambda w: w[1] - w[0])[0]
+        return start, start + hours
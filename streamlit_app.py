@@ -2,10 +2,27 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from datetime import date, timedelta, datetime
-from models import UserProfile, StudyTask, DailySchedule
+from models import UserProfile, StudyTask, DailySchedule, LearningLog
 from scheduler import IELTSScheduler
-import io
+from slots import format_clock
+import exports
+from review import GRADES, ReviewDeck
+from events import HALF_LIFE_DAYS, WINDOW_DAYS
+from journal import Journal
+from forecast import fit_history, learner_forecast
+from readiness import learner_input, simulate
+from cache import LRUCache, profile_key, shared_plans
+import instrumentation
+from instrumentation import span
+import hashlib
+import hmac
 import math
+import os
+import threading
+import time
+import uuid
+
+rerun_started = time.perf_counter()
 
 # Page Config
 st.set_page_config(page_title="IELTS iLMS", layout="wide", page_icon="🎓")
@@ -65,13 +82,55 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# Review items shown under each Review task
+REVIEW_BATCH = 10
+
 # Initialize Session State
 if 'profile' not in st.session_state:
     st.session_state.profile = None
 if 'timetable' not in st.session_state:
     st.session_state.timetable = []
-if 'completed_tasks' not in st.session_state:
-    st.session_state.completed_tasks = []
+if 'learning_log' not in st.session_state:
+    # One learner id per browser, kept in the URL so a refresh or restart finds the same history
+    learner_id = st.query_params.get('learner')
+    if not learner_id:
+        learner_id = uuid.uuid4().hex[:12]
+        st.query_params['learner'] = learner_id
+    st.session_state.learning_log = LearningLog(
+        os.environ.get('ILMS_DB_PATH', 'ilms_learning_log.sqlite3'), learner_id,
+        half_life_days=float(os.environ.get('ILMS_FEEDBACK_HALF_LIFE', HALF_LIFE_DAYS)),
+        window_days=int(os.environ.get('ILMS_FEEDBACK_WINDOW', WINDOW_DAYS)))
+learning_log = st.session_state.learning_log
+# Spans recorded on this thread from here on belong to this session
+instrumentation.bind_session(learning_log.learner_id)
+# Pick up completions made in this learner's other sessions
+learning_log.refresh()
+if 'review_deck' not in st.session_state:
+    # Vocabulary and mistakes to review, in the same database as the log
+    st.session_state.review_deck = ReviewDeck(learning_log.path, learning_log.learner_id)
+review_deck = st.session_state.review_deck
+if 'journal' not in st.session_state:
+    # Profile and plan history; a new session picks up where the last one stopped
+    st.session_state.journal = Journal(os.environ.get('ILMS_JOURNAL_DIR', 'ilms_journal'), learning_log.learner_id)
+    if st.session_state.profile is None:
+        restored_profile, restored_timetable = st.session_state.journal.restore()
+        if restored_profile is not None and restored_timetable is not None:
+            st.session_state.profile = restored_profile
+            st.session_state.timetable = restored_timetable
+            st.session_state.timetable_diff = None
+journal = st.session_state.journal
+instrumentation.count_rerun(learning_log.learner_id)
+if 'render_cache' not in st.session_state:
+    # Derived tables and figures, keyed by profile hash and log version
+    st.session_state.render_cache = LRUCache(maxsize=32)
+render_cache = st.session_state.render_cache
+if 'export_cache' not in st.session_state:
+    # Export files are built by download-button callbacks, which Streamlit
+    # runs outside the script thread, so they get a cache and lock of their own
+    st.session_state.export_cache = LRUCache(maxsize=8)
+    st.session_state.export_lock = threading.Lock()
+if 'timetable_diff' not in st.session_state:
+    st.session_state.timetable_diff = None
 
 # Sidebar: Input & Profiling
 st.sidebar.title("🛠 Thiết lập Hồ sơ (Profile)")
@@ -104,13 +163,16 @@ with st.sidebar:
     availability = {}
     for i, day in enumerate(days):
         with st.expander(f"{day}"):
-            # Simple start/end hours
+            # Start/end pairs, as documented on UserProfile.availability
             start_hour = st.slider(f"Giờ bắt đầu ({day})", 0, 24, 18)
             end_hour = st.slider(f"Giờ kết thúc ({day})", 0, 24, 20)
-            if start_hour < end_hour:
-                availability[english_days[i]] = float(end_hour - start_hour)
-            else:
-                availability[english_days[i]] = 0.0
+            windows = [start_hour, end_hour] if start_hour < end_hour else []
+            if st.checkbox(f"Thêm khung giờ thứ hai ({day})", key=f"second-window-{i}"):
+                start_2 = st.slider(f"Giờ bắt đầu 2 ({day})", 0, 24, 8)
+                end_2 = st.slider(f"Giờ kết thúc 2 ({day})", 0, 24, 10)
+                if start_2 < end_2:
+                    windows += [start_2, end_2]
+            availability[english_days[i]] = windows
                 
     st.subheader("4. Cá nhân hóa (Personalize)")
     focus_level = st.select_slider("Mức độ tập trung (Focus Level)", options=[1, 2, 3, 4, 5], value=3, help="1: Thư giãn - 5: Cực kỳ tập trung")
@@ -126,15 +188,25 @@ with st.sidebar:
             learning_style=learning_style
         )
         st.session_state.profile = profile
-        scheduler = IELTSScheduler(profile)
-        st.session_state.timetable = scheduler.generate_timetable()
+        # Weeks are built on demand, so the first render does not depend on the
+        # exam date; learners with the same profile today share one plan
+        st.session_state.timetable = shared_plans.timetable(profile, completed_at=learning_log.completed_at())
+        st.session_state.timetable_diff = None
+        learning_log.record_scores(profile.current_scores)
+        journal.record_profile(profile)
+        journal.record_generate(st.session_state.timetable, st.session_state.timetable.scheduler)
         st.success("Lộ trình đã được tạo thành công!")
         st.rerun()
 
     if st.session_state.profile and st.button("🔄 Cập nhật Lộ trình (Recalculate)"):
         scheduler = IELTSScheduler(st.session_state.profile)
-        st.session_state.timetable = scheduler.generate_timetable(st.session_state.completed_tasks)
-        st.info("Lộ trình đã được tính toán lại dựa trên tiến độ thực tế!")
+        scheduler.learning_rates = fit_history(learning_log.score_history(), learning_log.events(),
+                                               st.session_state.profile.focus_level,
+                                               st.session_state.profile.current_scores).rates()
+        st.session_state.timetable, st.session_state.timetable_diff = scheduler.regenerate_from(
+            st.session_state.timetable, completed_tasks=learning_log.stats)
+        journal.record_rebase(date.today(), scheduler)
+        st.info(f"Lộ trình đã được tính toán lại dựa trên tiến độ thực tế! ({len(st.session_state.timetable_diff.changed)} ngày thay đổi)")
 
 # Main UI
 st.title("🎓 IELTS iLMS: Hệ thống Quản lý Học tập Thông minh")
@@ -168,25 +240,27 @@ if not st.session_state.profile:
             st.markdown("**🛡️ Tránh quá tải**")
             st.write("Cơ chế Buffer Days giúp bạn có thời gian ôn tập và nghỉ ngơi.")
 else:
+    profile_hash = profile_key(st.session_state.profile)
+    completed_tasks = render_cache.get_or_create(('tasks', learning_log.version), learning_log.tasks)
     tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["📅 Lịch Học", "📈 Biểu đồ", "📝 Nhật ký", "📚 Kho Tài Liệu", "ℹ️ Hướng dẫn", "📊 Phân tích"])
     
-    with tab1:
+    with tab1, span('render.tab1', learning_log.learner_id):
         st.header("📅 Lộ trình học tập chi tiết")
         
         # Week selection
         total_days = len(st.session_state.timetable)
         total_weeks = math.ceil(total_days / 7)
         
-        # Group timetable by weeks
-        weeks = {}
-        for i in range(total_weeks):
-            weeks[i+1] = st.session_state.timetable[i*7 : (i+1)*7]
-            
         selected_week = st.selectbox("Chọn tuần học", [f"Tuần {i+1}" for i in range(total_weeks)], index=0)
         week_num = int(selected_week.split(" ")[1])
         
         today = date.today()
-        current_week_days = weeks[week_num]
+        # Only the selected week is expanded from the plan's 14-day template
+        current_week_days = st.session_state.timetable.week(week_num - 1)
+        
+        # Days rebuilt by the last recalculation
+        diff = st.session_state.timetable_diff
+        changed_days = set(diff.changed) if diff else set()
         
         for day in current_week_days:
             # Convert English day names to Vietnamese for display
@@ -198,7 +272,7 @@ else:
             status_icon = "✅" if day_tasks_total > 0 and day_tasks_done == day_tasks_total else "🕒"
             if day_tasks_total == 0: status_icon = "☕"
             
-            with st.expander(f"{status_icon} {day_name_vn}, {day.date.strftime('%d/%m/%Y')}" + (" (Ôn tập/Nghỉ)" if day.is_buffer_day else ""), expanded=(day.date == today)):
+            with st.expander(f"{status_icon} {day_name_vn}, {day.date.strftime('%d/%m/%Y')}" + (" (Ôn tập/Nghỉ)" if day.is_buffer_day else "") + (" 🔄" if day.date in changed_days else ""), expanded=(day.date == today)):
                 if not day.tasks:
                     st.info("Hôm nay là ngày nghỉ! Hãy nạp lại năng lượng.")
                 else:
@@ -209,11 +283,12 @@ else:
                         # Determine badge class
                         badge_class = f"badge-{task.skill.lower().replace(' ', '-')}"
                         
+                        clock = f"🕐 {format_clock(task.start_hour)}–{format_clock(task.end_hour)} · " if task.start_hour is not None else ""
                         st.markdown(f"""
                         <div class="task-card">
                             <span class="skill-badge {badge_class}">{skill_display}</span>
                             <strong>{task.description}</strong>
-                            <div style="float: right; color: #666;">⏱ {task.duration_hours}h</div>
+                            <div style="float: right; color: #666;">{clock}⏱ {task.duration_hours}h</div>
                         </div>
                         """, unsafe_allow_html=True)
                         
@@ -224,12 +299,13 @@ else:
                                 if is_done:
                                     task.is_completed = True
                                     task.completed_at = datetime.now()
-                                    st.session_state.completed_tasks.append(task)
+                                    learning_log.add_task(task)
                                 else:
                                     task.is_completed = False
                                     task.completed_at = None
-                                    # Remove from completed_tasks by ID to avoid duplicates
-                                    st.session_state.completed_tasks = [t for t in st.session_state.completed_tasks if t.id != task.id]
+                                    learning_log.remove_task(task.id)
+                                st.session_state.timetable.set_completed(task.id, task.completed_at)
+                                journal.record_toggle(task.id, task.completed_at)
                                 st.rerun()
                         with col2:
                             if task.resource_link:
@@ -253,13 +329,37 @@ else:
                             with st.container(border=False):
                                 st.caption(f"💡 **Cách học:** {guide}")
 
-    with tab2:
+                        # Review days pull the most overdue items from the deck
+                        if task.skill == 'Review' and len(review_deck):
+                            due_items = review_deck.due(day.date, limit=REVIEW_BATCH)
+                            st.caption(f"🔁 Mục cần ôn: {review_deck.count_due(day.date)} (hiển thị {len(due_items)})")
+                            for item in due_items:
+                                st.markdown(f"**{item.prompt}**" + (f" — {item.answer}" if item.answer else ""))
+                                if day.date <= today:
+                                    grade_cols = st.columns(len(GRADES))
+                                    for grade_col, (label, quality) in zip(grade_cols, GRADES.items()):
+                                        if grade_col.button(label, key=f"grade-{day.date}-{item.item_id}-{quality}"):
+                                            review_deck.grade(item.item_id, quality, today)
+                                            st.rerun()
+
+        with st.expander("➕ Thêm từ vựng / lỗi sai cần ôn tập"):
+            with st.form("add-review-item", clear_on_submit=True):
+                kind = st.radio("Loại", ["Từ vựng", "Lỗi sai"], horizontal=True)
+                prompt = st.text_input("Nội dung (từ, cấu trúc hoặc lỗi hay mắc)")
+                answer = st.text_input("Nghĩa / cách sửa")
+                if st.form_submit_button("Thêm") and prompt.strip():
+                    review_deck.add(uuid.uuid4().hex[:12], 'vocab' if kind == "Từ vựng" else 'error',
+                                    prompt.strip(), answer.strip() or None)
+                    st.rerun()
+            st.caption(f"Tổng số mục: {len(review_deck)}")
+
+    with tab2, span('render.tab2', learning_log.learner_id):
         st.header("📊 Phân tích tiến độ học tập")
         
         # Row 1: Key Metrics
         m1, m2, m3, m4 = st.columns(4)
-        total_study_time = sum(t.duration_hours for t in st.session_state.completed_tasks)
-        total_tasks = len(st.session_state.completed_tasks)
+        total_study_time, total_tasks = render_cache.get_or_create(
+            ('metrics', learning_log.version), lambda: (learning_log.total_hours(), len(learning_log)))
         current_avg = sum(st.session_state.profile.current_scores.values()) / 4
         target_avg = sum(st.session_state.profile.target_scores.values()) / 4
         
@@ -274,41 +374,49 @@ else:
         with c1:
             st.subheader("Đường cong Dự báo Tăng điểm")
             start_date = date.today()
-            days_range = max(1, (st.session_state.profile.exam_date - start_date).days)
-            dates = [start_date + timedelta(days=i) for i in range(days_range + 1)]
-            
-            predicted_scores = [current_avg + (target_avg - current_avg) * (i / days_range) for i in range(days_range + 1)]
-            
-            actual_scores = [current_avg]
-            cumulative_impact = 0
-            for d in dates[1:]:
-                daily_impact = sum(t.predicted_impact for t in st.session_state.completed_tasks if t.completed_at and t.completed_at.date() == d)
-                cumulative_impact += daily_impact
-                actual_scores.append(current_avg + cumulative_impact)
+
+            def build_progress_figure():
+                profile = st.session_state.profile
+                # Fitted to the learner's mock results and study hours, with a 95% band
+                dates, forecast, _ = learner_forecast(
+                    st.session_state.timetable, learning_log.score_history(), learning_log.events(),
+                    profile.focus_level, profile.current_scores, profile.exam_date, start_date)
+
+                actual_scores = [current_avg + impact for impact in learning_log.get_progress_data(dates)]
                 
-            df_progress = pd.DataFrame({
-                'Date': dates,
-                'Predicted': predicted_scores,
-                'Actual': actual_scores
-            })
+                df_progress = pd.DataFrame({
+                    'Date': dates,
+                    'Predicted': forecast.average,
+                    'Actual': actual_scores
+                })
             
-            fig = px.line(df_progress, x='Date', y=['Predicted', 'Actual'], 
-                          labels={'value': 'Band Score', 'variable': 'Chỉ số'},
-                          color_discrete_map={'Predicted': '#6c757d', 'Actual': '#007bff'})
-            fig.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font_color="#fafafa",
-                xaxis=dict(showgrid=False),
-                yaxis=dict(gridcolor="#444")
-            )
+                fig = px.line(df_progress, x='Date', y=['Predicted', 'Actual'], 
+                              labels={'value': 'Band Score', 'variable': 'Chỉ số'},
+                              color_discrete_map={'Predicted': '#6c757d', 'Actual': '#007bff'})
+                fig.add_scatter(x=dates, y=forecast.upper, mode='lines', line=dict(width=0),
+                                showlegend=False, hoverinfo='skip')
+                fig.add_scatter(x=dates, y=forecast.lower, mode='lines', line=dict(width=0), fill='tonexty',
+                                fillcolor='rgba(108,117,125,0.25)', name='Khoảng tin cậy 95%')
+                fig.add_hline(y=target_avg, line_dash='dot', line_color='#28a745')
+                fig.update_layout(
+                    plot_bgcolor='rgba(0,0,0,0)',
+                    paper_bgcolor='rgba(0,0,0,0)',
+                    font_color="#fafafa",
+                    xaxis=dict(showgrid=False),
+                    yaxis=dict(gridcolor="#444")
+                )
+                return fig
+            fig = render_cache.get_or_create(('progress', profile_hash, learning_log.version, start_date,
+                                              st.session_state.timetable), build_progress_figure)
             st.plotly_chart(fig, use_container_width=True)
 
         with c2:
             st.subheader("Phân bổ thời gian theo kỹ năng")
-            if st.session_state.completed_tasks:
-                df_skills = pd.DataFrame(st.session_state.completed_tasks)
-                skill_dist = df_skills.groupby('skill')['duration_hours'].sum().reset_index()
+            def build_skill_figure():
+                skill_hours = learning_log.hours_by_skill()
+                if not skill_hours:
+                    return None
+                skill_dist = pd.DataFrame({'skill': list(skill_hours), 'duration_hours': list(skill_hours.values())})
                 fig_pie = px.pie(skill_dist, values='duration_hours', names='skill', 
                                  hole=0.4, color_discrete_sequence=px.colors.qualitative.Pastel)
                 fig_pie.update_layout(
@@ -316,30 +424,49 @@ else:
                     paper_bgcolor='rgba(0,0,0,0)',
                     font_color="#fafafa"
                 )
+                return fig_pie
+            fig_pie = render_cache.get_or_create(('skills', learning_log.version), build_skill_figure)
+            if fig_pie is not None:
                 st.plotly_chart(fig_pie, use_container_width=True)
             else:
                 st.info("Chưa có dữ liệu để hiển thị biểu đồ phân bổ.")
 
-    with tab3:
+        # Row 3: chance of reaching each target by the exam, simulated from
+        # the learner's completion rates over the rest of the plan
+        st.subheader("🎯 Khả năng đạt mục tiêu vào ngày thi")
+
+        def build_readiness():
+            return simulate(learner_input(st.session_state.timetable, st.session_state.profile,
+                                          learning_log.events(), learning_log.score_history()))
+        readiness = render_cache.get_or_create(('readiness', profile_hash, learning_log.version, date.today(),
+                                                st.session_state.timetable), build_readiness)
+        r_cols = st.columns(4)
+        for col, (skill, p), median in zip(r_cols, readiness.by_skill().items(), readiness.p50):
+            with col:
+                st.metric(skill, f"{p:.0%}", help=f"Band dự kiến (trung vị): {median:.1f}")
+        st.caption(f"Đạt mục tiêu ở cả 4 kỹ năng: {readiness.p_all:.0%} · "
+                   f"Đạt band trung bình mục tiêu: {readiness.p_average:.0%} "
+                   f"(mô phỏng 10.000 kịch bản theo tỉ lệ hoàn thành thực tế của bạn)")
+
+    with tab3, span('render.tab3', learning_log.learner_id):
         st.header("Nhật ký học tập (Learning Log)")
-        if not st.session_state.completed_tasks:
+        if not completed_tasks:
             st.write("Chưa có nhiệm vụ nào hoàn thành.")
         else:
-            total_hours = sum(t.duration_hours for t in st.session_state.completed_tasks)
-            st.metric("Tổng thời gian học", f"{total_hours} giờ")
+            st.metric("Tổng thời gian học", f"{round(learning_log.total_hours(), 2)} giờ")
             
-            df_log = pd.DataFrame([
+            df_log = render_cache.get_or_create(('log_table', learning_log.version), lambda: pd.DataFrame([
                 {
                     'Skill': t.skill,
                     'Description': t.description,
                     'Duration (h)': t.duration_hours,
                     'Impact': f"+{round(t.predicted_impact, 3)}",
                     'Completed At': t.completed_at.strftime("%Y-%m-%d %H:%M")
-                } for t in st.session_state.completed_tasks
-            ])
+                } for t in completed_tasks
+            ]))
             st.dataframe(df_log, use_container_width=True)
 
-    with tab4:
+    with tab4, span('render.tab4', learning_log.learner_id):
         st.header("📚 Kho Tài Liệu IELTS Chọn Lọc")
         
         col_res1, col_res2 = st.columns(2)
@@ -375,7 +502,7 @@ else:
                 - **Vocabulary.com**: Học từ vựng qua ngữ cảnh thực tế. [Truy cập](https://www.vocabulary.com/)
                 """)
 
-    with tab5:
+    with tab5, span('render.tab5', learning_log.learner_id):
         st.header("ℹ️ Hướng dẫn & IELTS 101")
         
         with st.expander("🎓 IELTS 101: Những điều cơ bản nhất", expanded=True):
@@ -418,38 +545,43 @@ else:
             - **Cập nhật Mock Test**: Nếu bạn vừa làm một bài thi thử thật, hãy vào tab 'Research' để cập nhật điểm mới nhất. Hệ thống sẽ tính lại toàn bộ lộ trình phía sau cho bạn.
             """)
 
-    with tab6:
+    with tab6, span('render.tab6', learning_log.learner_id):
         st.header("📊 Trung tâm Phân tích (Analytics Hub)")
         
         # New: Research Insights Section
         st.subheader("💡 Phân tích dữ liệu học tập")
-        if st.session_state.completed_tasks:
-            df_research = pd.DataFrame([
-                {
-                    'Kỹ năng': t.skill.replace('Listening', 'Nghe').replace('Reading', 'Đọc').replace('Writing', 'Viết').replace('Speaking', 'Nói').replace('Review', 'Ôn tập').replace('Mock Test', 'Thi thử'),
-                    'Số giờ': t.duration_hours,
-                    'Tác động (Band)': t.predicted_impact,
-                    'Ngày': t.completed_at.date() if t.completed_at else None
-                } for t in st.session_state.completed_tasks
-            ])
-            
+        if completed_tasks:
+            # All figures below come from the log's event-maintained aggregates
+            stats = learning_log.stats
+            s1, s2, s3 = st.columns(3)
+            s1.metric("Chuỗi ngày học hiện tại", f"{stats.current_streak(date.today())} ngày")
+            s2.metric("Chuỗi dài nhất", f"{stats.longest_streak} ngày")
+            s3.metric("Số ngày đã học", len(stats.per_day))
             res_col1, res_col2 = st.columns(2)
             with res_col1:
                 st.markdown("**Hiệu suất theo Kỹ năng**")
-                skill_stats = df_research.groupby('Kỹ năng').agg({
-                    'Số giờ': 'sum',
-                    'Tác động (Band)': 'sum'
-                }).reset_index()
-                skill_stats['Hiệu suất (Band/Giờ)'] = (skill_stats['Tác động (Band)'] / skill_stats['Số giờ']).round(4)
+                def build_skill_stats():
+                    return pd.DataFrame([
+                        {
+                            'Kỹ năng': skill.replace('Listening', 'Nghe').replace('Reading', 'Đọc').replace('Writing', 'Viết').replace('Speaking', 'Nói').replace('Review', 'Ôn tập').replace('Mock Test', 'Thi thử'),
+                            'Số giờ': hours,
+                            'Tác động (Band)': impact,
+                            'Hiệu suất (Band/Giờ)': round(efficiency, 4)
+                        } for skill, hours, impact, efficiency in stats.skill_rows()
+                    ])
+                skill_stats = render_cache.get_or_create(('skill_stats', learning_log.version), build_skill_stats)
                 st.dataframe(skill_stats, use_container_width=True, hide_index=True)
             
             with res_col2:
                 st.markdown("**Tần suất học tập theo ngày**")
-                daily_counts = df_research.groupby('Ngày').size().reset_index(name='Số nhiệm vụ')
-                fig_daily = px.bar(daily_counts, x='Ngày', y='Số nhiệm vụ', 
-                                  color_discrete_sequence=['#17a2b8'])
-                fig_daily.update_layout(height=200, margin=dict(l=0, r=0, t=0, b=0),
-                                       plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font_color="#fafafa")
+                def build_daily_figure():
+                    daily_counts = pd.DataFrame(learning_log.daily_counts(), columns=['Ngày', 'Số nhiệm vụ'])
+                    fig_daily = px.bar(daily_counts, x='Ngày', y='Số nhiệm vụ', 
+                                      color_discrete_sequence=['#17a2b8'])
+                    fig_daily.update_layout(height=200, margin=dict(l=0, r=0, t=0, b=0),
+                                           plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font_color="#fafafa")
+                    return fig_daily
+                fig_daily = render_cache.get_or_create(('daily', learning_log.version), build_daily_figure)
                 st.plotly_chart(fig_daily, use_container_width=True)
         else:
             st.info("Chưa có dữ liệu hoàn thành để phân tích.")
@@ -459,26 +591,31 @@ else:
         col1, col2 = st.columns(2)
         with col1:
             st.subheader("Trích xuất dữ liệu (Export)")
-            if st.session_state.completed_tasks:
-                df_export = pd.DataFrame([
-                    {
-                        'Task_ID': t.id,
-                        'Skill': t.skill,
-                        'Duration': t.duration_hours,
-                        'Predicted_Impact': t.predicted_impact,
-                        'Completion_Time': t.completed_at
-                    } for t in st.session_state.completed_tasks
-                ])
-                
-                csv = df_export.to_csv(index=False).encode('utf-8')
-                st.download_button(label="📥 Tải xuống CSV", data=csv, file_name=f"ielts_log_{date.today()}.csv", mime='text/csv')
-                
-                buffer = io.BytesIO()
-                with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                    df_export.to_excel(writer, index=False, sheet_name='LearningLogs')
-                st.download_button(label="📥 Tải xuống Excel", data=buffer.getvalue(), file_name=f"ielts_data_{date.today()}.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+            # Files are built only when a button is clicked (in a worker
+            # thread) and cached until the log or the plan changes
+            export_cache, export_lock = st.session_state.export_cache, st.session_state.export_lock
+
+            def export(kind: str, key: tuple, build):
+                def data():
+                    with span(f'export.{kind}', learning_log.learner_id), export_lock:
+                        return export_cache.get_or_create((kind,) + key, build)
+                return data
+
+            log_key = (learning_log.version,)
+            if completed_tasks:
+                st.download_button(label="📥 Tải xuống CSV", data=export('csv', log_key, lambda: exports.csv_bytes(completed_tasks)),
+                                   file_name=f"ielts_log_{date.today()}.csv", mime='text/csv')
+                st.download_button(label="📥 Tải xuống Excel", data=export('excel', log_key, lambda: exports.excel_bytes(completed_tasks)),
+                                   file_name=f"ielts_data_{date.today()}.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+                if exports.pa is not None:
+                    st.download_button(label="📥 Tải xuống Parquet", data=export('parquet', log_key, lambda: exports.parquet_bytes(completed_tasks)),
+                                       file_name=f"ielts_log_{date.today()}.parquet", mime="application/vnd.apache.parquet")
             else:
                 st.warning("Cần hoàn thành nhiệm vụ để xuất dữ liệu.")
+            # The plan object is part of the key, so a recalculated plan gets a new file
+            timetable = st.session_state.timetable
+            st.download_button(label="📅 Tải lịch học (.ics)", data=export('ics', (timetable,), lambda: exports.ics_bytes(timetable)),
+                               file_name=f"ielts_timetable_{date.today()}.ics", mime="text/calendar")
 
         with col2:
             st.subheader("📝 Cập nhật Điểm Mock Test")
@@ -496,6 +633,87 @@ else:
                     'Listening': new_l, 'Reading': new_r,
                     'Writing': new_w, 'Speaking': new_s
                 }
+                learning_log.record_scores(st.session_state.profile.current_scores)
                 scheduler = IELTSScheduler(st.session_state.profile)
-                st.session_state.timetable = scheduler.generate_timetable(st.session_state.completed_tasks)
+                # Learning rates refitted with the new result
+                scheduler.learning_rates = fit_history(learning_log.score_history(), learning_log.events(),
+                                                       st.session_state.profile.focus_level,
+                                                       st.session_state.profile.current_scores).rates()
+                st.session_state.timetable, st.session_state.timetable_diff = scheduler.regenerate_from(
+                    st.session_state.timetable, completed_tasks=learning_log.stats)
+                journal.record_profile(st.session_state.profile)
+                journal.record_rebase(date.today(), scheduler)
                 st.success("Hệ thống đã phân tích điểm mới và tái cấu trúc lộ trình học!")
+
+# Hidden diagnostics page, opened with ?diag=1 in the URL
+if st.query_params.get('diag') == '1':
+    st.divider()
+    st.header("🩺 Diagnostics")
+    # Recording is switched per session; ILMS_PROFILE=1 turns it on for all
+    instrumentation.enable_session(learning_log.learner_id, st.toggle(
+        "Ghi nhận thời gian xử lý (instrumentation)", value=instrumentation.is_enabled(learning_log.learner_id),
+        disabled=instrumentation.is_enabled()))
+    st.caption(f"Số lần chạy lại (rerun) của phiên này: {instrumentation.rerun_counts().get(learning_log.learner_id, 0)}")
+    plan_stats = shared_plans.stats()
+    st.caption(f"Bộ nhớ đệm lộ trình dùng chung: {plan_stats['size']}/{plan_stats['maxsize']} lộ trình, "
+               f"{plan_stats['hits']} lần trúng, {plan_stats['misses']} lần trượt")
+    # Only this session's spans
+    spans = instrumentation.summary(learning_log.learner_id)
+    if spans:
+        st.dataframe(pd.DataFrame(spans).round(3), use_container_width=True, hide_index=True)
+        st.download_button("📥 Tải xuống JSONL", data=instrumentation.dump_jsonl(session=learning_log.learner_id),
+                           file_name="ilms_spans.jsonl", mime="application/jsonl")
+    else:
+        st.info("Chưa có dữ liệu đo.")
+
+def _instructor_token() -> str:
+    # From the environment or .streamlit/secrets.toml; unset disables the class view
+    token = os.environ.get('ILMS_INSTRUCTOR_TOKEN', '')
+    if not token:
+        try:
+            token = st.secrets.get('instructor_token', '')
+        except Exception:  # no secrets file
+            token = ''
+    return token
+
+
+def _pseudonym(token: str, learner_id: str) -> str:
+    # Stable per learner, but not the id that opens their session
+    return hmac.new(token.encode('utf-8'), learner_id.encode('utf-8'), hashlib.sha256).hexdigest()[:8]
+
+
+# Hidden class view for instructors, opened with ?instructor=1 in the URL and
+# unlocked with the instructor token
+instructor_token = _instructor_token()
+if st.query_params.get('instructor') == '1' and instructor_token:
+    st.divider()
+    st.header("🏫 Phân tích lớp học")
+    if not st.session_state.get('instructor_unlocked'):
+        entered = st.text_input("Mã giảng viên", type="password")
+        if entered and hmac.compare_digest(entered.encode('utf-8'), instructor_token.encode('utf-8')):
+            st.session_state.instructor_unlocked = True
+            st.rerun()
+        elif entered:
+            st.error("Mã giảng viên không đúng.")
+    else:
+        from cohort_store import CohortStore, ingest  # needs pyarrow
+        cohort = CohortStore(os.environ.get('ILMS_COHORT_STORE', 'ilms_cohort'))
+        if st.button("🔄 Cập nhật dữ liệu lớp"):
+            n_learners, n_events, n_planned = ingest(cohort, learning_log.path,
+                                                     os.environ.get('ILMS_JOURNAL_DIR', 'ilms_journal'))
+            st.success(f"{n_learners} học viên: +{n_events} sự kiện hoàn thành, +{n_planned} nhiệm vụ theo kế hoạch")
+        period = st.date_input("Khoảng thời gian", value=(date.today() - timedelta(days=30), date.today()))
+        since, until = (period[0], period[-1]) if period else (None, None)
+        st.subheader("Giờ học theo kỹ năng")
+        st.dataframe(cohort.hours_per_skill(since, until).to_pandas(), use_container_width=True, hide_index=True)
+        st.subheader("Hiệu quả (band/giờ)")
+        st.dataframe(cohort.efficiency(since=since, until=until).to_pandas(), use_container_width=True, hide_index=True)
+        st.subheader("Mức độ tuân thủ kế hoạch")
+        st.dataframe(cohort.adherence(by=('skill',), since=since, until=until).to_pandas(),
+                     use_container_width=True, hide_index=True)
+        with st.expander("Theo học viên (ẩn danh)"):
+            per_learner = cohort.adherence(since=since, until=until).to_pandas()
+            per_learner['learner_id'] = [_pseudonym(instructor_token, learner) for learner in per_learner['learner_id']]
+            st.dataframe(per_learner.rename(columns={'learner_id': 'học viên'}), use_container_width=True, hide_index=True)
+
+instrumentation.record_since('render.rerun', rerun_started, learning_log.learner_id)
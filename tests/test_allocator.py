@@ -0,0 +1,50 @@
+import datetime
+
+from allocator import allocate_week, apportion_blocks
+from models import UserProfile
+from scheduler import IELTSScheduler
+
+SKILLS = ['Listening', 'Reading', 'Writing', 'Speaking']
+WEIGHTS = {'Listening': 0.1, 'Reading': 0.1, 'Writing': 0.6, 'Speaking': 0.2}
+
+
+def test_blocks_follow_weights_and_cover_every_skill():
+    counts = apportion_blocks(20, WEIGHTS)
+    assert sum(counts.values()) == 20
+    assert all(counts[s] >= 1 for s in SKILLS)
+    assert all(abs(counts[s] - 20 * WEIGHTS[s]) <= 1 for s in SKILLS)
+    # Fewer blocks than skills: the heaviest ones get them
+    assert apportion_blocks(2, WEIGHTS) == {'Listening': 0, 'Reading': 0, 'Writing': 1, 'Speaking': 1}
+
+
+def test_week_uses_all_available_time():
+    day_hours = [2.75, 0.3, 1.0, 0.0, 3.0, 2.0, 0.0]
+    plan = allocate_week(day_hours, WEIGHTS, SKILLS)
+    for hours, segments in zip(day_hours, plan):
+        if hours < 0.5:
+            assert segments == []
+        else:
+            assert abs(sum(h for _, h in segments) - hours) < 1e-9
+            assert all(h >= 0.5 for _, h in segments)
+            order = [SKILLS.index(s) for s, _ in segments]
+            assert order == sorted(order)
+    assert {s for segments in plan for s, _ in segments} == set(SKILLS)
+
+
+def test_plan_study_days_match_availability():
+    availability = {'Monday': [18, 20.75], 'Wednesday': [6, 7, 19, 21], 'Saturday': 1.25}
+    profile = UserProfile({'Listening': 6.5, 'Reading': 6.5, 'Writing': 5.0, 'Speaking': 6.0},
+                          {s: 7.0 for s in SKILLS}, datetime.date.today() + datetime.timedelta(days=120),
+                          availability, 3, 'Visual')
+    scheduler = IELTSScheduler(profile, seed=1)
+    expected = {'Monday': 2.75, 'Wednesday': 3.0, 'Saturday': 1.25}
+    timetable = scheduler.generate_timetable()
+    study_days = [day for day in timetable
+                  if not day.is_buffer_day and all(t.skill in SKILLS for t in day.tasks)]
+    assert study_days
+    for day in study_days:
+        hours = sum(t.duration_hours for t in day.tasks)
+        assert abs(hours - expected.get(day.date.strftime('%A'), 0.0)) < 0.011
+    # The weakest skill is never starved out of a week
+    for week in range(len(timetable) // 7):
+        assert any(t.skill == 'Writing' for day in timetable[week * 7:week * 7 + 7] for t in day.tasks)
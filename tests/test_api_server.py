@@ -0,0 +1,111 @@
+import datetime
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip('tornado')
+
+from tornado.testing import AsyncHTTPTestCase
+
+from api_server import Service, make_app
+
+PROFILE = {
+    'current_scores': {'Listening': 5.5, 'Reading': 6.0, 'Writing': 5.0, 'Speaking': 5.5},
+    'target_scores': {'Listening': 7.0, 'Reading': 7.0, 'Writing': 6.5, 'Speaking': 6.5},
+    'exam_date': (datetime.date.today() + datetime.timedelta(days=70)).isoformat(),
+    'availability': {'Monday': [18, 20], 'Saturday': [8, 12]},
+}
+
+
+class MalformedRequestTest(AsyncHTTPTestCase):
+    def get_app(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        return make_app(Service(self.executor, ':memory:'))
+
+    def tearDown(self):
+        super().tearDown()
+        self.executor.shutdown()
+
+    def post(self, path, body):
+        return self.fetch(path, method='POST', body=json.dumps(body), raise_error=False)
+
+    def timetable(self):
+        response = self.post('/generate', {'profile': PROFILE, 'seed': 1})
+        assert response.code == 200
+        return json.loads(response.body)['timetable']
+
+    def assert_bad_request(self, path, body):
+        response = self.post(path, body)
+        assert response.code == 400, response.body
+        assert 'error' in json.loads(response.body)
+
+    def test_generate_rejects_bad_input(self):
+        self.assert_bad_request('/generate', {'profile': PROFILE, 'seed': 'abc'})
+        self.assert_bad_request('/generate', {'profile': PROFILE, 'seed': 1.5})
+        self.assert_bad_request('/generate', {'profile': {**PROFILE, 'current_scores': {'Listening': 5}}})
+        self.assert_bad_request('/generate', {'profile': {**PROFILE, 'exam_date': 'soon'}})
+        self.assert_bad_request('/generate', {'profile': 'me'})
+        for field, value in (('availability', {'Monday': 'abc'}), ('availability', ['a', 'b']),
+                             ('availability', {'Monday': [18]}), ('availability', {'Monday': [20, 18]}),
+                             ('availability', {'Monday': ['18', '20']}), ('availability', {'Monday': [18, 30]}),
+                             ('learning_style', 5), ('focus_level', '3'), ('focus_level', 9)):
+            self.assert_bad_request('/generate', {'profile': {**PROFILE, field: value}})
+
+    def test_recalculate_rejects_bad_timetable(self):
+        self.assert_bad_request('/recalculate', {'profile': PROFILE, 'timetable': {'v': 2}})
+        self.assert_bad_request('/recalculate', {'profile': PROFILE, 'timetable': {'v': 2, 's': [], 'days': [['x']]}})
+        self.assert_bad_request('/recalculate', {'profile': PROFILE, 'timetable': []})
+
+    def test_recalculate_rejects_bad_fields(self):
+        timetable = self.timetable()
+        self.assert_bad_request('/recalculate', {'profile': PROFILE, 'timetable': timetable,
+                                                 'completed_tasks': {'tasks': []}})
+        self.assert_bad_request('/recalculate', {'profile': PROFILE, 'timetable': timetable,
+                                                 'completed_tasks': {'s': [], 'tasks': [[1, 2]]}})
+        self.assert_bad_request('/recalculate', {'profile': PROFILE, 'timetable': timetable, 'seed': '7'})
+        self.assert_bad_request('/recalculate', {'profile': PROFILE, 'timetable': timetable, 'from_date': 20260101})
+        self.assert_bad_request('/recalculate', {'profile': PROFILE, 'timetable': timetable, 'from_date': 'today'})
+
+    def test_recalculate_accepts_valid_body(self):
+        timetable = self.timetable()
+        response = self.post('/recalculate', {'profile': PROFILE, 'timetable': timetable, 'seed': 1,
+                                              'completed_tasks': {'s': [], 'tasks': []}})
+        assert response.code == 200
+        assert json.loads(response.body)['timetable']['days']
+
+
+class LogCompletionTest(AsyncHTTPTestCase):
+    def get_app(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        return make_app(Service(self.executor, ':memory:'))
+
+    def tearDown(self):
+        super().tearDown()
+        self.executor.shutdown()
+
+    def post(self, body):
+        return self.fetch('/log-completion', method='POST', body=json.dumps(body), raise_error=False)
+
+    def test_logs_and_removes_a_completion(self):
+        task = {'id': 'Reading-2026-06-01', 'skill': 'Reading', 'duration_hours': 1.5,
+                'predicted_impact': 0.02, 'completed_at': '2026-06-01T20:00:00'}
+        response = self.post({'learner_id': 'a', 'task': task})
+        assert response.code == 200
+        assert json.loads(response.body)['completed_tasks'] == 1
+        response = self.post({'learner_id': 'a', 'task': task, 'completed': False})
+        assert json.loads(response.body)['completed_tasks'] == 0
+
+    def test_rejects_bad_input(self):
+        task = {'id': 'Reading-2026-06-01', 'skill': 'Reading', 'duration_hours': 1.5}
+        for body in ({'learner_id': ['a'], 'task': task},
+                     {'learner_id': 'a', 'task': {**task, 'id': 7}},
+                     {'learner_id': 'a', 'task': {**task, 'skill': ['Reading']}},
+                     {'learner_id': 'a', 'task': {**task, 'description': {}}},
+                     {'learner_id': 'a', 'task': {**task, 'duration_hours': 'long'}},
+                     {'learner_id': 'a', 'task': {**task, 'completed_at': 'yesterday'}},
+                     {'learner_id': 'a', 'task': ['x']},
+                     {'task': task}):
+            response = self.post(body)
+            assert response.code == 400, body
+            assert 'error' in json.loads(response.body)
@@ -0,0 +1,38 @@
+import datetime
+
+import batch
+from models import UserProfile
+
+SKILLS = ('Listening', 'Reading', 'Writing', 'Speaking')
+DAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+
+def _cohort(n):
+    # Schedulers are seeded from the profile, so equal profiles give equal plans
+    exam_date = datetime.date.today() + datetime.timedelta(days=60)
+    return [
+        UserProfile({s: 5.0 + (i + j) % 4 * 0.5 for j, s in enumerate(SKILLS)}, {s: 7.0 for s in SKILLS},
+                    exam_date, {d: [18, 20] if i % 2 else [6, 7, 19, 22] for d in DAYS}, 1 + i % 5, 'Visual')
+        for i in range(n)
+    ]
+
+
+def test_pool_matches_serial(monkeypatch):
+    cohort = _cohort(12)
+    serial, serial_stats = batch.generate_timetables_list(cohort, max_workers=1)
+    assert serial_stats.workers == 1
+
+    monkeypatch.setattr(batch, '_available_cpus', lambda: 2)
+    monkeypatch.setattr(batch, 'MIN_PROFILES_PER_WORKER', 1)
+    pooled, pooled_stats = batch.generate_timetables_list(cohort, max_workers=2, chunksize=5)
+    assert pooled_stats.workers == 2
+    assert pooled_stats.profiles == len(cohort)
+    assert pooled == serial
+
+
+def test_small_batches_and_single_cpu_run_serially(monkeypatch):
+    monkeypatch.setattr(batch, '_available_cpus', lambda: 8)
+    assert batch._pool_size(batch.MIN_PROFILES_PER_WORKER * 3, None) == 3
+    assert batch._pool_size(batch.MIN_PROFILES_PER_WORKER - 1, 8) == 1
+    monkeypatch.setattr(batch, '_available_cpus', lambda: 1)
+    assert batch._pool_size(10_000, 4) == 1
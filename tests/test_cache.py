@@ -0,0 +1,72 @@
+import datetime
+import threading
+
+import pytest
+
+import cache
+from models import UserProfile
+
+SKILLS = ('Listening', 'Reading', 'Writing', 'Speaking')
+
+
+def _profile(style):
+    return UserProfile({s: 6.0 for s in SKILLS}, {s: 7.0 for s in SKILLS},
+                       datetime.date.today() + datetime.timedelta(days=30), {'Monday': [18, 20]}, 3, style)
+
+
+class _Plan:
+    def fork(self, completed_at):
+        return self
+
+
+def test_only_same_profile_callers_wait(monkeypatch):
+    gate, started = threading.Event(), threading.Event()
+    builds = []
+
+    class Scheduler:
+        def __init__(self, profile):
+            self.style = profile.learning_style
+
+        def generate_compressed_timetable(self):
+            builds.append(self.style)
+            if self.style == 'slow':
+                started.set()
+                assert gate.wait(5)
+            return _Plan()
+
+    monkeypatch.setattr(cache, 'IELTSScheduler', Scheduler)
+    plans = cache.SharedPlanCache()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(plans.timetable(_profile('slow'))))
+               for _ in range(3)]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    # Another profile is built while the slow one is still in progress
+    plans.timetable(_profile('fast'))
+    assert not gate.is_set() and builds == ['slow', 'fast']
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+    assert builds == ['slow', 'fast'] and len(results) == 3 and len({id(r) for r in results}) == 1
+
+
+def test_failed_build_is_retried(monkeypatch):
+    attempts = []
+
+    class Scheduler:
+        def __init__(self, profile):
+            pass
+
+        def generate_compressed_timetable(self):
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError('boom')
+            return _Plan()
+
+    monkeypatch.setattr(cache, 'IELTSScheduler', Scheduler)
+    plans = cache.SharedPlanCache()
+    with pytest.raises(RuntimeError):
+        plans.timetable(_profile('Visual'))
+    assert isinstance(plans.timetable(_profile('Visual')), _Plan) and len(attempts) == 2
@@ -0,0 +1,55 @@
+import datetime
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from cache import shared_plans
+from cohort_store import CohortStore, ingest
+from journal import Journal
+from models import LearningLog, UserProfile
+
+
+def test_ingest_reads_journals_without_writing(tmp_path):
+    # Mondays only, so most plan days have no tasks
+    profile = UserProfile({'Listening': 5.0, 'Reading': 5.5, 'Writing': 5.0, 'Speaking': 6.0},
+                          {'Listening': 7.0, 'Reading': 7.0, 'Writing': 7.0, 'Speaking': 7.0},
+                          datetime.date.today() + datetime.timedelta(days=100), {'Monday': [18, 21]}, 3, 'Visual')
+    timetable = shared_plans.timetable(profile, {})
+    journal = Journal(str(tmp_path / 'journal'), 'learner')
+    journal.record_profile(profile)
+    journal.record_generate(timetable, timetable.scheduler)
+    log = LearningLog(str(tmp_path / 'log.sqlite3'), 'learner')
+    log.add_task(next(task for day in timetable for task in day.tasks))
+    before = {p.name: p.read_bytes() for p in (tmp_path / 'journal').iterdir()}
+
+    store = CohortStore(str(tmp_path / 'cohort'))
+    until = timetable.start + datetime.timedelta(days=28)
+    n_learners, n_events, n_planned = ingest(store, str(tmp_path / 'log.sqlite3'), str(tmp_path / 'journal'), until)
+    assert (n_learners, n_events) == (1, 1)
+    assert n_planned == sum(timetable.task_counts(28).values())
+    assert {p.name: p.read_bytes() for p in (tmp_path / 'journal').iterdir()} == before
+    journal.close()
+
+
+def test_ingest_includes_learners_without_completions(tmp_path):
+    profile = UserProfile({'Listening': 5.0, 'Reading': 5.5, 'Writing': 5.0, 'Speaking': 6.0},
+                          {'Listening': 7.0, 'Reading': 7.0, 'Writing': 7.0, 'Speaking': 7.0},
+                          datetime.date.today() + datetime.timedelta(days=60), {'Monday': [18, 21]}, 3, 'Visual')
+    timetable = shared_plans.timetable(profile, {})
+    for learner_id in ('active', 'idle', 'idle@example.com'):
+        journal = Journal(str(tmp_path / 'journal'), learner_id)
+        journal.record_profile(profile)
+        journal.record_generate(timetable, timetable.scheduler)
+        journal.close()
+    LearningLog(str(tmp_path / 'log.sqlite3'), 'active').add_task(
+        next(task for day in timetable for task in day.tasks))
+
+    store = CohortStore(str(tmp_path / 'cohort'))
+    until = timetable.start + datetime.timedelta(days=28)
+    n_learners, _, _ = ingest(store, str(tmp_path / 'log.sqlite3'), str(tmp_path / 'journal'), until)
+    assert n_learners == 3
+    adherence = store.adherence().to_pylist()
+    planned = sum(timetable.task_counts(28).values())
+    assert [row['planned'] for row in adherence] == [planned] * 3
+    assert {row['learner_id']: row['completed'] for row in adherence}['idle'] == 0
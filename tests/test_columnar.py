@@ -0,0 +1,41 @@
+import datetime
+
+from columnar import ColumnarTimetable, StringPool
+from models import UserProfile
+from scheduler import IELTSScheduler
+
+DAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+
+def _plan(days=365):
+    # Three windows a day, so most study time is split into parts
+    profile = UserProfile({'Listening': 6.0, 'Reading': 6.5, 'Writing': 5.5, 'Speaking': 6.0},
+                          {'Listening': 7.5, 'Reading': 7.5, 'Writing': 7.0, 'Speaking': 7.0},
+                          datetime.date.today() + datetime.timedelta(days=days),
+                          {day: [6, 7, 12, 13, 19, 22] for day in DAYS}, 3, 'Visual')
+    return IELTSScheduler(profile, seed=1).generate_timetable()
+
+
+def test_round_trip_keeps_scheduler_ids():
+    timetable = _plan()
+    columnar = ColumnarTimetable.from_timetable(timetable)
+    assert any(task.id.count('-') == 4 for day in timetable for task in day.tasks)  # split parts
+    assert columnar.id_overrides == {}
+    assert columnar.to_timetable() == timetable
+
+
+def test_foreign_ids_are_kept():
+    timetable = _plan(60)
+    timetable[3].tasks[0].id = 'custom'
+    assert ColumnarTimetable.from_timetable(timetable).to_timetable() == timetable
+
+
+def test_pool_is_per_plan_unless_shared():
+    timetable = _plan(60)
+    a = ColumnarTimetable.from_timetable(timetable)
+    b = ColumnarTimetable.from_timetable(timetable)
+    assert a.pool is not b.pool
+    pool = StringPool()
+    shared = [ColumnarTimetable.from_timetable(timetable, pool=pool) for _ in range(2)]
+    assert all(plan.pool is pool for plan in shared) and len(pool) == len(a.pool)
+    assert shared[1].to_timetable() == timetable
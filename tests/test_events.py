@@ -0,0 +1,43 @@
+import datetime
+import random
+
+from events import COMPLETED, UNCOMPLETED, CompletionEvent, CompletionStats
+
+START = datetime.date(2026, 1, 1)
+
+
+def _runs(days):
+    # (start, end) of every run of consecutive days, the slow way
+    runs, start = [], None
+    for day in sorted(days):
+        if start is None or day != end + datetime.timedelta(days=1):
+            if start is not None:
+                runs.append((start, end))
+            start = day
+        end = day
+    return runs + ([(start, end)] if start is not None else [])
+
+
+def test_streak_runs_follow_completions_and_undos():
+    rng = random.Random(7)
+    stats = CompletionStats()
+    done = set()
+    for seq in range(1, 2001):
+        day = START + datetime.timedelta(days=rng.randrange(120))
+        kind = UNCOMPLETED if day in done and rng.random() < 0.5 else COMPLETED
+        if kind == COMPLETED and day in done:
+            continue
+        (done.add if kind == COMPLETED else done.discard)(day)
+        stats.apply(CompletionEvent(seq, kind, f'task-{day}', 'Reading', 1.0, 0.01,
+                                    datetime.datetime.combine(day, datetime.time(20)), day))
+        assert sorted(stats._run_end.items()) == _runs(done)
+        assert stats.longest_streak == max(((e - s).days + 1 for s, e in _runs(done)), default=0)
+
+
+def test_undo_on_a_day_without_completions_is_ignored():
+    stats = CompletionStats()
+    at = datetime.datetime.combine(START, datetime.time(20))
+    stats.apply(CompletionEvent(1, COMPLETED, 'a', 'Reading', 1.0, 0.01, at, START))
+    stats.apply(CompletionEvent(2, UNCOMPLETED, 'b', 'Reading', 1.0, 0.01, at, START - datetime.timedelta(days=3)))
+    stats.apply(CompletionEvent(3, UNCOMPLETED, 'c', 'Reading', 1.0, 0.01, at, START + datetime.timedelta(days=3)))
+    assert stats._run_end == {START: START} and stats.longest_streak == 1
@@ -0,0 +1,63 @@
+import csv
+import datetime
+import io
+
+import pytest
+
+import exports
+from models import DailySchedule, StudyTask
+
+DAY = datetime.date(2026, 3, 2)
+
+
+def _tasks(n):
+    return [StudyTask(f'Reading-{i}', 'Reading', 'Đọc, hiểu; "bài" 3', 1.5, is_completed=True,
+                      completed_at=datetime.datetime(2026, 3, 2, 20, 30), predicted_impact=0.015)
+            for i in range(n)]
+
+
+def test_csv_streams_in_chunks_and_round_trips():
+    tasks = _tasks(25)
+    chunks = list(exports.iter_csv(tasks, chunk_rows=10))
+    assert len(chunks) == 3
+    rows = list(csv.reader(io.StringIO(b''.join(chunks).decode('utf-8'))))
+    assert rows[0] == exports.LOG_COLUMNS
+    assert rows[1] == ['Reading-0', 'Reading', '1.5', '0.015', '2026-03-02 20:30:00']
+    assert len(rows) == 26 and b''.join(chunks) == exports.csv_bytes(tasks)
+
+
+def test_csv_of_an_empty_log_is_the_header():
+    assert exports.csv_bytes([]) == (','.join(exports.LOG_COLUMNS) + '\n').encode('utf-8')
+
+
+def _unfold(data: bytes):
+    return data.decode('utf-8').replace('\r\n ', '').split('\r\n')
+
+
+def test_ics_has_timed_and_all_day_events():
+    timed = StudyTask('Writing-2026-03-02', 'Writing', 'Task 2, opinion essay', 1.5,
+                      study_guide='Lập dàn ý; viết 250 từ ' * 5, start_hour=18.5, end_hour=20.0)
+    all_day = StudyTask('mock-13', 'Mock Test', 'Full test', 3.0)
+    data = exports.ics_bytes([DailySchedule(DAY, [timed]), DailySchedule(DAY + datetime.timedelta(days=1), []),
+                              DailySchedule(DAY + datetime.timedelta(days=2), [all_day])])
+    raw_lines = data.split(b'\r\n')
+    assert all(len(line) <= 75 for line in raw_lines)
+    lines = _unfold(data)
+    assert lines[0] == 'BEGIN:VCALENDAR' and lines[-2:] == ['END:VCALENDAR', '']
+    assert lines.count('BEGIN:VEVENT') == lines.count('END:VEVENT') == 2
+    assert 'UID:Writing-2026-03-02@ielts-ilms' in lines
+    assert 'DTSTART:20260302T183000' in lines and 'DTEND:20260302T200000' in lines
+    assert 'SUMMARY:Writing: Task 2\\, opinion essay' in lines
+    assert 'DTSTART;VALUE=DATE:20260304' in lines and 'DTEND;VALUE=DATE:20260305' in lines
+    description = next(line for line in lines if line.startswith('DESCRIPTION:18:30–20:00'))
+    assert 'Lập dàn ý\\; viết 250 từ' in description
+
+
+def test_parquet_keeps_ids_times_and_texts():
+    pq = pytest.importorskip('pyarrow.parquet')
+    tasks = _tasks(3)
+    table = pq.read_table(io.BytesIO(exports.parquet_bytes(tasks)))
+    assert table.num_rows == 3
+    assert table.column('id').to_pylist() == [t.id for t in tasks]
+    assert table.column('completed_at').to_pylist() == [task.completed_at for task in tasks]
+    assert table.column('description').to_pylist()[0] == tasks[0].description
@@ -0,0 +1,67 @@
+import datetime
+
+import numpy as np
+
+import forecast
+from events import COMPLETED, UNCOMPLETED, CompletionEvent
+from models import UserProfile
+from scheduler import IELTSScheduler
+
+DAY = datetime.date(2026, 3, 2)
+
+
+def _two_results(gap_hours, gain=1.0):
+    hours = np.array([[0.0] * 4, [gap_hours] * 4])
+    bands = np.array([[5.0] * 4, [5.0 + gain] * 4])
+    return forecast.fit(hours, bands, focus_level=3)
+
+
+def test_one_result_keeps_the_prior_rate():
+    skill_fit = forecast.fit(np.zeros((1, 4)), np.array([[5.0, 5.5, 6.0, 6.5]]), focus_level=5)
+    assert np.allclose(skill_fit.rate, forecast.prior_rate(5))
+    assert np.allclose(skill_fit.intercept, [5.0, 5.5, 6.0, 6.5])
+
+
+def test_evidence_pulls_the_rate_from_the_prior_towards_the_data():
+    prior = forecast.prior_rate(3)
+    # One band in 40 hours is 0.025/h, well above the prior
+    few, many = _two_results(40.0), _two_results(400.0, gain=10.0)
+    assert prior < few.rate[0] < 1.0 / 40.0
+    assert abs(many.rate[0] - 10.0 / 400.0) < abs(few.rate[0] - 1.0 / 40.0)
+    # The prior weighs like two results 120 hours apart: halfway there
+    halfway = _two_results(120.0, gain=120.0 * 3 * prior)
+    assert np.isclose(halfway.rate[0], 2 * prior)
+
+
+def test_falling_scores_never_give_a_negative_rate():
+    assert (_two_results(300.0, gain=-2.0).rate == 0.0).all()
+
+
+def test_projection_adds_planned_hours_at_the_given_adherence():
+    skill_fit = _two_results(120.0)
+    planned = np.full((30, 4), 0.5)
+    result = forecast.project(skill_fit, np.full(4, 10.0), planned, adherence=0.5)
+    hours = 10.0 + 0.25 * np.arange(1, 31)
+    assert np.allclose(result.mean[:, 0], skill_fit.intercept[0] + skill_fit.rate[0] * hours)
+    assert (result.lower <= result.average).all() and (result.average <= result.upper).all()
+    # Less certain the further the plan runs past the last result
+    beyond = forecast.project(skill_fit, np.full(4, 200.0), planned)
+    assert (np.diff(beyond.upper - beyond.lower) > 0).all()
+
+
+def test_hours_before_nets_out_undone_tasks():
+    at = datetime.datetime.combine(DAY, datetime.time(20))
+    events = [CompletionEvent(1, COMPLETED, 'a', 'Reading', 1.5, 0.01, at, DAY),
+              CompletionEvent(2, COMPLETED, 'b', 'Writing', 1.0, 0.01, at, DAY + datetime.timedelta(days=1)),
+              CompletionEvent(3, UNCOMPLETED, 'a', 'Reading', 1.5, 0.01, at, DAY),
+              CompletionEvent(4, COMPLETED, 'c', 'Reading', 2.0, 0.01, at, DAY + datetime.timedelta(days=2))]
+    days = [DAY, DAY + datetime.timedelta(days=2), DAY + datetime.timedelta(days=5)]
+    assert forecast.hours_before(events, days).tolist() == [[0, 0, 0, 0], [0, 0, 1, 0], [0, 2, 1, 0]]
+
+
+def test_planned_hours_from_templates_match_the_days():
+    profile = UserProfile({'Listening': 6.0, 'Reading': 6.5, 'Writing': 5.5, 'Speaking': 6.0},
+                          {s: 7.5 for s in forecast.SKILLS}, datetime.date.today() + datetime.timedelta(days=200),
+                          {'Monday': [18, 20], 'Thursday': [6, 7, 19, 21], 'Sunday': 2.5}, 3, 'Visual')
+    compressed = IELTSScheduler(profile, seed=2).generate_compressed_timetable()
+    assert np.allclose(forecast.planned_hours(compressed, 17, 150), forecast.planned_hours(list(compressed), 17, 150))
@@ -0,0 +1,40 @@
+import json
+import threading
+
+import instrumentation
+
+
+@instrumentation.timed('work')
+def _work():
+    return 1
+
+
+def _run_as(session):
+    def body():
+        instrumentation.bind_session(session)
+        with instrumentation.span('render'):
+            _work()
+    thread = threading.Thread(target=body)
+    thread.start()
+    thread.join()
+
+
+def test_recording_is_per_session():
+    instrumentation.reset()
+    instrumentation.enable(False)
+    instrumentation.enable_session('a')
+    try:
+        _run_as('a')
+        _run_as('b')
+        assert instrumentation.is_enabled('a') and not instrumentation.is_enabled('b')
+        assert {(r['name'], r['session']) for r in instrumentation.records()} == {('render', 'a'), ('work', 'a')}
+
+        instrumentation.enable_session('b')
+        _run_as('b')
+        exported = [json.loads(line) for line in instrumentation.dump_jsonl(session='b').splitlines()]
+        assert {r['session'] for r in exported} == {'b'} and len(exported) == 2
+        assert [row['name'] for row in instrumentation.summary('a')] != []
+    finally:
+        instrumentation.enable_session('a', False)
+        instrumentation.enable_session('b', False)
+        instrumentation.reset()
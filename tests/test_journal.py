@@ -0,0 +1,72 @@
+import datetime
+
+from journal import Journal
+from models import UserProfile
+
+HOURS = {day: [18, 20] for day in ('Monday', 'Wednesday', 'Saturday')}
+
+
+def _profile():
+    return UserProfile({'Listening': 5.5, 'Reading': 6.0, 'Writing': 5.0, 'Speaking': 5.5},
+                       {'Listening': 7.0, 'Reading': 7.0, 'Writing': 6.5, 'Speaking': 6.5},
+                       datetime.date.today() + datetime.timedelta(days=90), HOURS, 3, 'Visual')
+
+
+def _done(day):
+    return datetime.datetime(2026, 3, day, 20)
+
+
+def test_two_writers_keep_each_others_records(tmp_path):
+    a = Journal(str(tmp_path), 'learner')
+    b = Journal(str(tmp_path), 'learner')
+    a.record_profile(_profile())
+    b.record_toggle('b', _done(1))
+    a.record_toggle('a', _done(2))
+    b.snapshot()
+    a.snapshot()
+    b.record_toggle('c', _done(3))
+    a.close()
+    b.close()
+
+    c = Journal(str(tmp_path), 'learner')
+    assert set(c.state.completed) == {'a', 'b', 'c'}
+    assert c.state.profile is not None
+    c.close()
+
+
+def test_snapshots_from_both_writers(tmp_path):
+    a = Journal(str(tmp_path), 'learner', snapshot_every=3)
+    b = Journal(str(tmp_path), 'learner', snapshot_every=3)
+    for i in range(20):
+        (a if i % 3 else b).record_toggle('t%d' % i, _done(1 + i))
+    b.record_toggle('t0', None)
+    a.close()
+    b.close()
+    c = Journal(str(tmp_path), 'learner')
+    assert set(c.state.completed) == {'t%d' % i for i in range(1, 20)}
+    c.close()
+
+
+def test_read_leaves_a_live_journal_alone(tmp_path):
+    writer = Journal(str(tmp_path), 'learner')
+    writer.record_profile(_profile())
+    writer.record_toggle('a', _done(1))
+    path = writer.path
+    with open(path, 'ab') as f:
+        f.write(b'\x10\x00')  # a record still being written
+    size = len(open(path, 'rb').read())
+
+    profile, timetable = Journal.read(str(tmp_path), 'learner')
+    assert profile == _profile()
+    assert timetable is None
+    assert len(open(path, 'rb').read()) == size
+    assert not (tmp_path / 'learner.snapshot').exists()
+    writer.close()
+
+
+def test_unusual_ids_get_distinct_hashed_file_names():
+    from journal import _file_name
+    assert _file_name('learner_01') == 'learner_01'
+    names = {_file_name(learner_id) for learner_id in ('a@b.com', 'a@b.con', 'x' * 65, 'lớp 10A')}
+    assert len(names) == 4 and all(len(name) == 65 for name in names)
+    assert all(_file_name(name) == name for name in names)
@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from models import LearningLog, StudyTask
+
+
+def _task(task_id, skill='Reading', hours=1.0, impact=0.01):
+    return StudyTask(task_id, skill, 'x', hours, True, datetime(2026, 3, 2, 20), impact)
+
+
+def test_two_sessions_share_event_sequence(tmp_path):
+    path = str(tmp_path / 'log.sqlite3')
+    a = LearningLog(path, 'learner')
+    b = LearningLog(path, 'learner')
+    b.add_task(_task('Reading-1'))
+    a.add_task(_task('Writing-1', 'Writing', 2.0))
+    a.remove_task('Reading-1')
+    b.add_task(_task('Listening-1', 'Listening'))
+
+    seqs = [event.seq for event in a.events()]
+    assert seqs == list(range(1, 5))
+    for log in (a, b):
+        log.refresh()
+        assert log.stats.last_seq == 4
+        assert log.stats.counts == {'Writing': 1, 'Listening': 1}
+        assert set(log.completed_at()) == {'Writing-1', 'Listening-1'}
+    assert a.stats.hours == b.stats.hours
+
+
+def test_fresh_log_sees_other_sessions(tmp_path):
+    path = str(tmp_path / 'log.sqlite3')
+    a = LearningLog(path, 'learner')
+    a.add_task(_task('Reading-1'))
+    a.add_task(_task('Reading-1'))  # re-completion replaces the first
+    c = LearningLog(path, 'learner')
+    assert c.stats.counts == a.stats.counts == {'Reading': 1}
+    assert c.stats.last_seq == a.stats.last_seq == 3
@@ -0,0 +1,39 @@
+import datetime
+
+import numpy as np
+
+from events import COMPLETED, UNCOMPLETED, CompletionEvent
+from forecast import SKILLS
+from models import UserProfile
+from readiness import learner_input, simulate
+from scheduler import IELTSScheduler
+from timetable import CompressedTimetable
+
+TODAY = datetime.date(2026, 6, 1)
+
+
+def _event(seq, skill, day, kind=COMPLETED):
+    return CompletionEvent(seq, kind, f'{skill}-{seq}', skill, 1.0, 0.01,
+                           datetime.datetime.combine(day, datetime.time(20)), day)
+
+
+def test_history_before_the_plan_is_not_counted():
+    profile = UserProfile({'Listening': 5.5, 'Reading': 6.0, 'Writing': 5.0, 'Speaking': 5.5},
+                          {'Listening': 7.0, 'Reading': 7.0, 'Writing': 6.5, 'Speaking': 6.5},
+                          TODAY + datetime.timedelta(days=60), {'Monday': [18, 20], 'Thursday': [18, 20]}, 3, 'Visual')
+    start = TODAY - datetime.timedelta(days=14)
+    timetable = CompressedTimetable(IELTSScheduler(profile, seed=1), start, 74)
+    due = timetable.task_counts(14)
+
+    # A long history under an earlier plan, then a few tasks of this one
+    events = [_event(i + 1, 'Reading', start - datetime.timedelta(days=1 + i % 90)) for i in range(300)]
+    events += [_event(301, 'Writing', start), _event(302, 'Writing', start + datetime.timedelta(days=3)),
+               _event(303, 'Writing', start + datetime.timedelta(days=3), UNCOMPLETED),
+               _event(304, 'Listening', TODAY)]  # today is not over yet
+
+    item = learner_input(timetable, profile, events, [], TODAY)
+    completed = dict(zip(SKILLS, item.completed))
+    assert completed == {'Listening': 0, 'Reading': 0, 'Writing': 1, 'Speaking': 0}
+    assert list(item.scheduled) == [max(completed[s], due.get(s, 0)) for s in SKILLS]
+    assert np.all(item.scheduled >= item.completed)
+    assert 0.0 <= simulate(item, 2000).p_all <= 1.0
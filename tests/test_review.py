@@ -0,0 +1,40 @@
+import sqlite3
+
+import pytest
+
+from review import ReviewDeck, ReviewItem
+
+
+def test_invalid_kind_leaves_deck_untouched(tmp_path):
+    deck = ReviewDeck(str(tmp_path / 'deck.sqlite3'), 'learner')
+    with pytest.raises(ValueError):
+        deck.add_items([ReviewItem('a', 'vocab', 'ubiquitous'), ReviewItem('b', 'grammar', 'whom')])
+    assert len(deck) == 0
+    assert len(ReviewDeck(deck.path, 'learner')) == 0
+
+
+def test_failed_write_rolls_back(tmp_path):
+    deck = ReviewDeck(str(tmp_path / 'deck.sqlite3'), 'learner')
+    with pytest.raises(sqlite3.IntegrityError):
+        deck.add_items([ReviewItem('a', 'vocab', 'ubiquitous'), ReviewItem('b', 'vocab', None)])
+    assert len(deck) == 0 and not deck._conn.in_transaction
+
+    deck.add_items([ReviewItem('a', 'vocab', 'ubiquitous')])
+    assert 'a' in deck
+    assert 'a' in ReviewDeck(deck.path, 'learner')
+
+
+def test_failed_grade_leaves_item_and_heap_untouched(tmp_path):
+    deck = ReviewDeck(str(tmp_path / 'deck.sqlite3'), 'learner')
+    item = deck.add('a', 'vocab', 'ubiquitous')
+    before = (item.ease, item.interval, item.repetitions, item.lapses, item.due)
+    deck._conn.execute("CREATE TRIGGER frozen BEFORE UPDATE ON review_items BEGIN SELECT RAISE(ABORT, 'frozen'); END")
+    with pytest.raises(sqlite3.DatabaseError):
+        deck.grade('a', 5)
+    assert (item.ease, item.interval, item.repetitions, item.lapses, item.due) == before
+    assert deck.due() == [item] and not deck._conn.in_transaction
+
+    deck._conn.execute("DROP TRIGGER frozen")
+    deck.grade('a', 5)
+    assert deck.due() == [] and item.repetitions == 1
+    assert ReviewDeck(deck.path, 'learner').items['a'].due == item.due
@@ -0,0 +1,56 @@
+import datetime
+
+import pytest
+
+from events import COMPLETED, CompletionEvent, CompletionStats
+from models import UserProfile
+from scheduler import IELTSScheduler
+from timetable import CompressedTimetable
+
+TODAY = datetime.date(2026, 6, 1)
+DAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+
+def _profile():
+    return UserProfile({'Listening': 5.5, 'Reading': 6.0, 'Writing': 5.0, 'Speaking': 5.5},
+                       {'Listening': 7.0, 'Reading': 7.0, 'Writing': 6.5, 'Speaking': 6.5},
+                       TODAY + datetime.timedelta(days=60), {day: [18, 21] for day in DAYS}, 3, 'Visual')
+
+
+def _plan_and_stats(skipped='Writing'):
+    # Four weeks of plan behind today, all done except one skill
+    start = TODAY - datetime.timedelta(days=28)
+    plan = CompressedTimetable(IELTSScheduler(_profile(), seed=1), start, 88)
+    stats = CompletionStats()
+    seq = 0
+    for day in plan[:28]:
+        for task in day.tasks:
+            if task.skill != skipped:
+                seq += 1
+                stats.apply(CompletionEvent(seq, COMPLETED, task.id, task.skill, task.duration_hours,
+                                            task.predicted_impact,
+                                            datetime.datetime.combine(day.date, datetime.time(20)), day.date))
+    return plan, stats
+
+
+def test_list_path_reweights_from_recent_completions():
+    plan, stats = _plan_and_stats()
+    scheduler = IELTSScheduler(_profile(), seed=1)
+    scheduler.regenerate_from(list(plan), from_date=TODAY, completed_tasks=stats)
+    weights = dict(scheduler.skill_weights)
+    assert weights['Writing'] > scheduler.base_weights['Writing']
+    assert weights['Reading'] < scheduler.base_weights['Reading']
+
+    # Same as the compressed path, and the same however often it runs
+    compressed = IELTSScheduler(_profile(), seed=1)
+    compressed.regenerate_from(plan, from_date=TODAY, completed_tasks=stats)
+    assert compressed.skill_weights == pytest.approx(weights)
+    scheduler.regenerate_from(list(plan), from_date=TODAY, completed_tasks=stats)
+    assert scheduler.skill_weights == pytest.approx(weights)
+
+
+def test_all_done_keeps_base_weights():
+    plan, stats = _plan_and_stats(skipped=None)
+    scheduler = IELTSScheduler(_profile(), seed=1)
+    scheduler.regenerate_from(list(plan), from_date=TODAY, completed_tasks=stats)
+    assert scheduler.skill_weights == pytest.approx(scheduler.base_weights)
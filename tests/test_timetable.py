@@ -0,0 +1,66 @@
+import datetime
+
+from models import DailySchedule, StudyTask, UserProfile
+from scheduler import IELTSScheduler
+from timetable import CompressedTimetable
+
+DAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+
+def _scheduler(days=400):
+    profile = UserProfile({'Listening': 6.0, 'Reading': 6.5, 'Writing': 5.5, 'Speaking': 6.0},
+                          {'Listening': 7.5, 'Reading': 7.5, 'Writing': 7.0, 'Speaking': 7.0},
+                          datetime.date.today() + datetime.timedelta(days=days),
+                          {day: [6, 7, 19, 21] for day in DAYS[:5]}, 3, 'Visual')
+    return IELTSScheduler(profile, seed=3)
+
+
+def _counts(days):
+    counts = {}
+    for day in days:
+        for task in day.tasks:
+            counts[task.skill] = counts.get(task.skill, 0) + 1
+    return counts
+
+
+def test_compressed_plan_expands_to_the_eager_plan():
+    eager = _scheduler().generate_timetable()
+    compressed = _scheduler().generate_compressed_timetable()
+    assert len(compressed) == len(eager)
+    assert list(compressed) == eager
+    # Weeks dropped from the cache expand to the same content again
+    first = compressed.week(0)
+    for week in range(1, compressed.n_weeks):
+        compressed.week(week)
+    assert compressed.materialized_weeks == compressed.max_cached_weeks
+    assert compressed.week(0) == first == eager[:7]
+
+
+def test_task_counts_follow_templates_and_overrides():
+    compressed = _scheduler().generate_compressed_timetable()
+    day = compressed[10]
+    compressed.set_day(10, DailySchedule(day.date, [StudyTask('extra', 'Writing', 'Essay', 1.0, predicted_impact=0.01)]))
+    assert compressed[10].tasks[0].id == 'extra'
+    for end in (None, 10, 11, 200):
+        assert compressed.task_counts(end) == _counts(compressed[:end])
+
+
+def test_forks_keep_their_own_completions_and_overrides():
+    base = _scheduler(120).generate_compressed_timetable()
+    i = next(i for i in range(7) if base[i].tasks)
+    task_id = base[i].tasks[0].id
+    done_at = datetime.datetime.combine(base.start, datetime.time(20))
+    a, b = base.fork(), base.fork({task_id: done_at})
+    assert not a[i].tasks[0].is_completed and b[i].tasks[0].completed_at == done_at
+    a.week(0)
+    a.set_completed(task_id, done_at)
+    assert a[i].tasks[0].is_completed and not base[i].tasks[0].is_completed
+    a.set_day(i, DailySchedule(a[i].date, []))
+    assert a[i].tasks == [] and len(b[i].tasks) == len(base[i].tasks) > 0
+
+
+def test_rebase_with_the_same_weights_changes_nothing():
+    compressed = _scheduler(200).generate_compressed_timetable()
+    rebased, diff = compressed.rebase(_scheduler(200), compressed.start + datetime.timedelta(days=30))
+    assert diff.changed == [] and diff.removed == []
+    assert list(rebased) == list(compressed)
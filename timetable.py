@@ -0,0 +1,350 @@
+import datetime
+import random
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from models import DailySchedule, TimetableDiff
+from instrumentation import timed
+
+# A plan repeats with this period: buffer days every 7th day, mock tests
+# every 14th, availability by weekday.
+TEMPLATE_DAYS = 14
+
+
+def task_id(skill: str, day: datetime.date, day_idx: int, part: int = 0) -> str:
+    # Ids of plan tasks: one review or mock test per buffer day, and
+    # "<skill>-<date>" for study time, "-2", "-3"... for the further parts of
+    # time split across availability windows
+    if skill == 'Mock Test':
+        return f"mock-{day_idx}"
+    if skill == 'Review':
+        return f"review-{day_idx}"
+    return f"{skill}-{day.isoformat()}" + (f"-{part + 1}" if part else "")
+
+
+def day_rng(seed: int, day_idx: int) -> random.Random:
+    # Texts for one day; the same seed and day always pick the same texts,
+    # however the plan is stored or in what order its days are built
+    return random.Random(seed * 1000003 + day_idx)
+
+
+@dataclass(slots=True, frozen=True)
+class TaskTemplate:
+    skill: str
+    hours: float
+    slot: Optional[Tuple[float, float]] = None
+    part: int = 0
+    impact: float = 0.0
+
+
+@dataclass(slots=True, frozen=True)
+class DayTemplate:
+    is_buffer_day: bool
+    tasks: Tuple[TaskTemplate, ...] = ()
+
+
+def same_plan(old: DailySchedule, new: DailySchedule) -> bool:
+    # Texts are picked at random, so only the structure of a day counts
+    if old.is_buffer_day != new.is_buffer_day or len(old.tasks) != len(new.tasks):
+        return False
+    return all(
+        a.id == b.id and a.skill == b.skill and a.duration_hours == b.duration_hours
+        and a.start_hour == b.start_hour and a.end_hour == b.end_hour
+        and round(a.predicted_impact, 6) == round(b.predicted_impact, 6)
+        for a, b in zip(old.tasks, new.tasks)
+    )
+
+
+def merge_day(old: Optional[DailySchedule], new: DailySchedule) -> Tuple[DailySchedule, bool]:
+    # Returns the day to keep and whether it differs from `old`
+    if old is None:
+        return new, True
+    if same_plan(old, new):
+        # Keep the existing object so its texts and completion state survive
+        return old, False
+    done = {t.id: t for t in old.tasks if t.is_completed}
+    for task in new.tasks:
+        if task.id in done:
+            task.is_completed = True
+            task.completed_at = done[task.id].completed_at
+    return new, True
+
+
+class LazyTimetable:
+    # A plan that builds one week (7 days from `start`) at a time, the first
+    # time any of its days is requested, and keeps the weeks it has built.
+    # Days before `split` come from `base`, the plan this one replaced.
+    def __init__(self, scheduler, start: datetime.date, total_days: int,
+                 completed_at: Optional[Dict[str, datetime.datetime]] = None,
+                 base: Optional['LazyTimetable'] = None, split: int = 0):
+        self.scheduler = scheduler
+        self.start = start
+        self.total_days = total_days
+        # Completion times by task id, applied to tasks as their week is built
+        self.completed_at = completed_at or {}
+        self._base = base
+        self._split = split if base is not None else 0
+        self._weeks: Dict[int, List[DailySchedule]] = {}
+
+    def __len__(self) -> int:
+        return self.total_days
+
+    @property
+    def n_weeks(self) -> int:
+        return -(-self.total_days // 7)
+
+    @property
+    def materialized_weeks(self) -> int:
+        return len(self._weeks)
+
+    def week(self, week_idx: int) -> List[DailySchedule]:
+        days = self._weeks.get(week_idx)
+        if days is None:
+            if not 0 <= week_idx < self.n_weeks:
+                raise IndexError(f"week {week_idx} out of range")
+            days = self._weeks[week_idx] = self._build_week(week_idx)
+        return days
+
+    @timed('timetable.build_week')
+    def _build_week(self, week_idx: int) -> List[DailySchedule]:
+        days = []
+        for day_idx in range(week_idx * 7, min((week_idx + 1) * 7, self.total_days)):
+            if day_idx < self._split:
+                days.append(self._base.day(day_idx))
+                continue
+            day = self.scheduler._build_day(day_idx, self.start + datetime.timedelta(days=day_idx))
+            for task in day.tasks:
+                if task.id in self.completed_at:
+                    task.is_completed = True
+                    task.completed_at = self.completed_at[task.id]
+            days.append(day)
+        return days
+
+    def day(self, day_idx: int) -> DailySchedule:
+        return self.week(day_idx // 7)[day_idx % 7]
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[DailySchedule, List[DailySchedule]]:
+        if isinstance(key, slice):
+            return [self.day(i) for i in range(*key.indices(self.total_days))]
+        if key < 0:
+            key += self.total_days
+        if not 0 <= key < self.total_days:
+            raise IndexError("day index out of range")
+        return self.day(key)
+
+    def __iter__(self) -> Iterator[DailySchedule]:
+        for week_idx in range(self.n_weeks):
+            yield from self.week(week_idx)
+
+    def rebase(self, scheduler, from_date: datetime.date,
+               completed_at: Optional[Dict[str, datetime.datetime]] = None) -> Tuple['LazyTimetable', TimetableDiff]:
+        # A new plan that keeps the days before from_date and lets `scheduler`
+        # build the rest. Only weeks this plan has already built are compared,
+        # so the diff lists the days a user may have seen; later weeks have
+        # no state to carry over and are built when first requested.
+        split = min(max(0, (from_date - self.start).days), self.total_days)
+        total_days = max(56, (scheduler.profile.exam_date - self.start).days)
+        if completed_at is None:
+            completed_at = self.completed_at
+        new = LazyTimetable(scheduler, self.start, total_days, completed_at, base=self, split=split)
+
+        diff = TimetableDiff()
+        for week_idx in sorted(self._weeks):
+            if (week_idx + 1) * 7 <= split:
+                continue
+            old_days = self._weeks[week_idx]
+            if week_idx >= new.n_weeks:
+                diff.removed.extend(day.date for day in old_days)
+                continue
+            new_days = new.week(week_idx)
+            for offset, old_day in enumerate(old_days):
+                day_idx = week_idx * 7 + offset
+                if day_idx < split:
+                    continue
+                if offset >= len(new_days):
+                    diff.removed.append(old_day.date)
+                    continue
+                new_days[offset], changed = merge_day(old_day, new_days[offset])
+                if changed:
+                    diff.changed.append(old_day.date)
+        return new, diff
+
+
+class CompressedTimetable:
+    # A plan stored as runs of 14-day templates plus per-day overrides.
+    # Each run covers day indices [first_day, next run's first_day) and
+    # repeats its template; a recalculation appends a run instead of
+    # rebuilding days. Texts are picked with a per-day RNG derived from
+    # `text_seed`, so a day expands to the same content every time and
+    # only the last few weeks asked for are kept as objects.
+    def __init__(self, scheduler, start: datetime.date, total_days: int,
+                 completed_at: Optional[Dict[str, datetime.datetime]] = None,
+                 text_seed: Optional[int] = None, runs: Optional[list] = None,
+                 overrides: Optional[Dict[int, DailySchedule]] = None, max_cached_weeks: int = 4):
+        self.start = start
+        self.total_days = total_days
+        # Completion times by task id, applied to tasks as they are expanded
+        self.completed_at = completed_at or {}
+        self.text_seed = text_seed if text_seed is not None else scheduler.seed
+        # [(first_day, scheduler, templates)], sorted by first_day
+        self._runs = runs if runs is not None else [(0, scheduler, self._templates(scheduler))]
+        self._run_starts = [first for first, _, _ in self._runs]
+        # Days that no longer follow their template
+        self.overrides = overrides or {}
+        self.max_cached_weeks = max_cached_weeks
+        self._weeks: OrderedDict = OrderedDict()
+
+    def _templates(self, scheduler) -> List[DayTemplate]:
+        # templates[i] is the template of every day_idx with day_idx % 14 == i
+        return [
+            scheduler._day_template(day_idx, self.start + datetime.timedelta(days=day_idx))
+            for day_idx in range(TEMPLATE_DAYS)
+        ]
+
+    def _run(self, day_idx: int):
+        return self._runs[bisect_right(self._run_starts, day_idx) - 1]
+
+    @property
+    def scheduler(self):
+        # Scheduler of the latest run
+        return self._runs[-1][1]
+
+    def template(self, day_idx: int) -> DayTemplate:
+        return self._run(day_idx)[2][day_idx % TEMPLATE_DAYS]
+
+    def __len__(self) -> int:
+        return self.total_days
+
+    @property
+    def n_weeks(self) -> int:
+        return -(-self.total_days // 7)
+
+    @property
+    def materialized_weeks(self) -> int:
+        return len(self._weeks)
+
+    def _expand(self, day_idx: int) -> DailySchedule:
+        day = self.overrides.get(day_idx)
+        if day is not None:
+            return day
+        _, scheduler, templates = self._run(day_idx)
+        current_date = self.start + datetime.timedelta(days=day_idx)
+        day = scheduler._expand_day(templates[day_idx % TEMPLATE_DAYS], day_idx, current_date,
+                                    day_rng(self.text_seed, day_idx))
+        for task in day.tasks:
+            if task.id in self.completed_at:
+                task.is_completed = True
+                task.completed_at = self.completed_at[task.id]
+        return day
+
+    def week(self, week_idx: int) -> List[DailySchedule]:
+        days = self._weeks.get(week_idx)
+        if days is not None:
+            self._weeks.move_to_end(week_idx)
+            return days
+        if not 0 <= week_idx < self.n_weeks:
+            raise IndexError(f"week {week_idx} out of range")
+        days = self._build_week(week_idx)
+        self._weeks[week_idx] = days
+        if len(self._weeks) > self.max_cached_weeks:
+            self._weeks.popitem(last=False)
+        return days
+
+    @timed('timetable.build_week')
+    def _build_week(self, week_idx: int) -> List[DailySchedule]:
+        return [self._expand(i) for i in range(week_idx * 7, min((week_idx + 1) * 7, self.total_days))]
+
+    def day(self, day_idx: int) -> DailySchedule:
+        return self.week(day_idx // 7)[day_idx % 7]
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[DailySchedule, List[DailySchedule]]:
+        if isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(self.total_days))]
+        if key < 0:
+            key += self.total_days
+        if not 0 <= key < self.total_days:
+            raise IndexError("day index out of range")
+        week = self._weeks.get(key // 7)
+        return week[key % 7] if week is not None else self._expand(key)
+
+    def __iter__(self) -> Iterator[DailySchedule]:
+        # Full passes (exports, analytics) expand days without caching them
+        for day_idx in range(self.total_days):
+            yield self[day_idx]
+
+    def template_runs(self) -> List[Tuple[int, int, List[DayTemplate]]]:
+        # [(first_day, stop_day, templates)]: days [first_day, stop_day) follow
+        # templates[day_idx % 14], apart from overrides
+        stops = self._run_starts[1:] + [self.total_days]
+        return [(first, min(stop, self.total_days), templates)
+                for (first, _, templates), stop in zip(self._runs, stops)]
+
+    def task_counts(self, end_day: Optional[int] = None) -> Dict[str, int]:
+        # Tasks per skill on days [0, end_day), counted from the templates in
+        # O(runs * 14) rather than by expanding days
+        end = self.total_days if end_day is None else min(end_day, self.total_days)
+        counts: Dict[str, int] = {}
+        for first, stop, templates in self.template_runs():
+            stop = min(stop, end)
+            if stop <= first:
+                continue
+            for i, template in enumerate(templates):
+                # days d in [first, stop) with d % 14 == i
+                n = (stop - 1 - i) // TEMPLATE_DAYS - (first - 1 - i) // TEMPLATE_DAYS
+                for task in template.tasks:
+                    counts[task.skill] = counts.get(task.skill, 0) + n
+        for day_idx, day in self.overrides.items():
+            if day_idx < end:
+                for task in self.template(day_idx).tasks:
+                    counts[task.skill] -= 1
+                for task in day.tasks:
+                    counts[task.skill] = counts.get(task.skill, 0) + 1
+        # Overrides can take away every task of a skill
+        return {skill: n for skill, n in counts.items() if n}
+
+    def fork(self, completed_at: Optional[Dict[str, datetime.datetime]] = None) -> 'CompressedTimetable':
+        # A view for another session: runs and templates are immutable and
+        # shared, while completions, overrides and expanded weeks are its own
+        return CompressedTimetable(self.scheduler, self.start, self.total_days, dict(completed_at or {}),
+                                   self.text_seed, list(self._runs), dict(self.overrides), self.max_cached_weeks)
+
+    def set_completed(self, task_id: str, completed_at: Optional[datetime.datetime]):
+        if completed_at is None:
+            self.completed_at.pop(task_id, None)
+        else:
+            self.completed_at[task_id] = completed_at
+        for days in self._weeks.values():
+            for day in days:
+                for task in day.tasks:
+                    if task.id == task_id:
+                        task.is_completed = completed_at is not None
+                        task.completed_at = completed_at
+
+    def set_day(self, day_idx: int, day: DailySchedule):
+        self.overrides[day_idx] = day
+        self._weeks.pop(day_idx // 7, None)
+
+    def rebase(self, scheduler, from_date: datetime.date,
+               completed_at: Optional[Dict[str, datetime.datetime]] = None) -> Tuple['CompressedTimetable', TimetableDiff]:
+        # Days before from_date keep their runs; from there on `scheduler`
+        # provides a new run. Texts share the same seed, so a day whose
+        # template did not change expands exactly as before, and the diff
+        # is found by comparing templates over the whole horizon.
+        split = min(max(0, (from_date - self.start).days), self.total_days)
+        total_days = max(56, (scheduler.profile.exam_date - self.start).days)
+        if completed_at is None:
+            completed_at = dict(self.completed_at)
+        runs = [run for run in self._runs if run[0] < split]
+        new = CompressedTimetable(scheduler, self.start, total_days, completed_at, self.text_seed,
+                                  runs + [(split, scheduler, self._templates(scheduler))],
+                                  {i: d for i, d in self.overrides.items() if i < split}, self.max_cached_weeks)
+
+        diff = TimetableDiff()
+        for day_idx in range(split, min(self.total_days, total_days)):
+            if day_idx in self.overrides or new.template(day_idx) != self.template(day_idx):
+                diff.changed.append(self.start + datetime.timedelta(days=day_idx))
+        diff.changed.extend(self.start + datetime.timedelta(days=i) for i in range(self.total_days, total_days))
+        diff.removed = [self.start + datetime.timedelta(days=i) for i in range(total_days, self.total_days)]
+        return new, diff